@@ -8,11 +8,14 @@ Tor curses monitoring application.
 
   nyx_interface - nyx interface singleton
   tor_controller - tor connection singleton
+  tor_controllers - connections to all tor instances we're monitoring
+  select_controller - shows another tor instance in our interface
   cache - provides our application cache
 
   show_message - shows a message to the user
   input_prompt - prompts the user for text input
-  init_controller - initializes our connection to tor
+  init_controller - initializes a connection to tor
+  init_replay - plays back a recording in place of a connection to tor
   expand_path - expands path with respect to our chroot
   chroot - provides the chroot path we reside within
   join - joins a series of strings up to a set length
@@ -21,10 +24,13 @@ Tor curses monitoring application.
     |- write - provides a content where we can write to the cache
     |
     |- relay_nickname - provides the nickname of a relay
-    +- relay_address - provides the address and orport of a relay
+    |- relay_address - provides the address and orport of a relay
+    +- graph_history - provides persisted graph samplings
 
   CacheWriter - context in which we can write to the cache
-    +- record_relay - caches information about a relay
+    |- record_relay - caches information about a relay
+    |- record_graph_history - persists graph samplings
+    +- prune_graph_history - discards graph samplings we no longer need
 
   Interface - overall nyx interface
     |- get_page - page we're showing
@@ -37,6 +43,8 @@ Tor curses monitoring application.
     |- is_paused - checks if the interface is paused
     |- set_paused - sets paused state
     |
+    |- set_suspended - hides our panels while another tor instance is shown
+    |
     |- redraw - renders our content
     |- quit - quits our application
     +- halt - stops daemon panels
@@ -125,12 +133,16 @@ __all__ = [
   'cache',
   'controller',
   'curses',
+  'dump',
+  'exporter',
   'log',
   'menu',
   'panel',
   'popups',
+  'recorder',
   'starter',
   'tracker',
+  'workers',
 ]
 
 
@@ -153,6 +165,8 @@ CONFIG = stem.util.conf.config_dict('nyx', {
 
 NYX_INTERFACE = None
 TOR_CONTROLLER = None
+TOR_CONTROLLERS = []  # all tor instances we're attached to, our first is primary
+INTERFACES = {}  # controller => interface for its tor instance
 CACHE = None
 CHROOT = None
 BASE_DIR = os.path.sep.join(__file__.split(os.path.sep)[:-1])
@@ -175,7 +189,7 @@ stem.response.events.PARSE_NEWCONSENSUS_EVENTS = False
 
 PAUSE_TIME = 0.4
 
-SCHEMA_VERSION = 2  # version of our scheme, bump this if you change the following
+SCHEMA_VERSION = 4  # version of our scheme, bump this if you change the following
 SCHEMA = (
   'CREATE TABLE schema(version INTEGER)',
   'INSERT INTO schema(version) VALUES (%i)' % SCHEMA_VERSION,
@@ -185,6 +199,9 @@ SCHEMA = (
 
   'CREATE TABLE relays(fingerprint TEXT PRIMARY KEY, address TEXT, or_port INTEGER, nickname TEXT)',
   'CREATE INDEX addresses ON relays(address)',
+
+  'CREATE TABLE graph_history(instance TEXT, stat TEXT, is_primary INTEGER, interval TEXT, timestamp REAL, value REAL)',
+  'CREATE INDEX graph_series ON graph_history(instance, stat, is_primary, interval, timestamp)',
 )
 
 
@@ -219,6 +236,8 @@ def draw_loop():
   stem.util.log.info('nyx started (initialization took %0.1f seconds)' % (time.time() - CONFIG['start_time']))
 
   while not interface._quit:
+    interface = nyx_interface()  # changes when showing another tor instance
+
     if next_key:
       key, next_key = next_key, None
     else:
@@ -230,6 +249,8 @@ def draw_loop():
       interface.set_page((interface.get_page() - 1) % interface.page_count())
     elif key.match('p'):
       interface.set_paused(not interface.is_paused())
+    elif key.match('t') and len(TOR_CONTROLLERS) > 1:
+      select_controller(TOR_CONTROLLERS[(TOR_CONTROLLERS.index(tor_controller()) + 1) % len(TOR_CONTROLLERS)])
     elif key.match('m'):
       nyx.menu.show_menu()
     elif key.match('q'):
@@ -281,6 +302,51 @@ def tor_controller():
   return TOR_CONTROLLER
 
 
+def tor_controllers():
+  """
+  Provides the connections of all tor instances we're monitoring, with our
+  primary instance first.
+
+  :returns: **list** of :class:`~stem.control.Controller` nyx is using
+  """
+
+  return list(TOR_CONTROLLERS)
+
+
+def select_controller(controller):
+  """
+  Shows another tor instance in our interface. Each instance has its own
+  panels, which are created when it's first shown and suspended while another
+  instance is selected.
+
+  :param stem.control.Controller controller: tor instance to be shown
+  """
+
+  global TOR_CONTROLLER, NYX_INTERFACE
+
+  if controller is TOR_CONTROLLER:
+    return
+
+  if NYX_INTERFACE:
+    NYX_INTERFACE.set_suspended(True)
+
+  TOR_CONTROLLER = controller
+  nyx.tracker.select_controller(controller)
+
+  if controller in INTERFACES:
+    NYX_INTERFACE = INTERFACES[controller]
+    NYX_INTERFACE.set_suspended(False)
+  else:
+    interface = Interface()  # constructor sets NYX_INTERFACE
+    interface.redraw()
+
+    for panel in interface:
+      if isinstance(panel, nyx.panel.DaemonPanel):
+        panel.start()
+
+  NYX_INTERFACE.redraw(force = True)
+
+
 def cache():
   """
   Provides the sqlite cache for application data.
@@ -328,15 +394,50 @@ def input_prompt(msg, initial_value = ''):
 
 def init_controller(*args, **kwargs):
   """
-  Sets the Controller used by nyx. This is a passthrough for Stem's
-  :func:`~stem.connection.connect` function.
+  Connects to a tor instance. This is a passthrough for Stem's
+  :func:`~stem.connection.connect` function. Our first connection is the
+  instance we initially show, and further calls attach to additional
+  instances.
+
+  :returns: :class:`~stem.control.Controller` nyx is using
+  """
+
+  controller = stem.connection.connect(*args, **kwargs)
+
+  if controller is not None:
+    _add_controller(controller)
+
+  return controller
+
+
+def init_replay(path, speed = 1.0):
+  """
+  Plays back a recording from our --record argument. This stands in for a
+  connection to tor.
+
+  :param str path: recording to play back
+  :param float speed: multiplier for how quickly we play back events
 
   :returns: :class:`~stem.control.Controller` nyx is using
+
+  :raises:
+    * **IOError** if unable to read the recording
+    * **ValueError** if the recording is malformed
   """
 
+  controller = stem.control.Controller(nyx.recorder.ReplaySocket(path, speed), is_authenticated = True)
+  _add_controller(controller)
+
+  return controller
+
+
+def _add_controller(controller):
   global TOR_CONTROLLER
-  TOR_CONTROLLER = stem.connection.connect(*args, **kwargs)
-  return TOR_CONTROLLER
+
+  TOR_CONTROLLERS.append(controller)
+
+  if TOR_CONTROLLER is None:
+    TOR_CONTROLLER = controller
 
 
 @uses_settings
@@ -550,6 +651,21 @@ class Cache(object):
 
     return self._query('SELECT relays_updated_at FROM metadata').fetchone()[0]
 
+  def graph_history(self, instance, stat, is_primary, interval, since = 0):
+    """
+    Provides the graph samplings we've persisted for a series.
+
+    :param str instance: tor instance the samplings are of
+    :param str stat: graphed statistic
+    :param bool is_primary: primary or secondary subgraph
+    :param str interval: sampling interval
+    :param float since: only provide samplings after this unix timestamp
+
+    :returns: **list** of (timestamp, value) tuples from newest to oldest
+    """
+
+    return self._query('SELECT timestamp, value FROM graph_history WHERE instance=? AND stat=? AND is_primary=? AND interval=? AND timestamp>? ORDER BY timestamp DESC', instance, stat, int(is_primary), interval, since).fetchall()
+
   def _query(self, query, *param):
     """
     Performs a query on our cache.
@@ -587,6 +703,32 @@ class CacheWriter(object):
     self._cache._query('INSERT OR REPLACE INTO relays(fingerprint, address, or_port, nickname) VALUES (?,?,?,?)', fingerprint, address, or_port, nickname)
     self._cache._query('UPDATE metadata SET relays_updated_at=?', time.time())
 
+  def record_graph_history(self, instance, stat, is_primary, samples):
+    """
+    Persists graph samplings.
+
+    :param str instance: tor instance the samplings are of
+    :param str stat: graphed statistic
+    :param bool is_primary: primary or secondary subgraph
+    :param list samples: (interval, timestamp, value) tuples to be recorded
+    """
+
+    for interval, timestamp, value in samples:
+      self._cache._query('INSERT INTO graph_history(instance, stat, is_primary, interval, timestamp, value) VALUES (?,?,?,?,?,?)', instance, stat, int(is_primary), interval, timestamp, value)
+
+  def prune_graph_history(self, instance, stat, is_primary, interval, before):
+    """
+    Discards graph samplings that are older than we can display.
+
+    :param str instance: tor instance the samplings are of
+    :param str stat: graphed statistic
+    :param bool is_primary: primary or secondary subgraph
+    :param str interval: sampling interval
+    :param float before: unix timestamp prior to which samplings are removed
+    """
+
+    self._cache._query('DELETE FROM graph_history WHERE instance=? AND stat=? AND is_primary=? AND interval=? AND timestamp<?', instance, stat, int(is_primary), interval, before)
+
 
 class Interface(object):
   """
@@ -600,9 +742,11 @@ class Interface(object):
     self._page_panels = []
     self._header_panel = None
     self._paused = False
+    self._suspended = False
     self._quit = False
 
     NYX_INTERFACE = self
+    INTERFACES[tor_controller()] = self
 
     self._header_panel = nyx.panel.header.HeaderPanel()
     first_page_panels = []
@@ -723,6 +867,26 @@ class Interface(object):
       for panel in self.page_panels():
         panel.redraw()
 
+  def set_suspended(self, is_suspended):
+    """
+    Hides our panels and holds off on their periodic updates while another
+    tor instance is shown. Panels still receive events from our tor instance
+    so their graphs and logs remain complete.
+
+    :param bool is_suspended: suspends the interface if **True**, resumes it
+      otherwise
+    """
+
+    if is_suspended != self._suspended:
+      self._suspended = is_suspended
+      visible_panels = [] if is_suspended else self.page_panels()
+
+      for panel in self:
+        panel.set_visible(panel in visible_panels)
+
+        if isinstance(panel, nyx.panel.DaemonPanel):
+          panel.set_suspended(is_suspended)
+
   def redraw(self, force = False):
     """
     Renders our displayed content.
@@ -780,4 +944,6 @@ import nyx.panel.interpreter
 import nyx.panel.log
 import nyx.panel.torrc
 import nyx.popups
+import nyx.recorder
 import nyx.starter
+import nyx.tracker
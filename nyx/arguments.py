@@ -19,12 +19,19 @@ DEFAULT_ARGS = {
   'control_socket': '/var/run/tor/control',
   'config': os.path.join(os.path.expanduser('~/.nyx'), 'config'),
   'debug_path': None,
+  'dump': False,
+  'dump_full': False,
+  'exporter': None,
+  'instances': (),
   'logged_events': 'NOTICE,WARN,ERR,NYX_NOTICE,NYX_WARNING,NYX_ERROR',
+  'record': None,
+  'replay': None,
+  'replay_speed': 1.0,
   'print_version': False,
   'print_help': False,
 }
 
-OPT = 'i:s:c:d:l:vh'
+OPT = 'i:s:c:d:l:e:Dvh'
 
 OPT_EXPANDED = [
   'interface=',
@@ -32,6 +39,12 @@ OPT_EXPANDED = [
   'config=',
   'debug=',
   'log=',
+  'exporter=',
+  'dump',
+  'dump-full',
+  'record=',
+  'replay=',
+  'replay-speed=',
   'version',
   'help',
 ]
@@ -43,16 +56,36 @@ Terminal status monitor for Tor relays.
   -i, --interface [ADDRESS:]PORT  change control interface from {address}:{port}
   -s, --socket SOCKET_PATH        attach using unix domain socket if present,
                                     SOCKET_PATH defaults to: {socket}
+                                    (repeat either to monitor several tor
+                                    instances)
   -c, --config CONFIG_PATH        loaded configuration options, CONFIG_PATH
                                     defaults to: {config_path}
   -d, --debug LOG_PATH            writes all nyx logs to the given location
   -l, --log EVENTS                comma separated list of events to log
+  -e, --exporter [ADDRESS:]PORT   serve prometheus metrics rather than showing
+                                    our interface, a path instead provides
+                                    them through a unix socket
+  -D, --dump                      prints a json snapshot of tor's state rather
+                                    than showing our interface
+      --dump-full                 snapshot that also refreshes our consensus
+                                    cache and includes tor's log
+      --record PATH               saves the events and replies we receive
+                                    from tor so they can be replayed
+      --replay PATH               plays back a recording rather than
+                                    connecting to tor
+      --replay-speed MULTIPLIER   rate to play back events, such as 10 for
+                                    ten times faster than they were recorded
   -v, --version                   provides version information
   -h, --help                      presents this help
 
 Example:
 nyx -i 1643             attach to control port 1643
 nyx -l we -c /tmp/cfg   use this configuration file with 'WARN'/'ERR' events
+nyx -i 9051 -i 9061     monitor the tor instances on both control ports
+nyx -e 9052             serve metrics at http://127.0.0.1:9052/metrics
+nyx -D > state.json     save a snapshot of tor's present state
+nyx --record relay.gz   record what tor tells us
+nyx --replay relay.gz   play back that recording without tor
 """.strip()
 
 
@@ -79,36 +112,46 @@ def parse(argv):
     raise ValueError('%s (for usage provide --help)' % exc)
 
   has_port_arg, has_socket_arg = False, False
+  instances = []  # endpoints of additional tor instances
 
   for opt, arg in recognized_args:
     if opt in ('-i', '--interface'):
-      address = None
-
-      if ':' in arg:
-        address, port = arg.split(':', 1)
-      else:
-        port = arg
-
-      if address:
-        if not stem.util.connection.is_valid_ipv4_address(address):
-          raise ValueError("'%s' isn't a valid IPv4 address" % address)
+      if has_port_arg:
+        instances.append(_parse_endpoint(arg, DEFAULT_ARGS['control_port'][0]))
       else:
-        address = args['control_port'][0]
-
-      if not stem.util.connection.is_valid_port(port):
-        raise ValueError("'%s' isn't a valid port number" % port)
-
-      args['control_port'] = (address, int(port))
-      has_port_arg = True
+        args['control_port'] = _parse_endpoint(arg, args['control_port'][0])
+        has_port_arg = True
     elif opt in ('-s', '--socket'):
-      args['control_socket'] = arg
-      has_socket_arg = True
+      if has_socket_arg:
+        instances.append(arg)
+      else:
+        args['control_socket'] = arg
+        has_socket_arg = True
     elif opt in ('-c', '--config'):
       args['config'] = arg
     elif opt in ('-d', '--debug'):
       args['debug_path'] = os.path.expanduser(arg)
     elif opt in ('-l', '--log'):
       args['logged_events'] = arg
+    elif opt in ('-e', '--exporter'):
+      args['exporter'] = os.path.expanduser(arg) if os.path.sep in arg else _parse_endpoint(arg, '127.0.0.1')
+    elif opt in ('-D', '--dump'):
+      args['dump'] = True
+    elif opt == '--dump-full':
+      args['dump'] = True
+      args['dump_full'] = True
+    elif opt == '--record':
+      args['record'] = os.path.expanduser(arg)
+    elif opt == '--replay':
+      args['replay'] = os.path.expanduser(arg)
+    elif opt == '--replay-speed':
+      try:
+        args['replay_speed'] = float(arg)
+      except ValueError:
+        args['replay_speed'] = 0
+
+      if args['replay_speed'] <= 0:
+        raise ValueError("'%s' isn't a valid replay speed" % arg)
     elif opt in ('-v', '--version'):
       args['print_version'] = True
     elif opt in ('-h', '--help'):
@@ -122,12 +165,42 @@ def parse(argv):
   elif has_port_arg and not has_socket_arg:
     args['control_socket'] = None
 
+  args['instances'] = tuple(instances)
+
   # translates our args dict into a named tuple
 
   Args = collections.namedtuple('Args', args.keys())
   return Args(**args)
 
 
+def _parse_endpoint(arg, default_address):
+  """
+  Parses an [ADDRESS:]PORT argument.
+
+  :returns: **tuple** of the form (address, port)
+
+  :raises: **ValueError** if the address or port are invalid
+  """
+
+  address = None
+
+  if ':' in arg:
+    address, port = arg.split(':', 1)
+  else:
+    port = arg
+
+  if address:
+    if not stem.util.connection.is_valid_ipv4_address(address):
+      raise ValueError("'%s' isn't a valid IPv4 address" % address)
+  else:
+    address = default_address
+
+  if not stem.util.connection.is_valid_port(port):
+    raise ValueError("'%s' isn't a valid port number" % port)
+
+  return (address, int(port))
+
+
 def get_help():
   """
   Provides our --help usage information.
@@ -29,6 +29,7 @@ if we want Windows support in the future too.
   is_wide_characters_supported - checks if curses supports wide character
 
   draw - renders subwindow that can be drawn into
+  offscreen_subwindow - subwindow that tracks positions without rendering
 
   Subwindow - subwindow that can be drawn within
     |- addstr - draws a string
@@ -45,6 +46,7 @@ if we want Windows support in the future too.
 
   Scroller - scrolls content with keyboard navigation
     |- location - present scroll location
+    |- scroll_to - moves to a given scroll location
     +- handle_key - moves scroll based on user input
 
   CursorScroller - scrolls content with a cursor for selecting items
@@ -709,7 +711,7 @@ def is_wide_characters_supported():
   return False
 
 
-def draw(func, left = 0, top = 0, width = None, height = None, background = None, draw_if_resized = None):
+def draw(func, left = 0, top = 0, width = None, height = None, background = None, draw_if_resized = None, erase = True):
   """
   Renders a subwindow. This calls the given draw function with a
   :class:`~nyx.curses._Subwindow`.
@@ -722,6 +724,8 @@ def draw(func, left = 0, top = 0, width = None, height = None, background = None
   :param nyx.curses.Color background: background color, unset if **None**
   :param nyx.curses.Dimension draw_if_resized: only draw content if
     dimentions have changed from this
+  :param bool erase: clears the subwindow before drawing, if **False** then
+    the function draws over our prior content
 
   :returns: :class:`~nyx.curses.Dimension` for the space we drew within
   """
@@ -754,7 +758,9 @@ def draw(func, left = 0, top = 0, width = None, height = None, background = None
       return subwindow_dimensions  # draw size hasn't changed
 
     curses_subwindow = CURSES_SCREEN.subwin(subwindow_height, subwindow_width, top, left)
-    curses_subwindow.erase()
+
+    if erase:
+      curses_subwindow.erase()
 
     if background:
       curses_subwindow.bkgd(' ', curses_attr(background, HIGHLIGHT))
@@ -769,6 +775,20 @@ def draw(func, left = 0, top = 0, width = None, height = None, background = None
     CURSES_LOCK.release()
 
 
+def offscreen_subwindow(width, height):
+  """
+  Provides a subwindow that isn't rendered. Drawing into this provides the
+  positions content would occupy, so callers can tell how much space it takes.
+
+  :param int width: subwindow width
+  :param int height: subwindow height
+
+  :returns: :class:`~nyx.curses._Subwindow` that discards what's drawn in it
+  """
+
+  return _Subwindow(width, height, None)
+
+
 class _Subwindow(object):
   """
   Subwindow that can be drawn within.
@@ -797,7 +817,10 @@ class _Subwindow(object):
     if self.width > x and self.height > y:
       try:
         cropped_msg = msg[:self.width - x]
-        self._curses_subwindow.addstr(y, x, cropped_msg, curses_attr(*attr))
+
+        if self._curses_subwindow is not None:
+          self._curses_subwindow.addstr(y, x, cropped_msg, curses_attr(*attr))
+
         return x + len(cropped_msg)
       except:
         pass
@@ -1040,6 +1063,16 @@ class Scroller(object):
 
     return self._location
 
+  def scroll_to(self, location):
+    """
+    Moves to the given scroll location. This is bounded to a valid range the
+    next time our location is requested with the content and page height.
+
+    :param int location: position to scroll to
+    """
+
+    self._location = max(0, location)
+
   def handle_key(self, key, content_height, page_height):
     """
     Moves scrolling location according to the given input...
@@ -0,0 +1,241 @@
+# Copyright 2020, Damian Johnson and The Tor Project
+# See LICENSE for licensing information
+
+"""
+Headless mode that provides a one-time snapshot of what our interface would
+show as a json document. Sections are fetched in parallel, and slow lookups
+(refreshing our consensus cache and reading tor's log file) are skipped unless
+requested.
+
+::
+
+  main - prints a snapshot of tor's state
+  snapshot - provides a snapshot of tor's state
+"""
+
+import json
+import threading
+import time
+
+import nyx.log
+import nyx.panel.connection
+import nyx.panel.graph
+import nyx.panel.header
+import nyx.tracker
+
+import stem.util.log
+
+from nyx import tor_controller
+from stem.util import conf, datetime_to_unix
+
+CONFIG = conf.config_dict('nyx', {
+  'prepopulate_read_limit': 5000,
+})
+
+TIMEOUT = 0.5  # seconds we'll wait for our trackers to provide results
+
+HEADER_ATTR = (
+  'is_connected',
+  'connection_time',
+  'last_heartbeat',
+  'fingerprint',
+  'nickname',
+  'newnym_wait',
+  'exit_policy',
+  'flags',
+  'version',
+  'version_status',
+  'address',
+  'or_port',
+  'dir_port',
+  'control_port',
+  'socket_path',
+  'is_relay',
+  'auth_type',
+  'pid',
+  'start_time',
+  'fd_limit',
+  'fd_used',
+  'hostname',
+  'platform',
+)
+
+
+def snapshot(full = False, timeout = TIMEOUT):
+  """
+  Provides the present state of tor, with a section for each of our panels.
+
+  :param bool full: includes slower lookups if **True**, refreshing our
+    consensus cache and reading tor's log file
+  :param float timeout: seconds to wait for our trackers to provide results,
+    sections that rely on a tracker without results by then are unavailable
+
+  :returns: **dict** with our snapshot, sections we're unable to provide are
+    **None**
+  """
+
+  # Our trackers resolve in their own threads. Starting them before anything
+  # else lets their lookups run alongside the rest of our queries.
+
+  nyx.tracker.get_consensus_tracker(refresh = full)
+  nyx.tracker.get_resource_tracker()
+  nyx.tracker.get_connection_tracker()
+
+  deadline = time.time() + timeout
+
+  sections = {
+    'header': _header,
+    'resources': lambda: _resources(deadline),
+    'bandwidth': _bandwidth,
+    'connections': lambda: _connections(deadline),
+    'circuits': _circuits,
+    'config': _config,
+  }
+
+  if full:
+    sections['log'] = _log
+
+  result = {'timestamp': time.time()}
+  threads = []
+
+  def fetch(name, func):
+    try:
+      result[name] = func()
+    except Exception as exc:
+      stem.util.log.warn('Unable to provide the %s of our snapshot: %s' % (name, exc))
+      result[name] = None
+
+  for name, func in sections.items():
+    thread = threading.Thread(target = fetch, args = (name, func))
+    thread.setDaemon(True)
+    thread.start()
+    threads.append(thread)
+
+  for thread in threads:
+    thread.join()
+
+  return result
+
+
+def main(full = False):
+  """
+  Prints a snapshot of tor's state as json.
+
+  :param bool full: includes slower lookups if **True**
+  """
+
+  print(json.dumps(snapshot(full), indent = 2, sort_keys = True, default = str))
+
+
+def _wait_for(tracker, deadline):
+  """
+  Waits until a tracker has results, or we reach our deadline.
+  """
+
+  while tracker.run_counter() == 0 and tracker.is_alive() and time.time() < deadline:
+    time.sleep(0.01)
+
+
+def _header():
+  vals = nyx.panel.header.Sampling.create()
+
+  header = dict([(attr, getattr(vals, attr)) for attr in HEADER_ATTR])
+  header['exit_policy'] = str(vals.exit_policy) if vals.exit_policy else None
+  header['flags'] = list(vals.flags)
+
+  return header
+
+
+def _resources(deadline):
+  tracker = nyx.tracker.get_resource_tracker()
+  _wait_for(tracker, deadline)
+
+  return tracker.get_value()._asdict() if tracker.run_counter() else None
+
+
+def _bandwidth():
+  stats = nyx.panel.graph.BandwidthStats()
+  accounting = tor_controller().get_accounting_stats(None)
+
+  def usage(data):
+    return {
+      'latest': data.latest_value,
+      'total': data.total,
+      'percentiles': dict([(str(percent), data.percentile(percent)) for percent in nyx.panel.graph.HEADER_PERCENTILES]),
+    }
+
+  return {
+    'read': usage(stats.primary),
+    'written': usage(stats.secondary),
+    'accounting': accounting._asdict() if accounting else None,
+  }
+
+
+def _connections(deadline):
+  tracker = nyx.tracker.get_connection_tracker()
+  _wait_for(tracker, deadline)
+
+  if not tracker.run_counter():
+    return None
+
+  connections = []
+
+  for conn in tracker.get_value():
+    entry = nyx.panel.connection.Entry.from_connection(conn)
+    line = entry.get_lines()[0]
+    is_private = entry.is_private()
+
+    connections.append({
+      'type': entry.get_type(),
+      'protocol': conn.protocol,
+      'local_address': conn.local_address,
+      'local_port': conn.local_port,
+      'remote_address': None if is_private else conn.remote_address,
+      'remote_port': None if is_private else conn.remote_port,
+      'fingerprint': line.fingerprint,
+      'nickname': line.nickname,
+      'locale': None if is_private else line.locale,
+      'start_time': conn.start_time,
+    })
+
+  return {
+    'counts': tracker.get_counts()._asdict(),
+    'entries': connections,
+  }
+
+
+def _circuits():
+  consensus_tracker = nyx.tracker.get_consensus_tracker()
+  circuits = []
+
+  for circ in tor_controller().get_circuits([]):
+    circuits.append({
+      'id': circ.id,
+      'status': circ.status,
+      'purpose': circ.purpose,
+      'build_flags': circ.build_flags,
+      'created': datetime_to_unix(circ.created) if circ.created else None,
+      'path': [{'fingerprint': fp, 'nickname': nickname if nickname else consensus_tracker.get_relay_nickname(fp)} for fp, nickname in circ.path],
+    })
+
+  return circuits
+
+
+def _config():
+  config = {}
+
+  for line in tor_controller().get_info('config-text', '').splitlines():
+    if line.strip():
+      option, value = (line.split(' ', 1) + [''])[:2]
+      config.setdefault(option, []).append(value)
+
+  return config
+
+
+def _log():
+  path = nyx.log.log_file_path(tor_controller())
+
+  if not path:
+    return None
+
+  return [{'timestamp': entry.timestamp, 'type': entry.type, 'message': entry.message} for entry in nyx.log.read_tor_log(path, CONFIG['prepopulate_read_limit'])]
@@ -0,0 +1,179 @@
+# Copyright 2020, Damian Johnson and The Tor Project
+# See LICENSE for licensing information
+
+"""
+Headless mode that provides our tor metrics to monitoring systems in the
+`Prometheus text format
+<https://prometheus.io/docs/instrumenting/exposition_formats/>`_. Values come
+from the same trackers as our interface, so they refresh at the same rates.
+
+::
+
+  main - serves our metrics until interrupted
+  metrics - provides prometheus formatted metrics
+  serve - provides a server for our metrics
+"""
+
+import os
+import socketserver
+import stat
+
+import nyx.panel.graph
+import nyx.tracker
+
+import stem.control
+import stem.util.log
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from nyx import tor_controller
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics(bandwidth = None):
+  """
+  Provides our present tor metrics.
+
+  :param nyx.panel.graph.BandwidthStats bandwidth: bandwidth usage we're
+    tracking, this is omitted if **None**
+
+  :returns: **str** with metrics in the prometheus text format
+  """
+
+  controller = tor_controller()
+  lines = []
+
+  def add(name, metric_type, description, values):
+    lines.append('# HELP %s %s' % (name, description))
+    lines.append('# TYPE %s %s' % (name, metric_type))
+
+    for labels, value in values:
+      label_str = ','.join(['%s="%s"' % (k, v) for k, v in labels])
+      lines.append('%s%s %s' % (name, '{%s}' % label_str if label_str else '', _number(value)))
+
+  add('nyx_tor_up', 'gauge', 'Whether we are connected to tor.', [((), 1 if controller.is_alive() else 0)])
+
+  if bandwidth:
+    add('nyx_tor_read_bytes_total', 'counter', 'Bytes tor has read.', [((), bandwidth.primary.total)])
+    add('nyx_tor_written_bytes_total', 'counter', 'Bytes tor has written.', [((), bandwidth.secondary.total)])
+    add('nyx_tor_read_bytes_per_second', 'gauge', 'Rate at which tor read during the last second.', [((), bandwidth.primary.latest_value)])
+    add('nyx_tor_written_bytes_per_second', 'gauge', 'Rate at which tor wrote during the last second.', [((), bandwidth.secondary.latest_value)])
+
+  resources = nyx.tracker.get_resource_tracker().get_value()
+
+  add('nyx_tor_cpu_ratio', 'gauge', 'Cpu usage of tor since we last checked.', [((), resources.cpu_sample)])
+  add('nyx_tor_cpu_seconds_total', 'counter', 'Cpu time tor has used.', [((), resources.cpu_total)])
+  add('nyx_tor_memory_bytes', 'gauge', 'Memory used by tor.', [((), resources.memory_bytes)])
+  add('nyx_tor_memory_ratio', 'gauge', 'Portion of the system memory used by tor.', [((), resources.memory_percent)])
+
+  counts = nyx.tracker.get_connection_tracker().get_counts()
+  add('nyx_tor_connections', 'gauge', 'Connections tor has established.', [((('direction', direction),), getattr(counts, direction)) for direction in counts._fields])
+
+  accounting = controller.get_accounting_stats(None)
+
+  if accounting:
+    add('nyx_tor_accounting_read_bytes', 'gauge', 'Bytes read this accounting period.', [((), accounting.read_bytes)])
+    add('nyx_tor_accounting_written_bytes', 'gauge', 'Bytes written this accounting period.', [((), accounting.written_bytes)])
+    add('nyx_tor_accounting_read_limit_bytes', 'gauge', 'Bytes that can be read this accounting period.', [((), accounting.read_limit)])
+    add('nyx_tor_accounting_write_limit_bytes', 'gauge', 'Bytes that can be written this accounting period.', [((), accounting.write_limit)])
+    add('nyx_tor_accounting_reset_seconds', 'gauge', 'Seconds until the accounting period resets.', [((), accounting.time_until_reset)])
+
+  return '\n'.join(lines) + '\n'
+
+
+def serve(endpoint, bandwidth = None):
+  """
+  Provides a server that responds to http requests with our metrics. This
+  isn't started, call its **serve_forever()** method to do so.
+
+  :param tuple,str endpoint: (address, port) tuple to listen on, or the path
+    of a unix socket
+  :param nyx.panel.graph.BandwidthStats bandwidth: bandwidth usage to include
+
+  :returns: **socketserver.BaseServer** for our metrics
+
+  :raises:
+    * **IOError** if our unix socket path exists and isn't a socket
+    * **socket.error** if unable to listen on the endpoint
+  """
+
+  if isinstance(endpoint, tuple):
+    server = _HTTPServer(endpoint, _MetricsHandler)
+  else:
+    if os.path.exists(endpoint):
+      if not stat.S_ISSOCK(os.stat(endpoint).st_mode):
+        raise IOError("%s already exists and isn't a socket" % endpoint)
+
+      os.remove(endpoint)  # stale socket from a prior run
+
+    server = _UnixHTTPServer(endpoint, _MetricsHandler)
+
+  server.bandwidth = bandwidth
+  return server
+
+
+def main(endpoint):
+  """
+  Serves our metrics until we're interrupted.
+
+  :param tuple,str endpoint: (address, port) tuple to listen on, or the path
+    of a unix socket
+  """
+
+  # Our trackers take a moment to get their first results, so starting them
+  # now rather than on our first scrape so it doesn't report zeros.
+
+  nyx.tracker.get_resource_tracker()
+  nyx.tracker.get_connection_tracker()
+
+  bandwidth = nyx.panel.graph.BandwidthStats()
+  tor_controller().add_event_listener(bandwidth.bandwidth_event, stem.control.EventType.BW)
+
+  server = serve(endpoint, bandwidth)
+  print('Serving tor metrics at %s' % ('http://%s:%i/metrics' % server.server_address[:2] if isinstance(endpoint, tuple) else endpoint))
+
+  try:
+    server.serve_forever()
+  finally:
+    server.server_close()
+
+
+class _HTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+  daemon_threads = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+  daemon_threads = True
+
+  def server_close(self):
+    socketserver.UnixStreamServer.server_close(self)
+
+    if os.path.exists(self.server_address):
+      os.remove(self.server_address)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+  def do_GET(self):
+    if self.path.split('?')[0] not in ('/', '/metrics'):
+      self.send_error(404)
+      return
+
+    try:
+      body = metrics(self.server.bandwidth).encode('utf-8')
+    except Exception as exc:
+      stem.util.log.warn('Unable to provide metrics: %s' % exc)
+      self.send_error(500)
+      return
+
+    self.send_response(200)
+    self.send_header('Content-Type', CONTENT_TYPE)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, msg, *args):
+    stem.util.log.debug('Metrics request: %s' % (msg % args))  # unix sockets lack the client address our parent logs
+
+
+def _number(value):
+  return str(int(value)) if float(value).is_integer() else repr(float(value))
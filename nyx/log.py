@@ -15,16 +15,51 @@ runlevels.
 
   LogGroup - thread safe, deduplicated grouping of events
     |- add - adds an event to the group
+    |- add_older - adds an event that predates the rest of the group
     |- pop - removes and returns an event
+    |- search - entries containing the given words
+    |- entries - entries of the given event types
+    |- count - number of entries of the given event types
+    |- archive - compressed storage of entries we've evicted
+    |- memory_usage - approximate memory used by our entries
     +- clone - deep copy of this LogGroup
 
+  LogArchive - compressed storage of older log events
+    |- add - adds an event that was evicted from a LogGroup
+    |- entries - archived entries of the given event types
+    |- count - number of archived entries of the given event types
+    |- search - archived entries containing the given words
+    |- memory_usage - approximate memory used by our archive
+    +- clone - copy of this LogArchive
+
+  DuplicateGroup - compact record of duplicate log events
+    |- first_timestamp - when our oldest member was logged
+    |- last_timestamp - when our newest member was logged
+    |- add - adds a newer member
+    |- add_older - adds an older member
+    |- pop - removes our oldest member
+    +- clone - copy of this DuplicateGroup
+
   LogEntry - individual log event
     |- is_duplicate_of - checks if a duplicate message of another LogEntry
     |- day_count - number of days since this even occured
+    |- memory_usage - approximate memory used by this entry
     +- clone - deep copy of this LogEntry
 
   LogFileOutput - writes log events to a file
-    +- write - persist a given message
+    |- write - persist a given message
+    |- dropped - number of messages dropped because we fell behind
+    +- close - writes pending messages and closes the file
+
+  EventQueue - bounded queue processing events in batches on a worker thread
+    |- start - begins processing our events
+    |- put - queues an event to be processed
+    |- metrics - provides our queue depth, batch sizes, and dropped events
+    +- stop - processes remaining events and stops our worker
+
+  LogFileTailer - follows tor's log file, providing new entries as they're written
+    |- start - begins following the file
+    +- stop - stops following the file
 
   LogFilters - regex filtering of log events
     |- select - filters by this regex
@@ -32,20 +67,50 @@ runlevels.
     |- latest_selections - past regex selections
     |- match - checks if a LogEntry matches this filter
     +- clone - deep copy of this LogFilters
+
+.. data:: QueueMetrics
+
+  Throughput of an :class:`~nyx.log.EventQueue`.
+
+  :var int depth: number of events awaiting processing
+  :var int last_batch_size: number of events in the last batch we processed
+  :var int largest_batch_size: most events we've processed in a single batch
+  :var int processed: total number of events we've processed
+  :var int dropped: number of events dropped because our queue was full
+
+.. data:: ArchiveBlock
+
+  Compressed block of entries within a :class:`~nyx.log.LogArchive`.
+
+  :var int block_id: unique identifier for this block
+  :var int first_timestamp: unix timestamp of our oldest entry
+  :var int last_timestamp: unix timestamp of our newest entry
+  :var dict type_counts: mapping of event types to their number of entries
+  :var bytes data: zlib compressed entries
 """
 
+import bisect
 import collections
+import contextlib
 import datetime
+import functools
+import gzip
+import heapq
+import mmap
 import os
+import queue
 import re
+import shutil
+import sys
 import time
 import threading
+import zlib
 
 import stem.util.conf
 import stem.util.log
-import stem.util.system
 
 import nyx
+import nyx.workers
 
 try:
   # added in python 3.2
@@ -53,10 +118,55 @@ try:
 except ImportError:
   from stem.util.lru_cache import lru_cache
 
+QueueMetrics = collections.namedtuple('QueueMetrics', [
+  'depth',
+  'last_batch_size',
+  'largest_batch_size',
+  'processed',
+  'dropped',
+])
+
+ArchiveBlock = collections.namedtuple('ArchiveBlock', [
+  'block_id',
+  'first_timestamp',
+  'last_timestamp',
+  'type_counts',
+  'data',
+])
+
 TOR_RUNLEVELS = ['DEBUG', 'INFO', 'NOTICE', 'WARN', 'ERR']
 NYX_RUNLEVELS = ['NYX_DEBUG', 'NYX_INFO', 'NYX_NOTICE', 'NYX_WARNING', 'NYX_ERROR']
+# Number of events of each type we've received from each tor instance, used
+# to graph event rates. This is only incremented by the ingestion thread of
+# the instance's log panel.
+
+EVENT_COUNTS = collections.defaultdict(lambda: collections.defaultdict(int))  # controller => {event type => count}
+
 TIMEZONE_OFFSET = time.altzone if time.localtime()[8] else time.timezone
 GROUP_BY_DAY = True
+ROTATED_LOG_COUNT = 5  # number of rotated files LogFileOutput retains
+DUPLICATE_SAMPLE_SIZE = 10  # number of members a DuplicateGroup retains
+
+# Approximate bytes used by a LogEntry beyond its strings. This is the object
+# itself, its attribute dictionary, and references to it from our LogGroup's
+# buffers. Each word of its message also costs an entry in our search index.
+
+ENTRY_OVERHEAD = 500
+INDEXED_WORD_OVERHEAD = 64
+
+ARCHIVE_BLOCK_SIZE = 2000  # number of entries in each LogArchive block
+ARCHIVE_CACHE_SIZE = 4  # number of decompressed blocks LogArchive retains
+
+# Separators for archived entries and their fields. Messages shouldn't contain
+# these control characters, but they're replaced if present.
+
+ARCHIVE_ENTRY_SEPARATOR = '\x1e'
+ARCHIVE_FIELD_SEPARATOR = '\x1f'
+
+# Words we index log messages by for searching. Periods are included so
+# addresses such as '127.0.0.1' are a single word.
+
+SEARCH_TOKEN = re.compile(r'[\w.]+')
 
 
 def day_count(timestamp):
@@ -213,63 +323,752 @@ def _common_log_messages():
   return messages
 
 
+def _search_tokens(text):
+  """
+  Provides the words we index or search a log message by. This is case
+  insensitive, and disregards trailing periods that end sentences.
+
+  :param str text: text to be tokenized
+
+  :returns: **set** of words within the text
+  """
+
+  tokens = set()
+
+  for token in SEARCH_TOKEN.findall(text.lower()):
+    token = token.strip('.')
+
+    if token:
+      tokens.add(token)
+
+  return tokens
+
+
 class LogGroup(object):
   """
   Thread safe collection of LogEntry instancs, which maintains a certain size
-  and supports deduplication.
+  and supports deduplication. Entries are indexed by the words of their
+  message so they can be searched without scanning the group.
+
+  Each event type is buffered separately, and merged when iterated over. This
+  way showing or hiding a type doesn't require filtering the others.
+
+  :param int max_size: maximum number of entries we retain
+  :param dict type_limits: mapping of event types to the maximum number of
+    entries we retain of that type
+  :param int max_memory: approximate bytes our entries can use, evicting the
+    oldest when exceeded, unlimited if **None**
+  :param nyx.log.LogArchive archive: compressed storage our evicted entries
+    are moved into, they're discarded if **None**
   """
 
-  def __init__(self, max_size):
+  def __init__(self, max_size, type_limits = None, max_memory = None, archive = None):
     self._max_size = max_size
-    self._entries = []
+    self._type_limits = type_limits if type_limits else {}
+    self._max_memory = max_memory
+    self._archive = archive
+    self._buffers = {}  # event type => deque of entries, newest first
+    self._size = 0
+    self._memory = 0  # approximate bytes used by our entries
+    self._duplicate_counts = collections.defaultdict(int)  # event type => entries that are duplicates
     self._dedup_map = {}  # dedup key => most recent entry
     self._lock = threading.RLock()
 
+    # Inverted index of words to the ids of entries containing them. Ids
+    # ascend from oldest to newest entry, so sorting them provides log order.
+
+    self._index = {}  # word => set of entry ids
+    self._indexed_entries = {}  # entry id => entry
+    self._newest_id = 0
+    self._oldest_id = 1
+
   def add(self, entry):
     with self._lock:
       duplicate = self._dedup_map.get(entry.dedup_key, None)
 
       if duplicate:
         if not duplicate.duplicates:
-          duplicate.duplicates = [duplicate]
+          duplicate.duplicates = DuplicateGroup(duplicate)
+
+        if not duplicate.is_duplicate:
+          duplicate.is_duplicate = True
+          self._duplicate_counts[duplicate.type] += 1
 
-        duplicate.is_duplicate = True
         entry.duplicates = duplicate.duplicates
-        entry.duplicates.insert(0, entry)
+        entry.duplicates.add(entry)
 
-      self._entries.insert(0, entry)
+      self._newest_id += 1
+      self._index_entry(entry, self._newest_id)
+
+      buffer = self._buffer(entry.type)
+      buffer.appendleft(entry)
+      self._size += 1
+      self._memory += entry.memory_usage()
       self._dedup_map[entry.dedup_key] = entry
 
-      while len(self._entries) > self._max_size:
+      if len(buffer) > self._type_limits.get(entry.type, self._max_size):
+        self._remove(buffer.pop())
+
+      while self._size > self._max_size:
         self.pop()
 
+      # evict until we're within our memory budget, though always retaining
+      # our newest entry
+
+      while self._max_memory and self._memory > self._max_memory and self._size > 1:
+        self.pop()
+
+  def add_older(self, entry):
+    """
+    Adds an entry that predates everything presently in the group, such as
+    prepopulated content from tor's log file. These are placed behind our
+    other entries, and dropped rather than displacing newer content when
+    we're full.
+
+    :param nyx.log.LogEntry entry: entry to be added
+
+    :returns: **True** if the entry was added, **False** if we're full
+    """
+
+    with self._lock:
+      buffer = self._buffer(entry.type)
+
+      if self._size >= self._max_size or len(buffer) >= self._type_limits.get(entry.type, self._max_size):
+        return False
+      elif self._max_memory and self._memory + entry.memory_usage() > self._max_memory:
+        return False
+
+      duplicate = self._dedup_map.get(entry.dedup_key, None)
+
+      if duplicate:
+        if not duplicate.duplicates:
+          duplicate.duplicates = DuplicateGroup(duplicate)
+
+        entry.is_duplicate = True
+        entry.duplicates = duplicate.duplicates
+        entry.duplicates.add_older(entry)
+        self._duplicate_counts[entry.type] += 1
+      else:
+        self._dedup_map[entry.dedup_key] = entry
+
+      self._oldest_id -= 1
+      self._index_entry(entry, self._oldest_id)
+
+      buffer.append(entry)
+      self._size += 1
+      self._memory += entry.memory_usage()
+      return True
+
   def pop(self):
     with self._lock:
-      last_entry = self._entries.pop()
+      oldest_buffer = None
+
+      for buffer in self._buffers.values():
+        if buffer and (oldest_buffer is None or buffer[-1]._index_id < oldest_buffer[-1]._index_id):
+          oldest_buffer = buffer
+
+      if oldest_buffer is None:
+        raise IndexError('pop from an empty LogGroup')
+
+      last_entry = oldest_buffer.pop()
+      self._remove(last_entry)
+      return last_entry
+
+  def entries(self, event_types = None, oldest_first = False):
+    """
+    Provides our entries of the given event types. Only those types' buffers
+    are merged, so this is proportional to the entries we provide rather
+    than everything we have.
+
+    :param list event_types: event types to provide, all of them if **None**
+    :param bool oldest_first: provides our oldest entries first if **True**
+
+    :returns: **iterator** of :class:`~nyx.log.LogEntry` from newest to oldest,
+      or oldest to newest if **oldest_first** is set
+    """
+
+    with self._lock:
+      if event_types is None:
+        buffers = list(self._buffers.values())
+      else:
+        buffers = [self._buffers[event_type] for event_type in set(event_types) if event_type in self._buffers]
+
+      if oldest_first:
+        buffers = [reversed(buffer) for buffer in buffers]
+
+      for entry in heapq.merge(*buffers, key = lambda entry: entry._index_id, reverse = not oldest_first):
+        yield entry
+
+  def count(self, event_types = None, include_duplicates = True):
+    """
+    Provides the number of entries we have of the given event types.
+
+    :param list event_types: event types to count, all of them if **None**
+    :param bool include_duplicates: counts entries that are duplicates of a
+      newer entry if **True**
+
+    :returns: **int** with the number of entries of those types
+    """
+
+    with self._lock:
+      event_types = set(event_types) if event_types is not None else list(self._buffers.keys())
+      count = sum([len(self._buffers.get(event_type, ())) for event_type in event_types])
+
+      if not include_duplicates:
+        count -= sum([self._duplicate_counts.get(event_type, 0) for event_type in event_types])
+
+      return count
+
+  def archive(self):
+    """
+    Provides the compressed storage our evicted entries are moved into.
+
+    :returns: :class:`~nyx.log.LogArchive` of our older entries, **None** if
+      we don't have one
+    """
+
+    return self._archive
+
+  def memory_usage(self):
+    """
+    Provides the approximate memory used by our entries, including those we've
+    archived.
+
+    :returns: **int** with the bytes our entries use
+    """
+
+    with self._lock:
+      return self._memory + (self._archive.memory_usage() if self._archive else 0)
+
+  def _buffer(self, event_type):
+    buffer = self._buffers.get(event_type)
+
+    if buffer is None:
+      buffer = self._buffers[event_type] = collections.deque()
+
+    return buffer
+
+  def _remove(self, entry):
+    """
+    Drops an entry that has been removed from our buffers. This must be the
+    oldest entry of its type.
+    """
+
+    self._size -= 1
+    self._memory -= entry.memory_usage()
+
+    if entry.is_duplicate:
+      self._duplicate_counts[entry.type] -= 1
+
+    # By design the last entry of a type is also the oldest member of its
+    # duplicate group.
+
+    if entry.duplicates:
+      entry.duplicates.pop()
+
+    if self._dedup_map.get(entry.dedup_key, None) == entry:
+      del self._dedup_map[entry.dedup_key]
+
+    del self._indexed_entries[entry._index_id]
+
+    for token in _search_tokens(entry.message):
+      entry_ids = self._index[token]
+      entry_ids.discard(entry._index_id)
+
+      if not entry_ids:
+        del self._index[token]
+
+    if self._archive is not None:
+      retained = [buffer[-1]._index_id for buffer in self._buffers.values() if buffer]
+      self._archive.add(entry, min(retained) if retained else None)
+
+  def search(self, query, include_archive = False):
+    """
+    Provides entries whose message contains all words of the given query.
+    Words must match in full, but are case insensitive.
+
+    :param str query: words to search for
+    :param bool include_archive: also search our archive, which requires
+      decompressing blocks we haven't searched for this query before
+
+    :returns: **list** of matching :class:`~nyx.log.LogEntry`, from newest to
+      oldest
+    """
+
+    matches = self._search_index(query)
+
+    if include_archive and self._archive is not None:
+      matches += self._archive.search(query)
+
+    return matches
+
+  def _search_index(self, query):
+    tokens = _search_tokens(query)
+
+    if not tokens:
+      return []
+
+    with self._lock:
+      matches = None
+
+      # intersect starting with our rarest words, so the sets we work with
+      # stay small
+
+      for token in sorted(tokens, key = lambda token: len(self._index.get(token, ()))):
+        entry_ids = self._index.get(token)
+
+        if not entry_ids:
+          return []
 
-      # By design if the last entry is a duplicate it will also be the last
-      # item in its duplicate group.
+        matches = set(entry_ids) if matches is None else matches.intersection(entry_ids)
 
-      if last_entry.is_duplicate:
-        last_entry.duplicates.pop()
+      return [self._indexed_entries[entry_id] for entry_id in sorted(matches, reverse = True)]
 
-      if self._dedup_map.get(last_entry.dedup_key, None) == last_entry:
-        del self._dedup_map[last_entry.dedup_key]
+  def _index_entry(self, entry, entry_id):
+    entry._index_id = entry_id
+    self._indexed_entries[entry_id] = entry
+
+    for token in _search_tokens(entry.message):
+      self._index.setdefault(token, set()).add(entry_id)
 
   def clone(self):
     with self._lock:
-      copy = LogGroup(self._max_size)
-      copy._entries = [entry.clone() for entry in self._entries]
+      copy = LogGroup(self._max_size, self._type_limits, self._max_memory)
+
+      for entry in reversed(list(self.entries())):
+        copy.add(LogEntry(entry.timestamp, entry.type, entry.message))
+
+      copy._archive = self._archive.clone() if self._archive is not None else None
       return copy
 
   def __len__(self):
     with self._lock:
-      return len(self._entries)
+      return self._size
 
   def __iter__(self):
+    return self.entries()
+
+
+class LogArchive(object):
+  """
+  Thread safe compressed storage for entries that have been evicted from a
+  :class:`~nyx.log.LogGroup`. Entries are packed into zlib compressed blocks,
+  which are only decompressed when their entries are requested. Archived
+  entries aren't deduplicated.
+
+  :param int max_size: maximum number of entries we retain
+  :param int block_size: number of entries in each compressed block
+  """
+
+  def __init__(self, max_size, block_size = ARCHIVE_BLOCK_SIZE):
+    self._max_size = max_size
+    self._block_size = block_size
+    self._blocks = collections.deque()  # compressed blocks, oldest first
+    self._pending = []  # (order, timestamp, type, message) tuples awaiting compression, oldest first
+    self._pending_memory = 0
+    self._blocks_memory = 0
+    self._size = 0
+    self._type_counts = collections.defaultdict(int)  # event type => number of entries
+    self._next_block_id = 0
+    self._next_order = 0  # order of entries that lack a LogGroup id
+    self._decompressed = collections.OrderedDict()  # block id => entries, least recently used first
+    self._search_cache = (None, {})  # (query, {block id => matching entries})
+    self._count_cache = (None, {})  # (pattern, {block id => {event type => matching entries}})
+    self._lock = threading.RLock()
+
+  def add(self, entry, retained_id = None):
+    """
+    Archives an entry that was evicted from a LogGroup. Entries are ordered by
+    their id within the group, or the order they're added if they lack one.
+
+    A group's type limits can evict an entry before older entries of another
+    type, so entries are only compressed once they're older than everything
+    the group still has.
+
+    :param nyx.log.LogEntry entry: entry to be added
+    :param int retained_id: id of the oldest entry our LogGroup still has,
+      **None** if entries can be compressed as soon as we have a block of them
+    """
+
     with self._lock:
-      for entry in self._entries:
-        yield entry
+      if entry._index_id is not None:
+        order = entry._index_id
+      else:
+        order = self._next_order
+        self._next_order += 1
+
+      bisect.insort(self._pending, (order, int(entry.timestamp), entry.type, entry.message))
+      self._pending_memory += ENTRY_OVERHEAD + sys.getsizeof(entry.message)
+      self._size += 1
+      self._type_counts[entry.type] += 1
+
+      ready = len(self._pending) if retained_id is None else bisect.bisect_left(self._pending, (retained_id,))
+
+      while ready >= self._block_size:
+        self._compress_pending()
+        ready -= self._block_size
+
+      if self._size > self._max_size:
+        self._drop_excess()
+
+  def entries(self, event_types = None, skip = 0, oldest_first = False, pattern = None):
+    """
+    Provides archived entries of the given event types. Blocks that are
+    skipped over aren't decompressed, unless this is the first time they're
+    counted for a pattern.
+
+    :param list event_types: event types to provide, all of them if **None**
+    :param int skip: number of entries to skip before those we provide
+    :param bool oldest_first: provides our oldest entries first if **True**
+    :param str pattern: regular expression the display message of our entries
+      must match, provides all entries if **None**
+
+    :returns: **iterator** of :class:`~nyx.log.LogEntry` from newest to oldest,
+      or oldest to newest if **oldest_first** is set
+    """
+
+    event_types = set(event_types) if event_types is not None else None
+    regex = re.compile(pattern) if pattern is not None else None
+
+    def is_included(entry):
+      return (event_types is None or entry.type in event_types) and (regex is None or regex.search(entry.display_message))
+
+    with self._lock:
+      if regex is None:
+        # entries are only made from our pending records if we reach them
+
+        pending = [record for record in reversed(self._pending) if event_types is None or record[2] in event_types]
+        sections = [(len(pending), lambda: [LogEntry(timestamp, event_type, message) for (_, timestamp, event_type, message) in pending])]
+      else:
+        pending = [entry for entry in self._pending_entries() if is_included(entry)]
+        sections = [(len(pending), lambda: pending)]  # (entry count, entries from newest to oldest)
+
+      for block in reversed(self._blocks):
+        sections.append((_block_count(self._block_type_counts(block, pattern), event_types), functools.partial(self._block_entries, block)))
+
+      if oldest_first:
+        sections.reverse()
+
+      for section_count, section_entries in sections:
+        if skip >= section_count:
+          skip -= section_count
+          continue
+
+        section_entries = section_entries()
+
+        for entry in (reversed(section_entries) if oldest_first else section_entries):
+          if is_included(entry):
+            if skip:
+              skip -= 1
+            else:
+              yield entry
+
+  def count(self, event_types = None, pattern = None):
+    """
+    Provides the number of entries we have of the given event types. Counts
+    for a pattern are cached for each block, so repeating them only
+    decompresses blocks that have been added since.
+
+    :param list event_types: event types to count, all of them if **None**
+    :param str pattern: regular expression the display message of counted
+      entries must match, counts all entries if **None**
+
+    :returns: **int** with the number of archived entries of those types
+    """
+
+    event_types = set(event_types) if event_types is not None else None
+
+    with self._lock:
+      if pattern is None:
+        return _block_count(self._type_counts, event_types)
+
+      regex = re.compile(pattern)
+      count = len([entry for entry in self._pending_entries() if (event_types is None or entry.type in event_types) and regex.search(entry.display_message)])
+
+      for block in self._blocks:
+        count += _block_count(self._block_type_counts(block, pattern), event_types)
+
+      return count
+
+  def search(self, query):
+    """
+    Provides archived entries whose message contains all words of the given
+    query. Matches within each block are cached, so repeating a search only
+    decompresses blocks that have been added since.
+
+    :param str query: words to search for
+
+    :returns: **list** of matching :class:`~nyx.log.LogEntry`, from newest to
+      oldest
+    """
+
+    tokens = _search_tokens(query)
+
+    if not tokens:
+      return []
+
+    with self._lock:
+      cached_query, cache = self._search_cache
+
+      if cached_query != query:
+        cache = {}
+        self._search_cache = (query, cache)
+
+      matches = []
+
+      for _, timestamp, event_type, message in reversed(self._pending):
+        if tokens.issubset(_search_tokens(message)):
+          matches.append(LogEntry(timestamp, event_type, message))
+
+      for block in reversed(self._blocks):
+        if block.block_id not in cache:
+          cache[block.block_id] = [entry for entry in self._block_entries(block) if tokens.issubset(_search_tokens(entry.message))]
+
+        matches += cache[block.block_id]
+
+      return matches
+
+  def memory_usage(self):
+    """
+    Provides the approximate memory used by our archive. This is the size of
+    our compressed blocks and entries awaiting compression.
+
+    :returns: **int** with the bytes our archive uses
+    """
+
+    with self._lock:
+      return self._blocks_memory + self._pending_memory
+
+  def clone(self):
+    with self._lock:
+      copy = LogArchive(self._max_size, self._block_size)
+      copy._blocks = collections.deque(self._blocks)
+      copy._pending = list(self._pending)
+      copy._pending_memory = self._pending_memory
+      copy._blocks_memory = self._blocks_memory
+      copy._size = self._size
+      copy._type_counts = collections.defaultdict(int, self._type_counts)
+      copy._next_block_id = self._next_block_id
+      copy._next_order = self._next_order
+
+      return copy
+
+  def _compress_pending(self):
+    """
+    Compresses a block of our oldest pending entries.
+    """
+
+    batch = self._pending[:self._block_size]
+    del self._pending[:self._block_size]
+
+    records, type_counts = [], collections.defaultdict(int)
+
+    for _, timestamp, event_type, message in batch:
+      self._pending_memory -= ENTRY_OVERHEAD + sys.getsizeof(message)
+
+      if ARCHIVE_ENTRY_SEPARATOR in message or ARCHIVE_FIELD_SEPARATOR in message:
+        message = message.replace(ARCHIVE_ENTRY_SEPARATOR, ' ').replace(ARCHIVE_FIELD_SEPARATOR, ' ')
+
+      records.append(ARCHIVE_FIELD_SEPARATOR.join((str(timestamp), event_type, message)))
+      type_counts[event_type] += 1
+
+    timestamps = [timestamp for (_, timestamp, _, _) in batch]
+    data = zlib.compress(ARCHIVE_ENTRY_SEPARATOR.join(records).encode('utf-8'))
+
+    self._blocks.append(ArchiveBlock(self._next_block_id, min(timestamps), max(timestamps), dict(type_counts), data))
+    self._next_block_id += 1
+    self._blocks_memory += len(data)
+
+  def _drop_excess(self):
+    """
+    Drops our oldest blocks until we're within our size, then our oldest
+    pending entries if we lack any blocks.
+    """
+
+    while self._size > self._max_size and self._blocks:
+      block = self._blocks.popleft()
+      self._blocks_memory -= len(block.data)
+      self._size -= sum(block.type_counts.values())
+
+      for event_type, count in block.type_counts.items():
+        self._type_counts[event_type] -= count
+
+      self._decompressed.pop(block.block_id, None)
+      self._search_cache[1].pop(block.block_id, None)
+      self._count_cache[1].pop(block.block_id, None)
+
+    excess = self._size - self._max_size
+
+    if excess > 0:
+      dropped = self._pending[:excess]
+      del self._pending[:excess]
+
+      for _, _, event_type, message in dropped:
+        self._pending_memory -= ENTRY_OVERHEAD + sys.getsizeof(message)
+        self._type_counts[event_type] -= 1
+
+      self._size -= len(dropped)
+
+  def _pending_entries(self):
+    """
+    Provides the entries awaiting compression, from newest to oldest.
+    """
+
+    return [LogEntry(timestamp, event_type, message) for (_, timestamp, event_type, message) in reversed(self._pending)]
+
+  def _block_type_counts(self, block, pattern = None):
+    """
+    Provides the number of entries a block has of each type. Counts for a
+    pattern require decompressing the block, so they're cached.
+    """
+
+    if pattern is None:
+      return block.type_counts
+
+    cached_pattern, cache = self._count_cache
+
+    if cached_pattern != pattern:
+      cache = {}
+      self._count_cache = (pattern, cache)
+
+    if block.block_id not in cache:
+      regex, type_counts = re.compile(pattern), collections.defaultdict(int)
+
+      for entry in self._block_entries(block):
+        if regex.search(entry.display_message):
+          type_counts[entry.type] += 1
+
+      cache[block.block_id] = dict(type_counts)
+
+    return cache[block.block_id]
+
+  def _block_entries(self, block):
+    """
+    Provides the entries of a block, from newest to oldest. We retain the most
+    recently used blocks so scrolling through them doesn't repeatedly
+    decompress them.
+    """
+
+    entries = self._decompressed.pop(block.block_id, None)
+
+    if entries is None:
+      entries = []
+
+      for record in reversed(zlib.decompress(block.data).decode('utf-8').split(ARCHIVE_ENTRY_SEPARATOR)):
+        timestamp, event_type, message = record.split(ARCHIVE_FIELD_SEPARATOR, 2)
+        entries.append(LogEntry(int(timestamp), event_type, message))
+
+    self._decompressed[block.block_id] = entries
+
+    while len(self._decompressed) > ARCHIVE_CACHE_SIZE:
+      self._decompressed.popitem(False)
+
+    return entries
+
+  def __len__(self):
+    with self._lock:
+      return self._size
+
+
+def _block_count(type_counts, event_types):
+  """
+  Provides the number of archived entries of the given types.
+
+  :param dict type_counts: mapping of event types to their number of entries
+  :param set event_types: event types to count, all of them if **None**
+  """
+
+  if event_types is None:
+    return sum(type_counts.values())
+  else:
+    return sum([count for (event_type, count) in type_counts.items() if event_type in event_types])
+
+
+class DuplicateGroup(object):
+  """
+  Compact record of log entries that are duplicates of each other. Rather
+  than retaining every member this tracks their count and time range, with a
+  sample of the newest members.
+
+  :var int count: number of entries in the group
+  :var collections.deque sample: newest members of the group, from newest to
+    oldest
+  """
+
+  def __init__(self, entry):
+    self.count = 1
+    self.sample = collections.deque([entry], DUPLICATE_SAMPLE_SIZE)
+    self._newest = entry
+    self._oldest = entry
+
+  def first_timestamp(self):
+    """
+    Provides when the oldest member of this group was logged.
+
+    :returns: **int** unix timestamp of our oldest member
+    """
+
+    return self._oldest.timestamp
+
+  def last_timestamp(self):
+    """
+    Provides when the newest member of this group was logged.
+
+    :returns: **int** unix timestamp of our newest member
+    """
+
+    return self._newest.timestamp
+
+  def add(self, entry):
+    """
+    Adds an entry that's newer than any of our members.
+    """
+
+    self._newest._newer_duplicate = entry
+    self._newest = entry
+    self.count += 1
+    self.sample.appendleft(entry)
+
+  def add_older(self, entry):
+    """
+    Adds an entry that's older than any of our members.
+    """
+
+    entry._newer_duplicate = self._oldest
+    self._oldest = entry
+    self.count += 1
+
+    if len(self.sample) < self.sample.maxlen:
+      self.sample.append(entry)
+
+  def pop(self):
+    """
+    Removes our oldest member.
+    """
+
+    popped, self._oldest = self._oldest, self._oldest._newer_duplicate
+    popped._newer_duplicate = None
+    self.count -= 1
+
+    if self.sample and self.sample[-1] is popped:
+      self.sample.pop()
+
+    if self._oldest is None:
+      self._newest = None
+
+  def clone(self):
+    copy = DuplicateGroup(self._newest)
+    copy.count = self.count
+    copy.sample = collections.deque(self.sample, DUPLICATE_SAMPLE_SIZE)
+    copy._oldest = self._oldest
+    return copy
+
+  def __len__(self):
+    return self.count
+
+  def __iter__(self):
+    for entry in list(self.sample):
+      yield entry
 
 
 class LogEntry(object):
@@ -289,7 +1088,8 @@ class LogEntry(object):
   :var str dedup_key: key that can be used for deduplication
   :var bool is_duplicate: true if this matches other messages in the group and
     isn't the first
-  :var list duplicates: messages that are identical to this one
+  :var DuplicateGroup duplicates: messages that are identical to this one,
+    **None** if there aren't any
   """
 
   def __init__(self, timestamp, type, message):
@@ -302,6 +1102,9 @@ class LogEntry(object):
 
     self.is_duplicate = False
     self.duplicates = None
+    self._newer_duplicate = None  # next member of our DuplicateGroup
+    self._index_id = None  # identifier within our LogGroup's search index
+    self._memory_usage = None
 
     if GROUP_BY_DAY:
       self.dedup_key = '%s:%s:%s' % (self.type, self.day_count(), self._message_dedup_key())
@@ -341,10 +1144,26 @@ class LogEntry(object):
 
     return day_count(self.timestamp)
 
+  def memory_usage(self):
+    """
+    Provides the approximate memory used by this entry, including its
+    strings and our LogGroup's bookkeeping for it. This doesn't include
+    duplicate groups, which are shared between entries.
+
+    :returns: **int** with the bytes this entry uses
+    """
+
+    if self._memory_usage is None:
+      string_usage = sum([sys.getsizeof(attr) for attr in (self.message, self.display_message, self.dedup_key)])
+      index_usage = INDEXED_WORD_OVERHEAD * len(_search_tokens(self.message))
+      self._memory_usage = ENTRY_OVERHEAD + string_usage + index_usage
+
+    return self._memory_usage
+
   def clone(self):
     copy = LogEntry(self.timestamp, self.type, self.message)
     copy.is_duplicate = self.is_duplicate
-    copy.duplicates = None if self.duplicates is None else list(self.duplicates)
+    copy.duplicates = None if self.duplicates is None else self.duplicates.clone()
 
     return copy
 
@@ -362,10 +1181,34 @@ class LogFileOutput(object):
   """
   File where log messages we receive are written. If unable to do so then a
   notification is logged and further write attempts are skipped.
+
+  Messages are handed to a writer thread through a bounded queue so slow
+  disks don't hold up whoever logged them. That thread writes in batches,
+  flushing at most once per flush_rate, and rotates the file when it exceeds
+  max_size. When the queue is full messages are either dropped or the caller
+  blocks until there's room.
+
+  :param str path: location to write to, nothing is written if **None**
+  :param float flush_rate: seconds between flushes to disk
+  :param int queue_size: maximum number of messages awaiting to be written
+  :param bool block_when_full: blocks writers when our queue is full if
+    **True**, otherwise messages are dropped
+  :param int max_size: rotates the file when it exceeds this many bytes, no
+    rotation if **None**
+  :param bool compress_rotated: gzips files that have been rotated
   """
 
-  def __init__(self, path):
+  def __init__(self, path, flush_rate = 1.0, queue_size = 10000, block_when_full = False, max_size = None, compress_rotated = False):
+    self._path = path
     self._file = None
+    self._writer = None
+    self._queue = queue.Queue(queue_size)
+    self._dropped = 0
+
+    self._flush_rate = flush_rate
+    self._block_when_full = block_when_full
+    self._max_size = max_size
+    self._compress_rotated = compress_rotated
 
     if path:
       try:
@@ -379,14 +1222,352 @@ class LogFileOutput(object):
       except (IOError, OSError) as exc:
         stem.util.log.error('Unable to write to log file: %s' % exc.strerror)
 
-  def write(self, msg):
     if self._file:
+      self._writer = threading.Thread(target = self._write_loop, name = 'nyx log file writer')
+      self._writer.setDaemon(True)
+      self._writer.start()
+
+  def write(self, msg):
+    """
+    Queues a message to be written.
+
+    :param str msg: message to be written
+    """
+
+    if self._file and self._writer:
+      # Our writer thread logs when it runs into trouble, which in turn comes
+      # here. It can't wait on itself to make room so those are never blocking.
+
+      block = self._block_when_full and threading.current_thread() is not self._writer
+
+      try:
+        self._queue.put(msg, block)
+      except queue.Full:
+        self._dropped += 1
+        stem.util.log.log_once('nyx.log_file_dropping', stem.util.log.NOTICE, "Unable to write log messages to %s as quickly as they're arriving. Some are being dropped." % self._path)
+
+  def dropped(self):
+    """
+    Provides the number of messages that were dropped because our queue was
+    full.
+
+    :returns: **int** with the number of dropped messages
+    """
+
+    return self._dropped
+
+  def close(self):
+    """
+    Writes any messages we have queued, then closes our file.
+    """
+
+    writer, self._writer = self._writer, None
+
+    if writer:
+      self._queue.put(None)  # sentinel telling our writer to finish up
+      writer.join()
+
+    if self._dropped:
+      stem.util.log.notice('Dropped %i log messages rather than writing them to %s' % (self._dropped, self._path))
+
+  def _write_loop(self):
+    last_flushed, is_closing = time.time(), False
+
+    while not is_closing:
       try:
-        self._file.write(msg + '\n')
-        self._file.flush()
-      except IOError as exc:
+        batch = [self._queue.get(timeout = self._flush_rate)]
+      except queue.Empty:
+        batch = []
+
+      while True:
+        try:
+          batch.append(self._queue.get_nowait())
+        except queue.Empty:
+          break
+
+      if None in batch:
+        batch, is_closing = [msg for msg in batch if msg is not None], True
+
+      if not self._file:
+        continue  # unable to write, just draining our queue
+
+      try:
+        if batch:
+          self._file.write('\n'.join(batch) + '\n')
+
+        if is_closing or time.time() - last_flushed >= self._flush_rate:
+          self._file.flush()
+          last_flushed = time.time()
+
+        if self._max_size and self._file.tell() >= self._max_size:
+          self._rotate()
+      except (IOError, OSError) as exc:
+        self._file = None
         stem.util.log.error('Unable to write to log file: %s' % exc.strerror)
+
+    if self._file:
+      self._file.close()
+
+  def _rotate(self):
+    """
+    Moves our present file to '<path>.1', shifting prior rotations up until
+    ROTATED_LOG_COUNT, and starts a fresh file.
+    """
+
+    self._file.close()
+    suffix = '.gz' if self._compress_rotated else ''
+
+    for i in range(ROTATED_LOG_COUNT - 1, 0, -1):
+      rotated_path = '%s.%i%s' % (self._path, i, suffix)
+
+      if os.path.exists(rotated_path):
+        os.rename(rotated_path, '%s.%i%s' % (self._path, i + 1, suffix))
+
+    if self._compress_rotated:
+      with open(self._path, 'rb') as original_file:
+        with gzip.open(self._path + '.1.gz', 'wb') as compressed_file:
+          shutil.copyfileobj(original_file, compressed_file)
+
+      os.remove(self._path)
+    else:
+      os.rename(self._path, self._path + '.1')
+
+    self._file = open(self._path, 'a')
+
+
+class EventQueue(object):
+  """
+  Bounded queue of events that are handed to a processing function in batches
+  by a dedicated thread. This lets event producers, like stem's event
+  dispatcher, move on as soon as an event is queued. If we fall behind and
+  our queue fills then further events are dropped.
+
+  :param function processor: function that's provided a list of queued events
+  :param int max_size: maximum number of events we can have queued
+  :param int max_batch_size: maximum number of events to provide our processor
+    at a time
+  """
+
+  def __init__(self, processor, max_size = 10000, max_batch_size = 500):
+    self._processor = processor
+    self._queue = queue.Queue(max_size)
+    self._max_batch_size = max_batch_size
+
+    self._processed = 0
+    self._dropped = 0
+    self._last_batch_size = 0
+    self._largest_batch_size = 0
+
+    self._halt = False
+    self._worker = threading.Thread(target = self._process_loop, name = 'nyx event queue')
+    self._worker.setDaemon(True)
+
+  def start(self):
+    """
+    Begins processing our events. Events can be queued before this, so our
+    processor can be set up after we begin listening for events.
+    """
+
+    self._worker.start()
+
+  def put(self, event):
+    """
+    Queues an event to be processed, dropping it if our queue is full.
+
+    :param object event: event to be processed
+
+    :returns: **True** if the event was queued, **False** if it was dropped
+    """
+
+    try:
+      self._queue.put_nowait(event)
+      return True
+    except queue.Full:
+      self._dropped += 1
+      stem.util.log.log_once('nyx.event_queue_full', stem.util.log.NOTICE, 'Events are arriving faster than we can process them. Some are being dropped.')
+      return False
+
+  def metrics(self):
+    """
+    Provides statistics about our throughput.
+
+    :returns: :data:`~nyx.log.QueueMetrics` for this queue
+    """
+
+    return QueueMetrics(
+      depth = self._queue.qsize(),
+      last_batch_size = self._last_batch_size,
+      largest_batch_size = self._largest_batch_size,
+      processed = self._processed,
+      dropped = self._dropped,
+    )
+
+  def stop(self):
+    """
+    Processes any events we have queued, then stops our worker thread.
+    """
+
+    self._halt = True
+
+    if self._worker.is_alive() and threading.current_thread() is not self._worker:
+      self._worker.join()
+
+  def _process_loop(self):
+    while True:
+      try:
+        batch = [self._queue.get(timeout = nyx.PAUSE_TIME)]
+      except queue.Empty:
+        if self._halt:
+          break
+
+        continue
+
+      while len(batch) < self._max_batch_size:
+        try:
+          batch.append(self._queue.get_nowait())
+        except queue.Empty:
+          break
+
+      try:
+        self._processor(batch)
+      except Exception as exc:
+        stem.util.log.notice('BUG: Unexpected exception while processing events: %s' % exc)
+
+      self._processed += len(batch)
+      self._last_batch_size = len(batch)
+      self._largest_batch_size = max(self._largest_batch_size, len(batch))
+
+
+class LogFileTailer(object):
+  """
+  Follows tor's log file, providing a listener with entries as they're
+  written. This is a cheaper source of events than tor's control port since
+  tor doesn't need to format and send them to us, which matters most for
+  DEBUG logging.
+
+  The file is polled for growth from the offset we last read. If it's
+  replaced (as logrotate does) or truncated then we finish reading the old
+  file and continue from the start of the new one.
+
+  :param str path: log file to follow
+  :param function listener: function that's provided each
+    :class:`~nyx.log.LogEntry` as it's read
+  :param float poll_rate: seconds between checking the file for new content
+  :param int offset: byte offset to begin reading from, the end of the file
+    if **None**
+  """
+
+  def __init__(self, path, listener, poll_rate = 0.5, offset = None):
+    self._path = path
+    self._listener = listener
+    self._poll_rate = poll_rate
+
+    self._file = None
+    self._inode = None
+    self._offset = 0
+    self._partial_line = b''
+
+    try:
+      self._open(offset)  # prior content is read by our log panel's prepopulation
+    except (IOError, OSError) as exc:
+      stem.util.log.info("Unable to open tor's log file yet (%s): %s" % (exc, path))
+
+    self._halt = threading.Event()
+    self._worker = threading.Thread(target = self._tail_loop, name = 'nyx log tailer')
+    self._worker.setDaemon(True)
+
+  def start(self):
+    """
+    Begins following the log file. Content written after we're constructed is
+    provided, even if that's before we're started.
+    """
+
+    self._worker.start()
+
+  def stop(self):
+    """
+    Stops following the log file.
+    """
+
+    self._halt.set()
+
+    if self._worker.is_alive() and threading.current_thread() is not self._worker:
+      self._worker.join()
+
+    if self._file:
+      self._file.close()
+      self._file = None
+
+  def _tail_loop(self):
+    while not self._halt.is_set():
+      try:
+        self._read_new_lines()
+      except (IOError, OSError) as exc:
+        stem.util.log.log_once('nyx.log_tailer_failed', stem.util.log.NOTICE, "Unable to read tor's log file (%s): %s" % (exc, self._path))
+      except Exception as exc:
+        stem.util.log.notice('BUG: Unexpected exception while reading log events: %s' % exc)
+
+      self._halt.wait(self._poll_rate)
+
+  def _open(self, offset = 0):
+    if self._file:
+      self._file.close()
+
+    self._file = open(self._path, 'rb')
+    self._inode = os.fstat(self._file.fileno()).st_ino
+    self._offset = self._file.seek(0, os.SEEK_END) if offset is None else offset
+    self._partial_line = b''
+
+  def _read_new_lines(self):
+    """
+    Provides our listener with lines that have been written since we last
+    checked.
+    """
+
+    try:
+      stat = os.stat(self._path)
+    except OSError:
+      stat = None  # file is missing, likely in the midst of being rotated
+
+    if self._file:
+      if stat is None or stat.st_ino != self._inode:
+        self._process(self._read())  # finish the file that was rotated out
+        self._process([self._partial_line])
+        self._file.close()
         self._file = None
+      elif stat.st_size < self._offset:
+        self._offset = 0  # truncated
+        self._partial_line = b''
+
+    if stat is None:
+      return
+    elif not self._file:
+      self._open()
+
+    self._process(self._read())
+
+  def _read(self):
+    """
+    Reads the complete lines that have been appended since our last read.
+    """
+
+    self._file.seek(self._offset)
+    content = self._file.read()
+    self._offset += len(content)
+
+    if not content:
+      return []
+
+    lines = (self._partial_line + content).split(b'\n')
+    self._partial_line = lines.pop()  # last line might not be complete yet
+
+    return lines
+
+  def _process(self, lines):
+    lines = [line.rstrip(b'\r').decode('utf-8', 'replace') for line in lines if line.strip()]
+
+    for entry in _parse_log_lines(self._path, lines, strict = False):
+      self._listener(entry)
 
 
 class LogFilters(object):
@@ -446,12 +1627,13 @@ class LogFilters(object):
       return copy
 
 
-def read_tor_log(path, read_limit = None):
+def read_tor_log(path, read_limit = None, end = None):
   """
   Provides logging messages from a tor log file, from newest to oldest.
 
   :param str path: logging location to read from
   :param int read_limit: maximum number of lines to read from the file
+  :param int end: byte offset to read up to, the end of the file if **None**
 
   :returns: **iterator** for **LogEntry** for the file's contents
 
@@ -461,49 +1643,151 @@ def read_tor_log(path, read_limit = None):
   """
 
   start_time = time.time()
-  count, isdst = 0, time.localtime().tm_isdst
+  count = 0
+
+  if nyx.workers.is_enabled():
+    entries = [LogEntry(*entry) for entry in nyx.workers.run(_read_log_entries, path, read_limit, end)]
+  else:
+    entries = _parse_log_lines(path, _read_lines_reversed(path, read_limit, end))
+
+  for entry in entries:
+    count += 1
+    yield entry
+
+    if 'opening log file' in entry.message or 'opening new log file' in entry.message:
+      break  # this entry marks the start of this tor instance
+
+  stem.util.log.info("Read %s entries from tor's log file: %s (read limit: %s, runtime: %0.3f)" % (count, path, read_limit if read_limit else 'none', time.time() - start_time))
+
+
+def _read_log_entries(path, read_limit = None, end = None):
+  """
+  Reads the entries of a tor log file for a worker process, providing them as
+  compact tuples.
+
+  :param str path: logging location to read from
+  :param int read_limit: maximum number of lines to read from the file
+  :param int end: byte offset to read up to, the end of the file if **None**
+
+  :returns: **list** of (timestamp, runlevel, message) tuples from newest to
+    oldest
+
+  :raises:
+    * **ValueError** if the log file has unrecognized content
+    * **IOError** if unable to read the file
+  """
+
+  entries = []
+
+  for entry in _parse_log_lines(path, _read_lines_reversed(path, read_limit, end)):
+    entries.append((entry.timestamp, entry.type, entry.message))
+
+    if 'opening log file' in entry.message or 'opening new log file' in entry.message:
+      break  # this entry marks the start of this tor instance
 
-  for line in stem.util.system.tail(path, read_limit):
+  return entries
+
+
+def _parse_log_lines(path, lines, strict = True):
+  """
+  Parses lines from a tor log file.
+
+  :param str path: log file the lines are from
+  :param list lines: lines to be parsed
+  :param bool strict: raises a **ValueError** for lines we can't parse if
+    **True**, otherwise they're skipped
+
+  :returns: **iterator** for **LogEntry** of the lines
+
+  :raises: **ValueError** if strict and a line has unrecognized content
+  """
+
+  isdst = time.localtime().tm_isdst
+  current_year = str(datetime.datetime.now().year)
+
+  # Tor logs many lines per second so we only parse a timestamp when it
+  # differs from the line before it.
+
+  last_timestamp_str, last_timestamp = None, None
+
+  for line in lines:
     # entries look like:
     # Jul 15 18:29:48.806 [notice] Parsing GEOIP file.
 
-    line_comp = line.split()
+    line_comp = line.split(None, 4)
 
     # Checks that we have all the components we expect. This could happen if
     # we're either not parsing a tor log or in weird edge cases (like being
     # out of disk space).
 
-    if len(line_comp) < 4:
-      raise ValueError("Log located at %s has a line that doesn't match the format we expect: %s" % (path, line))
-    elif len(line_comp[3]) < 3 or line_comp[3][1:-1].upper() not in TOR_RUNLEVELS:
-      raise ValueError('Log located at %s has an unrecognized runlevel: %s' % (path, line_comp[3]))
+    try:
+      if len(line_comp) < 4:
+        raise ValueError("Log located at %s has a line that doesn't match the format we expect: %s" % (path, line))
+      elif len(line_comp[3]) < 3 or line_comp[3][1:-1].upper() not in TOR_RUNLEVELS:
+        raise ValueError('Log located at %s has an unrecognized runlevel: %s' % (path, line_comp[3]))
 
-    runlevel = line_comp[3][1:-1].upper()
-    msg = ' '.join(line_comp[4:])
-    current_year = str(datetime.datetime.now().year)
+      runlevel = line_comp[3][1:-1].upper()
+      msg = line_comp[4].rstrip() if len(line_comp) == 5 else ''
+      timestamp_str = ' '.join(line_comp[:3]).split('.', 1)[0]  # drop fractional seconds
 
-    # Pretending it's the current year. We don't know the actual year (#15607)
-    # and this may fail due to leap years when picking Feb 29th (#5265).
+      if timestamp_str != last_timestamp_str:
+        # Pretending it's the current year. We don't know the actual year (#15607)
+        # and this may fail due to leap years when picking Feb 29th (#5265).
 
-    try:
-      timestamp_str = current_year + ' ' + ' '.join(line_comp[:3])
-      timestamp_str = timestamp_str.split('.', 1)[0]  # drop fractional seconds
-      timestamp_comp = list(time.strptime(timestamp_str, '%Y %b %d %H:%M:%S'))
-      timestamp_comp[8] = isdst
+        try:
+          timestamp_comp = list(time.strptime(current_year + ' ' + timestamp_str, '%Y %b %d %H:%M:%S'))
+          timestamp_comp[8] = isdst
+
+          timestamp = int(time.mktime(tuple(timestamp_comp)))  # converts local to unix time
 
-      timestamp = int(time.mktime(tuple(timestamp_comp)))  # converts local to unix time
+          if timestamp > time.time():
+            # log entry is from before a year boundary
+            timestamp_comp[0] -= 1
+            timestamp = int(time.mktime(tuple(timestamp_comp)))
+        except ValueError:
+          raise ValueError("Log located at %s has a timestamp we don't recognize: %s" % (path, ' '.join(line_comp[:3])))
 
-      if timestamp > time.time():
-        # log entry is from before a year boundary
-        timestamp_comp[0] -= 1
-        timestamp = int(time.mktime(tuple(timestamp_comp)))
+        last_timestamp_str, last_timestamp = timestamp_str, timestamp
     except ValueError:
-      raise ValueError("Log located at %s has a timestamp we don't recognize: %s" % (path, ' '.join(line_comp[:3])))
+      if strict:
+        raise
+      else:
+        continue
 
-    count += 1
-    yield LogEntry(timestamp, runlevel, msg)
+    yield LogEntry(last_timestamp, runlevel, msg)
 
-    if 'opening log file' in msg or 'opening new log file' in msg:
-      break  # this entry marks the start of this tor instance
 
-  stem.util.log.info("Read %s entries from tor's log file: %s (read limit: %s, runtime: %0.3f)" % (count, path, read_limit if read_limit else 'none', time.time() - start_time))
+def _read_lines_reversed(path, read_limit = None, end = None):
+  """
+  Provides the lines of a file, starting with the end. This memory maps the
+  file and scans backward for newlines so only the lines we yield are ever
+  copied out of the file.
+
+  :param str path: file to be read
+  :param int read_limit: maximum number of lines to read
+  :param int end: byte offset to read up to, the end of the file if **None**
+
+  :returns: **iterator** for the file's lines, from last to first
+
+  :raises: **IOError** if unable to read the file
+  """
+
+  with open(path, 'rb') as target_file:
+    if os.fstat(target_file.fileno()).st_size == 0 or end == 0:
+      return  # nothing to read (and empty files cannot be memory mapped)
+
+    with contextlib.closing(mmap.mmap(target_file.fileno(), 0, access = mmap.ACCESS_READ)) as content:
+      end = len(content) if end is None else min(end, len(content))
+
+      if content[end - 1:end] == b'\n':
+        end -= 1  # trailing newline doesn't begin another line
+
+      while end >= 0 and (read_limit is None or read_limit > 0):
+        start = content.rfind(b'\n', 0, end)
+        line = content[start + 1:end].rstrip(b'\r')
+        end = start
+
+        if read_limit is not None:
+          read_limit -= 1
+
+        yield line.decode('utf-8', 'replace')
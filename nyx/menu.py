@@ -9,10 +9,12 @@ import functools
 
 import nyx.curses
 import nyx.popups
+import nyx.tracker
 
 import stem
+import stem.socket
 
-from nyx import nyx_interface, tor_controller, show_message
+from nyx import nyx_interface, tor_controller, tor_controllers, select_controller, show_message
 from nyx.curses import RED, WHITE, NORMAL, BOLD, UNDERLINE
 from stem.util import str_tools
 
@@ -260,6 +262,7 @@ def _view_menu():
     [X] <Page 1>
     [ ] <Page 2>
     [ ] etc...
+        Tor Instance (Submenu)
         Color (Submenu)
   """
 
@@ -273,6 +276,12 @@ def _view_menu():
     label = ' / '.join([type(panel).__name__.replace('Panel', '') for panel in page_panels])
     view_menu.add(RadioMenuItem(label, page_group, i))
 
+  instances = tor_controllers()
+
+  if len(instances) > 1:
+    instance_group = RadioGroup(select_controller, tor_controller())
+    view_menu.add(Submenu('Tor Instance', [RadioMenuItem(_instance_label(instance), instance_group, instance) for instance in instances]))
+
   if nyx.curses.is_color_supported():
     color_group = RadioGroup(nyx.curses.set_color_override, nyx.curses.get_color_override())
 
@@ -284,6 +293,28 @@ def _view_menu():
   return view_menu
 
 
+def _instance_label(controller):
+  """
+  Label for a tor instance such as 'caerSidi (127.0.0.1:9051, 48 connections)'.
+  """
+
+  control_socket = controller.get_socket()
+
+  if isinstance(control_socket, stem.socket.ControlPort):
+    endpoint = '%s:%i' % (control_socket.get_address(), control_socket.get_port())
+  else:
+    endpoint = control_socket.get_socket_path()
+
+  nickname = controller.get_conf('Nickname', 'Unnamed')
+  pid = controller.get_pid(None)
+
+  if pid:
+    connection_count = sum(nyx.tracker.get_connection_tracker().get_counts(pid))
+    return '%s (%s, %i connections)' % (nickname, endpoint, connection_count)
+  else:
+    return '%s (%s)' % (nickname, endpoint)
+
+
 def _draw_top_menubar(menu, selection):
   def _render(subwindow):
     x = 0
@@ -14,6 +14,7 @@ Panels consisting the nyx interface.
   Panel - panel within the interface
     |- DaemonPanel - panel that triggers actions at a set rate
     |  |- run - starts triggering daemon actions
+    |  |- set_suspended - holds off on daemon actions
     |  +- stop - stops triggering daemon actions
     |
     |- get_top - top position we're rendered into on the screen
@@ -189,6 +190,7 @@ class DaemonPanel(Panel, threading.Thread):
     self.setDaemon(True)
 
     self._halt = False  # terminates thread if true
+    self._suspended = False  # skips updates if true
     self._update_rate = update_rate
 
   def _update(self):
@@ -202,7 +204,10 @@ class DaemonPanel(Panel, threading.Thread):
     last_ran = None
 
     while not self._halt:
-      if last_ran and time.time() - last_ran < self._update_rate:
+      if self._suspended:
+        time.sleep(nyx.PAUSE_TIME)
+        continue
+      elif last_ran and time.time() - last_ran < self._update_rate:
         sleep_until = last_ran + self._update_rate + 0.1
 
         while not self._halt and time.time() < sleep_until:
@@ -213,6 +218,15 @@ class DaemonPanel(Panel, threading.Thread):
       self._update()
       last_ran = time.time()
 
+  def set_suspended(self, is_suspended):
+    """
+    Holds off on further updates while another tor instance is shown.
+
+    :param bool is_suspended: skips updates if **True**, resumes otherwise
+    """
+
+    self._suspended = is_suspended
+
   def stop(self):
     """
     Halts further resolutions and terminates the thread.
@@ -8,7 +8,9 @@ Listing of the currently established connections tor has made.
 import collections
 import curses
 import itertools
+import math
 import re
+import threading
 import time
 
 import nyx
@@ -21,8 +23,10 @@ from nyx import nyx_interface, tor_controller
 from nyx.curses import WHITE, NORMAL, BOLD, HIGHLIGHT
 from nyx.menu import MenuItem, Submenu, RadioMenuItem, RadioGroup
 
-from stem.control import Listener
-from stem.util import datetime_to_unix, conf, connection, enum, str_tools
+import stem
+
+from stem.control import EventType, Listener
+from stem.util import datetime_to_unix, conf, connection, enum, log, str_tools
 
 # height of the detail panel content, not counting top and bottom border
 
@@ -31,6 +35,10 @@ DETAILS_HEIGHT = 7
 EXIT_USAGE_WIDTH = 15
 UPDATE_RATE = 5  # rate in seconds at which we refresh
 
+TOP_TALKERS = 100  # connections re-ranked each second when sorting by bandwidth
+RATE_WINDOW = 10  # seconds over which transfer rates are averaged
+RATE_WEIGHT = 1 - math.exp(-1.0 / RATE_WINDOW)
+
 # cached information from our last _update() call
 
 LAST_RETRIEVED_HS_CONF = None
@@ -39,6 +47,12 @@ LAST_RETRIEVED_CIRCUITS = None
 ENTRY_CACHE = {}
 ENTRY_CACHE_REFERENCED = {}
 
+# (address, port) of OR connections and circuit ids to their RollingRate, for
+# each tor instance we're attached to
+
+BANDWIDTH_RATES = collections.defaultdict(dict)  # controller => {(address, port) => rate}
+CIRCUIT_RATES = collections.defaultdict(dict)  # controller => {circuit id => rate}
+
 # Connection Categories:
 #   Inbound      Relay connection, coming to us.
 #   Outbound     Relay connection, leaving us.
@@ -50,7 +64,7 @@ ENTRY_CACHE_REFERENCED = {}
 #   Control      Tor controller (nyx, vidalia, etc).
 
 Category = enum.Enum('INBOUND', 'OUTBOUND', 'EXIT', 'HIDDEN', 'SOCKS', 'CIRCUIT', 'DIRECTORY', 'CONTROL')
-SortAttr = enum.Enum('CATEGORY', 'UPTIME', 'IP_ADDRESS', 'PORT', 'FINGERPRINT', 'NICKNAME', 'COUNTRY')
+SortAttr = enum.Enum('CATEGORY', 'UPTIME', 'IP_ADDRESS', 'PORT', 'FINGERPRINT', 'NICKNAME', 'COUNTRY', 'BANDWIDTH')
 LineType = enum.Enum('CONNECTION', 'CIRCUIT_HEADER', 'CIRCUIT')
 
 Line = collections.namedtuple('Line', [
@@ -78,6 +92,122 @@ CONFIG = conf.config_dict('nyx', {
 }, conf_handler)
 
 
+class RollingRate(object):
+  """
+  Exponentially weighted transfer rate over roughly the last RATE_WINDOW
+  seconds. This is constant in size and time to update, and decays toward zero
+  once samples stop arriving.
+  """
+
+  __slots__ = ('_rate', '_updated_at')
+
+  def __init__(self):
+    self._rate = 0.0
+    self._updated_at = None
+
+  def add(self, byte_count, timestamp = None):
+    """
+    Records the bytes transferred over the last second.
+
+    :param int byte_count: bytes transferred
+    :param float timestamp: unix timestamp of the sample, now if unset
+    """
+
+    timestamp = time.time() if timestamp is None else timestamp
+
+    if self._updated_at is not None:
+      self._rate *= math.exp(-max(0, timestamp - self._updated_at) / RATE_WINDOW)
+
+    self._rate += byte_count * RATE_WEIGHT
+    self._updated_at = timestamp
+
+  def rate(self, timestamp = None):
+    """
+    Provides our transfer rate.
+
+    :param float timestamp: unix timestamp to provide the rate as of, now if
+      unset
+
+    :returns: **float** with the bytes per second we've been transferring
+    """
+
+    if self._updated_at is None:
+      return 0.0
+
+    timestamp = time.time() if timestamp is None else timestamp
+    idle = max(0, timestamp - self._updated_at - 1)  # samples arrive each second
+    return self._rate * math.exp(-idle / RATE_WINDOW)
+
+
+class TopTalkers(object):
+  """
+  Connections and circuits with our highest transfer rates. This is updated
+  as their rates change, so finding our busiest doesn't require checking
+  everything we're listing.
+
+  Idle rates decay at the same pace, so their order doesn't change until
+  they're next updated. This lets us compare each updated rate against the
+  slowest we're tracking.
+
+  :param int size: number of talkers to track
+  """
+
+  def __init__(self, size):
+    self._size = size
+    self._rates = {}  # (address, port) or circuit id => RollingRate
+    self._slowest = None  # key of our slowest talker, None if unknown
+    self._lock = threading.RLock()
+
+  def update(self, key, rate):
+    """
+    Considers a connection or circuit whose rate has changed.
+
+    :param tuple,str key: (address, port) of a connection or id of a circuit
+    :param nyx.panel.connection.RollingRate rate: its transfer rate
+    """
+
+    with self._lock:
+      if key in self._rates:
+        if key == self._slowest:
+          self._slowest = None
+      elif len(self._rates) < self._size:
+        self._rates[key] = rate
+        self._slowest = None
+      elif rate.rate() > self._rates[self._slowest_key()].rate():
+        del self._rates[self._slowest]
+        self._rates[key] = rate
+        self._slowest = None
+
+  def remove(self, key):
+    """
+    Stops tracking a connection or circuit that has closed.
+
+    :param tuple,str key: (address, port) of a connection or id of a circuit
+    """
+
+    with self._lock:
+      if self._rates.pop(key, None) is not None:
+        self._slowest = None
+
+  def keys(self):
+    """
+    Provides the connections and circuits we're tracking.
+
+    :returns: **list** of (address, port) and circuit id keys
+    """
+
+    with self._lock:
+      self._slowest = None  # rates drift between our updates, so recheck our slowest
+      return list(self._rates.keys())
+
+  def _slowest_key(self):
+    if self._slowest is None:
+      now = time.time()
+      self._slowest = min(self._rates, key = lambda key: self._rates[key].rate(now))
+
+    return self._slowest
+
+
 class Entry(object):
   @staticmethod
   def from_connection(connection):
@@ -168,6 +298,9 @@ class Entry(object):
       return line.connection.start_time
     elif attr == SortAttr.COUNTRY:
       return line.locale if (line.locale and not self.is_private()) else at_end
+    elif attr == SortAttr.BANDWIDTH:
+      rate = _bandwidth(line)
+      return -rate if rate else 0  # highest rates first
     else:
       return ''
 
@@ -281,11 +414,16 @@ class ConnectionPanel(nyx.panel.DaemonPanel):
 
     self._scroller = nyx.curses.CursorScroller()
     self._entries = []            # last fetched display entries
+    self._entries_lock = threading.RLock()  # our update and event threads both reorder our entries
+    self._talker_entries = {}     # (address, port) or circuit id => entries
+    self._top_talkers = TopTalkers(TOP_TALKERS)
     self._show_details = False    # presents the details panel if true
     self._sort_order = CONFIG['connection_order']
     self._pause_time = 0
 
     self._last_resource_fetch = -1  # timestamp of the last ConnectionResolver results used
+    self._orconn_endpoints = {}  # OR connection ids to their (address, port)
+    self._controller = tor_controller()  # tor instance we're listing, our panels are made while it's shown
 
     # Tracks exiting port and client country statistics
 
@@ -296,7 +434,7 @@ class ConnectionPanel(nyx.panel.DaemonPanel):
     # If we're a bridge and been running over a day then prepopulates with the
     # last day's clients.
 
-    bridge_clients = tor_controller().get_info('status/clients-seen', None)
+    bridge_clients = self._controller.get_info('status/clients-seen', None)
 
     if bridge_clients:
       # Response has a couple arguments...
@@ -315,6 +453,24 @@ class ConnectionPanel(nyx.panel.DaemonPanel):
             locale, count = entry.split('=', 1)
             self._client_locale_usage[locale] = int(count)
 
+    controller = self._controller
+
+    try:
+      controller.add_event_listener(self._update_circ, EventType.CIRC)
+      controller.add_event_listener(self._update_circ_bandwidth, EventType.CIRC_BW)
+    except stem.ProtocolError as exc:
+      log.info('Unable to list bandwidth by circuit: %s' % exc)
+
+    # Per-connection bandwidth is only available if tor provides CONN_BW
+    # events (this requires TestingEnableConnBwEvent).
+
+    try:
+      controller.add_event_listener(self._update_orconn, EventType.ORCONN)
+      controller.add_event_listener(self._update_conn_bandwidth, EventType.CONN_BW)
+      controller.add_event_listener(self._rank_talkers, EventType.BW)
+    except stem.ProtocolError as exc:
+      log.info('Unable to list bandwidth by connection: %s' % exc)
+
   def _show_sort_dialog(self):
     """
     Provides a dialog for sorting our connections.
@@ -324,8 +480,88 @@ class ConnectionPanel(nyx.panel.DaemonPanel):
     results = nyx.popups.select_sort_order('Connection Ordering:', SortAttr, self._sort_order, sort_colors)
 
     if results:
-      self._sort_order = results
-      self._entries = sorted(self._entries, key = lambda entry: [entry.sort_value(attr) for attr in self._sort_order])
+      with self._entries_lock:
+        self._sort_order = results
+        self._entries = sorted(self._entries, key = lambda entry: [entry.sort_value(attr) for attr in self._sort_order])
+
+  def _update_orconn(self, event):
+    """
+    Tracks the endpoints of OR connections so we can attribute their CONN_BW
+    events.
+    """
+
+    if not event.id:
+      return
+    elif event.status in ('CLOSED', 'FAILED'):
+      endpoint = self._orconn_endpoints.pop(event.id, None)
+
+      if endpoint and endpoint not in self._orconn_endpoints.values():
+        BANDWIDTH_RATES[self._controller].pop(endpoint, None)
+        self._top_talkers.remove(endpoint)
+    elif event.id not in self._orconn_endpoints:
+      if event.endpoint_address and event.endpoint_port:
+        self._orconn_endpoints[event.id] = (event.endpoint_address, event.endpoint_port)
+      elif event.endpoint_fingerprint:
+        endpoint = nyx.tracker.get_consensus_tracker().get_relay_address(event.endpoint_fingerprint, None)
+
+        if endpoint:
+          self._orconn_endpoints[event.id] = endpoint
+
+  def _update_conn_bandwidth(self, event):
+    endpoint = self._orconn_endpoints.get(event.id)
+
+    if endpoint:
+      rates = BANDWIDTH_RATES[self._controller]
+      rate = rates.get(endpoint)
+
+      if rate is None:
+        rate = rates[endpoint] = RollingRate()
+
+      rate.add(event.read + event.written)
+      self._top_talkers.update(endpoint, rate)
+
+  def _update_circ(self, event):
+    if event.status in ('CLOSED', 'FAILED'):
+      CIRCUIT_RATES[self._controller].pop(event.id, None)
+      self._top_talkers.remove(event.id)
+
+  def _update_circ_bandwidth(self, event):
+    rates = CIRCUIT_RATES[self._controller]
+    rate = rates.get(event.id)
+
+    if rate is None:
+      rate = rates[event.id] = RollingRate()
+
+    rate.add(event.read + event.written)
+    self._top_talkers.update(event.id, rate)
+
+  def _rank_talkers(self, event):
+    """
+    When sorting by bandwidth our busiest connections change from second to
+    second. Rather than sorting everything we move our busiest, which our
+    bandwidth events keep track of, to the top and leave the rest in the order
+    of our last full sort.
+    """
+
+    if not self._entries or self._sort_order[0] != SortAttr.BANDWIDTH or nyx_interface().is_paused():
+      return
+    elif self._controller is not tor_controller():
+      return  # rates are ranked by the tor instance that's shown, and we'll be sorted when shown again
+
+    with self._entries_lock:
+      entries, top_entries = self._entries, set()
+
+      for key in self._top_talkers.keys():
+        top_entries.update(self._talker_entries.get(key, []))
+
+      top = sorted(top_entries, key = lambda entry: [entry.sort_value(attr) for attr in self._sort_order])
+      is_changed = top != entries[:len(top)]
+
+      if is_changed:
+        self._entries = top + [entry for entry in entries if entry not in top_entries]
+
+    if is_changed:
+      self.redraw()
 
   def set_paused(self, is_pause):
     if is_pause:
@@ -542,7 +778,15 @@ class ConnectionPanel(nyx.panel.DaemonPanel):
 
         self._counted_connections.add(line.connection.remote_address)
 
-    self._entries = sorted(new_entries, key = lambda entry: [entry.sort_value(attr) for attr in self._sort_order])
+    talker_entries = {}
+
+    for entry in new_entries:
+      talker_entries.setdefault(_talker_key(entry.get_lines()[0]), []).append(entry)
+
+    with self._entries_lock:
+      self._entries = sorted(new_entries, key = lambda entry: [entry.sort_value(attr) for attr in self._sort_order])
+      self._talker_entries = talker_entries
+
     self._last_resource_fetch = resolution_count
 
     if CONFIG['resolve_processes']:
@@ -573,6 +817,45 @@ class ConnectionPanel(nyx.panel.DaemonPanel):
     self.redraw()
 
 
+def _talker_key(line):
+  """
+  Provides the key our transfer rates are tracked by for a line.
+
+  :param nyx.panel.connection.Line line: line to provide the key of
+
+  :returns: (address, port) **tuple** of a connection, **str** id of a circuit,
+    or **None** if we don't track its rate
+  """
+
+  if line.line_type == LineType.CONNECTION:
+    return (line.connection.remote_address, line.connection.remote_port)
+  elif line.line_type == LineType.CIRCUIT_HEADER:
+    return line.circuit.id
+  else:
+    return None
+
+
+def _bandwidth(line):
+  """
+  Provides the transfer rate of a connection or circuit of the tor instance
+  we're showing.
+
+  :param nyx.panel.connection.Line line: line to provide the rate of
+
+  :returns: **float** with the bytes per second it's transferring, **None** if
+    unknown
+  """
+
+  if line.line_type == LineType.CONNECTION:
+    rate = BANDWIDTH_RATES.get(tor_controller(), {}).get(_talker_key(line))
+  elif line.line_type == LineType.CIRCUIT_HEADER:
+    rate = CIRCUIT_RATES.get(tor_controller(), {}).get(_talker_key(line))
+  else:
+    rate = None
+
+  return rate.rate() if rate else None
+
+
 def _draw_title(subwindow, entries, showing_details):
   """
   Panel title with the number of connections we presently have.
@@ -702,6 +985,10 @@ def _draw_details(subwindow, selected):
 def _draw_line_details(subwindow, x, y, line, width, attr):
   if line.line_type == LineType.CIRCUIT_HEADER:
     comp = ['Purpose: %s' % line.circuit.purpose.capitalize(), ', Circuit ID: %s' % line.circuit.id]
+    rate = _bandwidth(line)
+
+    if rate is not None:
+      comp.append(', Bandwidth: %s/s' % str_tools.size_label(rate, 1))
   elif line.entry.get_type() in (Category.SOCKS, Category.HIDDEN, Category.CONTROL):
     try:
       port = line.connection.local_port if line.entry.get_type() == Category.HIDDEN else line.connection.remote_port
@@ -714,6 +1001,12 @@ def _draw_line_details(subwindow, x, y, line, width, attr):
   else:
     comp = ['%-40s' % (line.fingerprint if line.fingerprint else 'UNKNOWN'), '  ' + (line.nickname if line.nickname else 'UNKNOWN')]
 
+  if line.line_type == LineType.CONNECTION:
+    rate = _bandwidth(line)
+
+    if rate is not None:
+      comp.append('  %s/s' % str_tools.size_label(rate, 1))
+
   for entry in comp:
     if width >= len(entry):
       x = subwindow.addstr(x, y, entry, *attr)
@@ -14,12 +14,17 @@ Downloaded (0.0 B/sec):           Uploaded (0.0 B/sec):
          25s  50   1m   1.6  2.0           25s  50   1m   1.6  2.0
 """
 
+import array
+import collections
 import copy
 import functools
+import itertools
+import math
 import threading
 import time
 
 import nyx.curses
+import nyx.log
 import nyx.panel
 import nyx.popups
 import nyx.tracker
@@ -27,10 +32,10 @@ import nyx.tracker
 from nyx import nyx_interface, tor_controller, join, show_message
 from nyx.curses import RED, GREEN, CYAN, BOLD, HIGHLIGHT
 from nyx.menu import MenuItem, Submenu, RadioMenuItem, RadioGroup
-from stem.control import EventType, Listener
+from stem.control import EventType
 from stem.util import conf, enum, log, str_tools, system
 
-GraphStat = enum.Enum(('BANDWIDTH', 'bandwidth'), ('CONNECTIONS', 'connections'), ('SYSTEM_RESOURCES', 'resources'))
+GraphStat = enum.Enum(('BANDWIDTH', 'bandwidth'), ('CONNECTIONS', 'connections'), ('SYSTEM_RESOURCES', 'resources'), ('EVENTS', 'events'))
 Interval = enum.Enum(('EACH_SECOND', 'each second'), ('FIVE_SECONDS', '5 seconds'), ('THIRTY_SECONDS', '30 seconds'), ('MINUTELY', 'minutely'), ('FIFTEEN_MINUTE', '15 minute'), ('THIRTY_MINUTE', '30 minute'), ('HOURLY', 'hourly'), ('DAILY', 'daily'))
 Bounds = enum.Enum(('GLOBAL_MAX', 'global_max'), ('LOCAL_MAX', 'local_max'), ('TIGHT', 'tight'))
 
@@ -45,12 +50,25 @@ INTERVAL_SECONDS = {
   Interval.DAILY: 86400,
 }
 
+# Intervals we persist to our cache. Finer grained samplings only cover a few
+# minutes so there's little value in keeping them across restarts.
+
+HISTORY_INTERVALS = (Interval.MINUTELY, Interval.FIFTEEN_MINUTE, Interval.THIRTY_MINUTE, Interval.HOURLY, Interval.DAILY)
+
 PRIMARY_COLOR, SECONDARY_COLOR = GREEN, CYAN
 
 ACCOUNTING_RATE = 5
 DEFAULT_CONTENT_HEIGHT = 4  # space needed for labeling above and below the graph
 WIDE_LABELING_GRAPH_COL = 50  # minimum graph columns to use wide spacing for x-axis labels
 TITLE_UPDATE_RATE = 30
+# Content of a subgraph as last drawn, so later frames can redraw only what has
+# changed. Columns are the height of each bar from newest to oldest.
+
+Subgraph = collections.namedtuple('Subgraph', ['header', 'bounds', 'x_axis_labels', 'y_axis_labels', 'columns'])
+
+HISTOGRAM_GROWTH = 1.02  # ratio between histogram bins, bounding our percentiles' relative error
+HEADER_PERCENTILES = (50, 95, 99)
+HISTORY_WRITE_RATE = 60  # seconds between persisting our graph history
 
 
 def conf_handler(key, value):
@@ -79,18 +97,18 @@ CONFIG = conf.config_dict('nyx', {
   'attr.graph.header.secondary': {},
   'graph_bound': Bounds.LOCAL_MAX,
   'graph_height': 7,
+  'graph_history': True,
   'graph_interval': Interval.EACH_SECOND,
   'graph_stat': GraphStat.BANDWIDTH,
   'max_graph_width': 300,  # we need some sort of max size so we know how much graph data to retain
   'show_accounting': True,
   'show_bits': False,
   'show_connections': True,
+  'show_log': True,
 }, conf_handler)
 
 
-def _bandwidth_title_stats():
-  controller = tor_controller()
-
+def _bandwidth_title_stats(controller):
   stats = []
   bw_rate = controller.get_effective_rate(None)
   bw_burst = controller.get_effective_rate(None, burst = True)
@@ -117,6 +135,246 @@ def _bandwidth_title_stats():
   return stats
 
 
+def _history_instance(controller):
+  """
+  Provides the tor instance our cache keys its graph history by. This is the
+  relay's fingerprint, or for clients the control port or socket we're
+  attached to.
+
+  :param stem.control.Controller controller: tor instance to identify
+
+  :returns: **str** identifying the tor instance
+  """
+
+  fingerprint = controller.get_info('fingerprint', None)
+
+  if fingerprint:
+    return fingerprint
+
+  control_socket = controller.get_socket()
+
+  if hasattr(control_socket, 'get_socket_path'):
+    return control_socket.get_socket_path()
+  else:
+    return '%s:%s' % (control_socket.get_address(), control_socket.get_port())
+
+
+class RingBuffer(object):
+  """
+  Fixed size series of numeric values, from newest to oldest. Adding a value
+  overwrites the oldest rather than shifting the rest, and clones share our
+  storage until one of us is modified.
+
+  :param int size: number of values we retain
+  """
+
+  def __init__(self, size):
+    self._values = array.array('d', [0]) * size
+    self._newest = 0  # index of our newest value
+    self._is_shared = False  # storage is also referenced by a clone
+
+  def add(self, value):
+    """
+    Adds a value, displacing our oldest.
+
+    :param float value: value to be added
+    """
+
+    if self._is_shared:
+      self._values = array.array('d', self._values)
+      self._is_shared = False
+
+    self._newest = (self._newest - 1) % len(self._values)
+    self._values[self._newest] = value
+
+  def clone(self):
+    """
+    Provides a copy of this buffer. This is a constant time operation, with
+    our storage copied when either of us is next modified.
+
+    :returns: :class:`~nyx.panel.graph.RingBuffer` with our values
+    """
+
+    copy = RingBuffer.__new__(RingBuffer)
+    copy._values = self._values
+    copy._newest = self._newest
+    copy._is_shared = True
+    self._is_shared = True
+
+    return copy
+
+  def __getitem__(self, index):
+    size = len(self._values)
+
+    if isinstance(index, slice):
+      start, stop, step = index.indices(size)
+
+      if step != 1:
+        return list(itertools.islice(self, start, stop, step))
+      elif stop <= start:
+        return []
+
+      # copy out of our array with at most two slices
+
+      first = (self._newest + start) % size
+      last = first + stop - start
+
+      if last <= size:
+        return self._values[first:last].tolist()
+      else:
+        return self._values[first:].tolist() + self._values[:last - size].tolist()
+
+    if index < 0:
+      index += size
+
+    if not 0 <= index < size:
+      raise IndexError('RingBuffer index out of range')
+
+    return self._values[(self._newest + index) % size]
+
+  def __iter__(self):
+    values, newest = self._values, self._newest
+    return itertools.chain(values[newest:], values[:newest])
+
+  def __len__(self):
+    return len(self._values)
+
+
+class SlidingExtrema(object):
+  """
+  Running minimum and maximum of the most recent values in a series. These
+  are tracked with monotonic deques, so adding a value is amortized constant
+  time and the extrema are available in constant time.
+
+  :var int size: number of recent values the extrema are for
+
+  :param int size: number of recent values the extrema are for
+  :param list values: initial values, from oldest to newest
+  """
+
+  def __init__(self, size, values = ()):
+    self.size = size
+    self._count = 0  # number of values we've been given
+    self._max = collections.deque()  # (position, value) tuples with decreasing values
+    self._min = collections.deque()  # (position, value) tuples with increasing values
+
+    for value in values:
+      self.add(value)
+
+  def add(self, value):
+    """
+    Adds a value, displacing the oldest from our window.
+
+    :param float value: value to be added
+    """
+
+    self._count += 1
+
+    while self._max and self._max[-1][1] <= value:
+      self._max.pop()
+
+    while self._min and self._min[-1][1] >= value:
+      self._min.pop()
+
+    self._max.append((self._count, value))
+    self._min.append((self._count, value))
+
+    if self._max[0][0] <= self._count - self.size:
+      self._max.popleft()
+
+    if self._min[0][0] <= self._count - self.size:
+      self._min.popleft()
+
+  def max(self):
+    """
+    Provides the largest value within our window.
+
+    :returns: **float** maximum, or zero if we lack any values
+    """
+
+    return self._max[0][1] if self._max else 0
+
+  def min(self):
+    """
+    Provides the smallest value within our window.
+
+    :returns: **float** minimum, or zero if we lack any values
+    """
+
+    return self._min[0][1] if self._min else 0
+
+  def clone(self):
+    copy = SlidingExtrema(self.size)
+    copy._count = self._count
+    copy._max = collections.deque(self._max)
+    copy._min = collections.deque(self._min)
+
+    return copy
+
+
+class LogHistogram(object):
+  """
+  Streaming approximation of a series' distribution. Values are counted in
+  bins that grow geometrically, so adding a value is constant time and our
+  percentiles are within about a percent of the actual value without
+  retaining the samples themselves.
+  """
+
+  def __init__(self):
+    self.count = 0
+    self._bins = {}  # bin index => number of values within it
+    self._zeros = 0  # number of values that are zero or less
+
+  def add(self, value):
+    """
+    Counts a value.
+
+    :param float value: value to be added
+    """
+
+    self.count += 1
+
+    if value <= 0:
+      self._zeros += 1
+    else:
+      index = int(math.floor(math.log(value, HISTOGRAM_GROWTH)))
+      self._bins[index] = self._bins.get(index, 0) + 1
+
+  def percentile(self, percent):
+    """
+    Provides the value that the given percentage of our values fall at or
+    below.
+
+    :param float percent: percentile to provide, from zero to a hundred
+
+    :returns: **float** with the approximate percentile, or zero if we lack
+      any values
+    """
+
+    rank = math.ceil(self.count * percent / 100.0)
+
+    if rank <= self._zeros:
+      return 0
+
+    seen = self._zeros
+
+    for index in sorted(self._bins):
+      seen += self._bins[index]
+
+      if seen >= rank:
+        return HISTOGRAM_GROWTH ** (index + 0.5)  # geometric middle of the bin
+
+    return 0
+
+  def clone(self):
+    copy = LogHistogram()
+    copy.count = self.count
+    copy._bins = dict(self._bins)
+    copy._zeros = self._zeros
+
+    return copy
+
+
 class GraphData(object):
   """
   Graphable statistical information.
@@ -124,7 +382,8 @@ class GraphData(object):
   :var int latest_value: last value we recorded
   :var int total: sum of all values we've recorded
   :var int tick: number of events we've processed
-  :var dict values: mapping of intervals to an array of samplings from newest to oldest
+  :var dict values: mapping of intervals to a :class:`~nyx.panel.graph.RingBuffer`
+    of samplings from newest to oldest
   """
 
   def __init__(self, clone = None, category = None, is_primary = True):
@@ -132,22 +391,28 @@ class GraphData(object):
       self.latest_value = clone.latest_value
       self.total = clone.total
       self.tick = clone.tick
-      self.values = copy.deepcopy(clone.values)
+      self.values = dict([(interval, values.clone()) for (interval, values) in clone.values.items()])
 
       self._category = category
       self._is_primary = clone._is_primary
       self._in_process_value = dict(clone._in_process_value)
       self._max_value = dict(clone._max_value)
+      self._extrema = dict([(interval, extrema.clone()) for (interval, extrema) in clone._extrema.items()])
+      self._histograms = dict([(interval, histogram.clone()) for (interval, histogram) in clone._histograms.items()])
+      self._history = None
     else:
       self.latest_value = 0
       self.total = 0
       self.tick = 0
-      self.values = dict([(i, CONFIG['max_graph_width'] * [0]) for i in Interval])
+      self.values = dict([(i, RingBuffer(CONFIG['max_graph_width'])) for i in Interval])
 
       self._category = category
       self._is_primary = is_primary
       self._in_process_value = dict([(i, 0) for i in Interval])
       self._max_value = dict([(i, 0) for i in Interval])  # interval => maximum value it's had
+      self._extrema = {}  # interval => SlidingExtrema for the columns we last provided bounds for
+      self._histograms = dict([(i, LogHistogram()) for i in Interval])  # interval => distribution of its samplings
+      self._history = None  # (interval, timestamp, value) samplings to be persisted, if recording
 
   def average(self):
     return self.total / max(1, self.tick)
@@ -163,20 +428,91 @@ class GraphData(object):
 
       if self.tick % interval_seconds == 0:
         new_entry = self._in_process_value[interval] / interval_seconds
-        self.values[interval] = [new_entry] + self.values[interval][:-1]
+        self.values[interval].add(new_entry)
+        self._histograms[interval].add(new_entry)
         self._max_value[interval] = max(self._max_value[interval], new_entry)
+
+        if interval in self._extrema:
+          self._extrema[interval].add(new_entry)
+
+        if self._history is not None and interval in HISTORY_INTERVALS:
+          self._history.append((interval, time.time(), new_entry))
+
         self._in_process_value[interval] = 0
 
-  def header(self, width):
+  def load_history(self, interval, samples, now = None):
+    """
+    Fills in samplings from before we started. Each is placed in the column
+    matching its age, so periods when we weren't running are left blank.
+    Columns we already have samplings for this run (including those backfilled
+    from tor's cached bandwidth) are kept.
+
+    :param Interval interval: timing interval of the samplings
+    :param list samples: (timestamp, value) tuples to be added
+    :param float now: unix timestamp that our newest column ends at
+    """
+
+    if not samples:
+      return
+
+    now = time.time() if now is None else now
+    interval_seconds = INTERVAL_SECONDS[interval]
+    buffer = self.values[interval]
+    sampled = min(len(buffer), self.tick // interval_seconds)  # columns we have this run
+
+    values = buffer[:]
+
+    for timestamp, value in samples:
+      column = int(max(0, now - timestamp) // interval_seconds)
+
+      if sampled <= column < len(values):
+        values[column] = value
+        self._max_value[interval] = max(self._max_value[interval], value)
+
+    for value in reversed(values):
+      buffer.add(value)
+
+    self._extrema.pop(interval, None)
+
+  def history(self):
+    """
+    Provides the samplings we've recorded since this was last called.
+
+    :returns: **list** of (interval, timestamp, value) tuples, this is empty
+      if we aren't recording our history
+    """
+
+    if not self._history:
+      return []
+
+    history, self._history = self._history, []
+    return history
+
+  def percentile(self, percent, interval = Interval.EACH_SECOND):
+    """
+    Approximate percentile of the samplings we've made.
+
+    :param float percent: percentile to provide, from zero to a hundred
+    :param Interval interval: timing interval of the samplings
+
+    :returns: **float** with the approximate percentile, or **None** if we
+      haven't made any samplings at this interval
+    """
+
+    histogram = self._histograms[interval]
+    return histogram.percentile(percent) if histogram.count else None
+
+  def header(self, width, interval = Interval.EACH_SECOND):
     """
     Provides the description above a subgraph.
 
     :param int width: maximum length of the header
+    :param Interval interval: timing interval we're showing
 
     :returns: **str** with our graph header
     """
 
-    return self._category._header(width, self._is_primary)
+    return self._category._header(width, self._is_primary, interval)
 
   def bounds(self, bounds, interval, columns):
     """
@@ -190,15 +526,26 @@ class GraphData(object):
     """
 
     min_bound, max_bound = 0, 0
-    values = self.values[interval][:columns]
+    extrema = None
+
+    if columns > 0:
+      # Extrema of the visible columns are maintained as we're updated. These
+      # are only rebuilt when the number of columns changes.
+
+      columns = min(columns, len(self.values[interval]))
+      extrema = self._extrema.get(interval)
+
+      if extrema is None or extrema.size != columns:
+        extrema = SlidingExtrema(columns, reversed(self.values[interval][:columns]))
+        self._extrema[interval] = extrema
 
     if bounds == Bounds.GLOBAL_MAX:
       max_bound = self._max_value[interval]
-    elif columns > 0:
-      max_bound = max(values)  # local maxima
+    elif extrema:
+      max_bound = extrema.max()  # local maxima
 
-    if bounds == Bounds.TIGHT and columns > 0:
-      min_bound = min(values)
+    if bounds == Bounds.TIGHT and extrema:
+      min_bound = extrema.min()
 
       # if the max = min pick zero so we still display something
 
@@ -227,10 +574,15 @@ class GraphCategory(object):
   :var GraphData primary: first subgraph
   :var GraphData secondary: second subgraph
   :var float start_time: unix timestamp for when we started
+
+  :param GraphCategory clone: graph to copy
+  :param stem.control.Controller controller: tor instance we're graphing, the
+    one we're presently showing if **None**
   """
 
-  def __init__(self, clone = None):
+  def __init__(self, clone = None, controller = None):
     if clone:
+      self._controller = clone._controller
       self.primary = GraphData(clone.primary, category = self)
       self.secondary = GraphData(clone.secondary, category = self)
       self.start_time = clone.start_time
@@ -238,6 +590,7 @@ class GraphCategory(object):
       self._primary_header_stats = list(clone._primary_header_stats)
       self._secondary_header_stats = list(clone._secondary_header_stats)
     else:
+      self._controller = controller if controller else tor_controller()
       self.primary = GraphData(category = self, is_primary = True)
       self.secondary = GraphData(category = self, is_primary = False)
       self.start_time = time.time()
@@ -267,6 +620,36 @@ class GraphCategory(object):
     title_stats = join(self._title_stats, ', ', width - len(title) - 4)
     return '%s (%s):' % (title, title_stats) if title_stats else title + ':'
 
+  def load_history(self):
+    """
+    Fills in our subgraphs with samplings persisted by prior runs, and starts
+    recording new samplings for :func:`~nyx.panel.graph.GraphCategory.save_history`.
+    """
+
+    cache, now, instance = nyx.cache(), time.time(), _history_instance(self._controller)
+
+    for data in (self.primary, self.secondary):
+      for interval in HISTORY_INTERVALS:
+        since = now - INTERVAL_SECONDS[interval] * CONFIG['max_graph_width']
+        data.load_history(interval, cache.graph_history(instance, self.stat_type(), data._is_primary, interval, since), now)
+
+      data._history = []
+
+  def save_history(self):
+    """
+    Persists samplings we've recorded since we were last saved in a single
+    transaction, discarding those that have aged off our graph.
+    """
+
+    now, instance = time.time(), _history_instance(self._controller)
+
+    with nyx.cache().write() as writer:
+      for data in (self.primary, self.secondary):
+        writer.record_graph_history(instance, self.stat_type(), data._is_primary, data.history())
+
+        for interval in HISTORY_INTERVALS:
+          writer.prune_graph_history(instance, self.stat_type(), data._is_primary, interval, now - INTERVAL_SECONDS[interval] * CONFIG['max_graph_width'])
+
   def bandwidth_event(self, event):
     """
     Called when it's time to process another event. All graphs use tor BW
@@ -275,7 +658,7 @@ class GraphCategory(object):
 
     pass
 
-  def _header(self, width, is_primary):
+  def _header(self, width, is_primary, interval = Interval.EACH_SECOND):
     if is_primary:
       header = CONFIG['attr.graph.header.primary'].get(self.stat_type(), '')
       header_stats = self._primary_header_stats
@@ -283,26 +666,44 @@ class GraphCategory(object):
       header = CONFIG['attr.graph.header.secondary'].get(self.stat_type(), '')
       header_stats = self._secondary_header_stats
 
+    header_stats = list(header_stats)
+    data = self.primary if is_primary else self.secondary
+
+    for percent in (HEADER_PERCENTILES if header_stats else ()):
+      value = data.percentile(percent, interval)
+      label = self._percentile_label(value, is_primary) if value is not None else None
+
+      if label:
+        header_stats.append(', p%i: %s' % (percent, label))
+
     header_stats = join(header_stats, '', width - len(header) - 4).rstrip()
     return '%s (%s):' % (header, header_stats) if header_stats else '%s:' % header
 
   def _y_axis_label(self, value, is_primary):
     return str(value)
 
+  def _percentile_label(self, value, is_primary):
+    """
+    Label for a percentile within our header, or **None** if this graph
+    doesn't include percentiles.
+    """
+
+    return None
+
 
 class BandwidthStats(GraphCategory):
   """
   Tracks tor's bandwidth usage.
   """
 
-  def __init__(self, clone = None):
-    GraphCategory.__init__(self, clone)
+  def __init__(self, clone = None, controller = None):
+    GraphCategory.__init__(self, clone, controller)
     self._title_last_updated = None
 
     if not clone:
       # fill in past bandwidth information
 
-      controller = tor_controller()
+      controller = self._controller
       bw_entries, is_successful = controller.get_info('bw-event-cache', None), True
 
       if bw_entries:
@@ -335,6 +736,9 @@ class BandwidthStats(GraphCategory):
   def _y_axis_label(self, value, is_primary):
     return _size_label(value, 0)
 
+  def _percentile_label(self, value, is_primary):
+    return '%s/sec' % _size_label(value)
+
   def bandwidth_event(self, event):
     self.primary.update(event.read)
     self.secondary.update(event.written)
@@ -352,7 +756,7 @@ class BandwidthStats(GraphCategory):
     ]
 
     if not self._title_last_updated or time.time() - self._title_last_updated > TITLE_UPDATE_RATE:
-      self._title_stats = _bandwidth_title_stats()
+      self._title_stats = _bandwidth_title_stats(self._controller)
       self._title_last_updated = time.time()
 
 
@@ -365,23 +769,11 @@ class ConnectionStats(GraphCategory):
     return GraphStat.CONNECTIONS
 
   def bandwidth_event(self, event):
-    inbound_count, outbound_count = 0, 0
-
-    controller = tor_controller()
-    or_ports = controller.get_ports(Listener.OR, [])
-    dir_ports = controller.get_ports(Listener.DIR, [])
-    control_ports = controller.get_ports(Listener.CONTROL, [])
-
-    for entry in nyx.tracker.get_connection_tracker().get_value():
-      if entry.local_port in or_ports or entry.local_port in dir_ports:
-        inbound_count += 1
-      elif entry.local_port in control_ports:
-        pass  # control connection
-      else:
-        outbound_count += 1
+    pid = self._controller.get_pid(None)
+    counts = nyx.tracker.get_connection_tracker().get_counts(pid) if pid else nyx.tracker.ConnectionCounts(0, 0, 0)
 
-    self.primary.update(inbound_count)
-    self.secondary.update(outbound_count)
+    self.primary.update(counts.inbound)
+    self.secondary.update(counts.outbound)
 
     self._primary_header_stats = [str(self.primary.latest_value), ', avg: %i' % self.primary.average()]
     self._secondary_header_stats = [str(self.secondary.latest_value), ', avg: %i' % self.secondary.average()]
@@ -398,8 +790,12 @@ class ResourceStats(GraphCategory):
   def _y_axis_label(self, value, is_primary):
     return '%i%%' % value if is_primary else str_tools.size_label(value)
 
+  def _percentile_label(self, value, is_primary):
+    return '%0.1f%%' % value if is_primary else str_tools.size_label(value, 1)
+
   def bandwidth_event(self, event):
-    resources = nyx.tracker.get_resource_tracker().get_value()
+    pid = self._controller.get_pid(None)
+    resources = nyx.tracker.get_resource_tracker().get_value(pid) if pid else nyx.tracker.Resources(0.0, 0.0, 0.0, 0, 0.0, 0.0)
     self.primary.update(resources.cpu_sample * 100)  # decimal percentage to whole numbers
     self.secondary.update(resources.memory_bytes)
 
@@ -407,6 +803,37 @@ class ResourceStats(GraphCategory):
     self._secondary_header_stats = [str_tools.size_label(self.secondary.latest_value, 1), ', avg: %s' % str_tools.size_label(self.secondary.average(), 1)]
 
 
+class EventRateStats(GraphCategory):
+  """
+  Tracks the rate of tor log events we receive, with NOTICE and above as our
+  primary graph and INFO and DEBUG as the secondary. Counts come from the log
+  panel of our tor instance, so this only reflects the runlevels it's
+  listening for.
+  """
+
+  def __init__(self, clone = None, controller = None):
+    GraphCategory.__init__(self, clone, controller)
+    self._last_counts = dict(clone._last_counts) if clone else self._event_counts()
+
+  def stat_type(self):
+    return GraphStat.EVENTS
+
+  def bandwidth_event(self, event):
+    counts = self._event_counts()
+    rates = dict([(runlevel, counts[runlevel] - self._last_counts[runlevel]) for runlevel in counts])
+    self._last_counts = counts
+
+    self.primary.update(rates['NOTICE'] + rates['WARN'] + rates['ERR'])
+    self.secondary.update(rates['DEBUG'] + rates['INFO'])
+
+    self._primary_header_stats = ['%i/sec' % self.primary.latest_value, ' (warn: %i, err: %i)' % (rates['WARN'], rates['ERR']), ', avg: %0.1f/sec' % self.primary.average()]
+    self._secondary_header_stats = ['%i/sec' % self.secondary.latest_value, ' (info: %i)' % rates['INFO'], ', avg: %0.1f/sec' % self.secondary.average()]
+
+  def _event_counts(self):
+    counts = nyx.log.EVENT_COUNTS.get(self._controller, {})
+    return dict([(runlevel, counts.get(runlevel, 0)) for runlevel in nyx.log.TOR_RUNLEVELS])
+
+
 class GraphPanel(nyx.panel.Panel):
   """
   Panel displaying graphical information of GraphCategory instances.
@@ -423,24 +850,42 @@ class GraphPanel(nyx.panel.Panel):
     self._accounting_stats = None
     self._accounting_stats_paused = None
 
+    # When attached to several tor instances each has its own panels, which
+    # are made while its instance is the one being shown.
+
+    self._controller = tor_controller()
+
     self._stats = {
-      GraphStat.BANDWIDTH: BandwidthStats(),
-      GraphStat.SYSTEM_RESOURCES: ResourceStats(),
+      GraphStat.BANDWIDTH: BandwidthStats(controller = self._controller),
+      GraphStat.SYSTEM_RESOURCES: ResourceStats(controller = self._controller),
     }
 
     self._stats_lock = threading.RLock()
     self._stats_paused = None
+    self._last_frame = None  # (frame key, title, primary Subgraph, secondary Subgraph) we last drew
+    self._history_saved_at = time.time()
+
+    self._records_history = CONFIG['graph_history']
 
     if CONFIG['show_connections']:
-      self._stats[GraphStat.CONNECTIONS] = ConnectionStats()
+      self._stats[GraphStat.CONNECTIONS] = ConnectionStats(controller = self._controller)
     elif self._displayed_stat == GraphStat.CONNECTIONS:
       log.warn("The connection graph is unavailble when you set 'show_connections false'.")
       self._displayed_stat = GraphStat.BANDWIDTH
 
-    controller = tor_controller()
-    controller.add_event_listener(self._update_accounting, EventType.BW)
-    controller.add_event_listener(self._update_stats, EventType.BW)
-    controller.add_status_listener(lambda *args: self.redraw())
+    if CONFIG['show_log']:
+      self._stats[GraphStat.EVENTS] = EventRateStats(controller = self._controller)
+    elif self._displayed_stat == GraphStat.EVENTS:
+      log.warn("The event rate graph is unavailble when you set 'show_log false'.")
+      self._displayed_stat = GraphStat.BANDWIDTH
+
+    if self._records_history:
+      for stat in self._stats.values():
+        stat.load_history()
+
+    self._controller.add_event_listener(self._update_accounting, EventType.BW)
+    self._controller.add_event_listener(self._update_stats, EventType.BW)
+    self._controller.add_status_listener(lambda *args: self.redraw())
 
   def stat_options(self):
     return self._stats.keys()
@@ -456,7 +901,7 @@ class GraphPanel(nyx.panel.Panel):
       return 0
 
     height = DEFAULT_CONTENT_HEIGHT + self._graph_height
-    accounting_stats = self._accounting_stats if not nyx_interface().is_paused() else self._accounting_stats_paused
+    accounting_stats = self._accounting_stats if not self._interface().is_paused() else self._accounting_stats_paused
 
     if self._displayed_stat == GraphStat.BANDWIDTH and accounting_stats:
       height += 3
@@ -495,7 +940,7 @@ class GraphPanel(nyx.panel.Panel):
           elif key.is_selection():
             break
 
-          nyx_interface().redraw()
+          self._interface().redraw()
       finally:
         show_message()
 
@@ -553,10 +998,43 @@ class GraphPanel(nyx.panel.Panel):
     ])
 
   def _draw(self, subwindow):
+    self._draw_frame(subwindow)
+
+  def _draw_changes(self, subwindow):
+    self._draw_frame(subwindow, self._last_frame)
+
+  def _redraw_changes(self):
+    """
+    Redraws only the parts of our graph that have changed since our last
+    frame. If our layout has changed then this is a full redraw.
+    """
+
+    if not self._visible or self._last_frame is None or self._last_frame[0] != self._frame_key():
+      self.redraw()
+    else:
+      nyx.curses.draw(self._draw_changes, top = self._top, height = self.get_height(), erase = False)
+
+  def _frame_key(self):
+    """
+    Attributes that, if changed, require a full redraw of the panel.
+    """
+
+    is_paused = self._interface().is_paused()
+    accounting_stats = self._accounting_stats_paused if is_paused else self._accounting_stats
+    return (nyx.curses.screen_size(), self._top, self.get_height(), self._displayed_stat, self._update_interval, self._bounds_type, self._graph_height, is_paused, bool(accounting_stats))
+
+  def _draw_frame(self, subwindow, previous = None):
+    """
+    Draws our graph. If given our prior frame then this only redraws content
+    that has changed from it.
+    """
+
+    self._last_frame = None
+
     if not self._displayed_stat:
       return
 
-    if not nyx_interface().is_paused():
+    if not self._interface().is_paused():
       stat = self._stats[self._displayed_stat]
       accounting_stats = self._accounting_stats
     else:
@@ -567,48 +1045,86 @@ class GraphPanel(nyx.panel.Panel):
       accounting_stats = self._accounting_stats_paused
 
     with self._stats_lock:
+      key = self._frame_key()
       subgraph_height = self._graph_height + 2  # graph rows + header + x-axis label
       subgraph_width = min(subwindow.width // 2, CONFIG['max_graph_width'])
       interval, bounds_type = self._update_interval, self._bounds_type
 
-      subwindow.addstr(0, 0, stat.title(subwindow.width), HIGHLIGHT)
+      if previous and previous[0] != key:
+        for y in range(subwindow.height):
+          subwindow.hline(0, y, subwindow.width, char = ' ')
+
+        previous = None
+
+      title = stat.title(subwindow.width)
+
+      if not previous or previous[1] != title:
+        if previous:
+          subwindow.hline(0, 0, subwindow.width, char = ' ')
 
-      _draw_subgraph(subwindow, stat.primary, 0, subgraph_width, subgraph_height, bounds_type, interval, PRIMARY_COLOR)
-      _draw_subgraph(subwindow, stat.secondary, subgraph_width, subgraph_width, subgraph_height, bounds_type, interval, SECONDARY_COLOR)
+        subwindow.addstr(0, 0, title, HIGHLIGHT)
+
+      primary = _draw_subgraph(subwindow, stat.primary, 0, subgraph_width, subgraph_height, bounds_type, interval, PRIMARY_COLOR, previous = previous[2] if previous else None)
+      secondary = _draw_subgraph(subwindow, stat.secondary, subgraph_width, subgraph_width, subgraph_height, bounds_type, interval, SECONDARY_COLOR, previous = previous[3] if previous else None)
 
       if stat.stat_type() == GraphStat.BANDWIDTH and accounting_stats:
-        _draw_accounting_stats(subwindow, DEFAULT_CONTENT_HEIGHT + subgraph_height - 2, accounting_stats)
+        accounting_y = DEFAULT_CONTENT_HEIGHT + subgraph_height - 2
+
+        if previous:
+          subwindow.hline(0, accounting_y, subwindow.width, char = ' ')
+          subwindow.hline(0, accounting_y + 1, subwindow.width, char = ' ')
+
+        _draw_accounting_stats(subwindow, accounting_y, accounting_stats)
+
+      self._last_frame = (key, title, primary, secondary)
+
+  def _interface(self):
+    """
+    Interface of the tor instance we're graphing.
+    """
+
+    return nyx.INTERFACES[self._controller] if self._controller in nyx.INTERFACES else nyx_interface()
 
   def _update_accounting(self, event):
     if not CONFIG['show_accounting']:
       self._accounting_stats = None
     elif not self._accounting_stats or time.time() - self._accounting_stats.retrieved >= ACCOUNTING_RATE:
       old_accounting_stats = self._accounting_stats
-      self._accounting_stats = tor_controller().get_accounting_stats(None)
+      self._accounting_stats = self._controller.get_accounting_stats(None)
 
-      if not nyx_interface().is_paused():
+      if not self._interface().is_paused():
         # if we either added or removed accounting info then redraw the whole
         # screen to account for resizing
 
         if bool(old_accounting_stats) != bool(self._accounting_stats):
-          nyx_interface().redraw()
+          self._interface().redraw()
 
   def _update_stats(self, event):
     with self._stats_lock:
       for stat in self._stats.values():
         stat.bandwidth_event(event)
 
+      if self._records_history and time.time() - self._history_saved_at >= HISTORY_WRITE_RATE:
+        for stat in self._stats.values():
+          stat.save_history()
+
+        self._history_saved_at = time.time()
+
     if self._displayed_stat:
       param = self._stats[self._displayed_stat]
       update_rate = INTERVAL_SECONDS[self._update_interval]
 
       if param.primary.tick % update_rate == 0:
-        self.redraw()
+        self._redraw_changes()
 
 
-def _draw_subgraph(subwindow, data, x, width, height, bounds_type, interval, color, fill_char = ' '):
+def _draw_subgraph(subwindow, data, x, width, height, bounds_type, interval, color, fill_char = ' ', previous = None):
   """
-  Renders subgraph including its title, labeled axis, and content.
+  Renders subgraph including its title, labeled axis, and content. If given
+  the :class:`~nyx.panel.graph.Subgraph` we last drew here then only columns
+  and labels that have changed are redrawn.
+
+  :returns: :class:`~nyx.panel.graph.Subgraph` with what we drew
   """
 
   columns = width - 8  # y-axis labels can be at most six characters wide with a space on either side
@@ -620,7 +1136,38 @@ def _draw_subgraph(subwindow, data, x, width, height, bounds_type, interval, col
   x_axis_offset = max([len(label) for label in y_axis_labels.values()])
   columns = max(columns, width - x_axis_offset - 2)
 
-  subwindow.addstr(x, 1, data.header(width), color, BOLD)
+  column_heights = []
+
+  for value in itertools.islice(data.values[interval], columns):
+    column_count = int(value) - min_bound
+    column_heights.append(int(min(height - 2, (height - 2) * column_count / (max(1, max_bound) - min_bound))))
+
+  subgraph = Subgraph(data.header(width, interval), (min_bound, max_bound), x_axis_labels, y_axis_labels, column_heights)
+
+  if previous and previous[1:4] != subgraph[1:4]:
+    # our axes changed, so clear our prior content and draw everything
+
+    for y in range(1, height + 1):
+      subwindow.hline(x, y, width, char = ' ')
+
+    previous = None
+
+  if previous:
+    if previous.header != subgraph.header:
+      subwindow.hline(x, 1, len(previous.header), char = ' ')
+      subwindow.addstr(x, 1, subgraph.header, color, BOLD)
+
+    previous_heights = itertools.chain(previous.columns, itertools.repeat(0))
+
+    for col, (column_height, previous_height) in enumerate(zip(column_heights, previous_heights)):
+      if column_height > previous_height:
+        subwindow.vline(x + col + x_axis_offset + 1, height - column_height, column_height - previous_height, color, HIGHLIGHT, char = fill_char)
+      elif column_height < previous_height:
+        subwindow.vline(x + col + x_axis_offset + 1, height - previous_height, previous_height - column_height, char = ' ')
+
+    return subgraph
+
+  subwindow.addstr(x, 1, subgraph.header, color, BOLD)
 
   for x_offset, label in x_axis_labels.items():
     subwindow.addstr(x + x_offset + x_axis_offset, height, label, color)
@@ -628,11 +1175,11 @@ def _draw_subgraph(subwindow, data, x, width, height, bounds_type, interval, col
   for y, label in y_axis_labels.items():
     subwindow.addstr(x, y, label, color)
 
-  for col in range(columns):
-    column_count = int(data.values[interval][col]) - min_bound
-    column_height = int(min(height - 2, (height - 2) * column_count / (max(1, max_bound) - min_bound)))
+  for col, column_height in enumerate(column_heights):
     subwindow.vline(x + col + x_axis_offset + 1, height - column_height, column_height, color, HIGHLIGHT, char = fill_char)
 
+  return subgraph
+
 
 def _x_axis_labels(interval, columns):
   """
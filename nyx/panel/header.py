@@ -23,7 +23,7 @@ import nyx.popups
 import nyx.tracker
 
 from stem.util import conf, log
-from nyx import nyx_interface, tor_controller
+from nyx import nyx_interface, tor_controller, tor_controllers
 
 from nyx.curses import RED, GREEN, YELLOW, CYAN, WHITE, BOLD, HIGHLIGHT
 
@@ -77,6 +77,16 @@ class HeaderPanel(nyx.panel.DaemonPanel):
       self.show_message()  # clear override
       return user_input
 
+  def get_message(self):
+    """
+    Provides the message displayed at the bottom of the header.
+
+    :returns: **str** with the message we're showing, **None** if we're not
+      overriding our usual status
+    """
+
+    return self._message
+
   def is_wide(self):
     """
     True if we should show two columns of information, False otherwise.
@@ -507,6 +517,12 @@ def _draw_status(subwindow, x, y, is_paused, message, *attr):
     subwindow.addstr(x, y, message, *attr)
   elif not is_paused:
     interface = nyx_interface()
-    subwindow.addstr(x, y, 'page %i / %i - m: menu, p: pause, h: page help, q: quit' % (interface.get_page() + 1, interface.page_count()))
+    instances = tor_controllers()
+
+    if len(instances) > 1:
+      instance = instances.index(tor_controller()) + 1
+      subwindow.addstr(x, y, 'page %i / %i, tor %i / %i - m: menu, p: pause, t: next tor, h: page help, q: quit' % (interface.get_page() + 1, interface.page_count(), instance, len(instances)))
+    else:
+      subwindow.addstr(x, y, 'page %i / %i - m: menu, p: pause, h: page help, q: quit' % (interface.get_page() + 1, interface.page_count()))
   else:
     subwindow.addstr(x, y, 'Paused', HIGHLIGHT)
@@ -7,11 +7,15 @@ for. This provides prepopulation from the log file and supports filtering by
 regular expressions.
 """
 
+import contextlib
 import functools
+import itertools
+import gzip
 import os
 import logging
 import logging.handlers
 import queue
+import threading
 import time
 
 import stem.response.events
@@ -25,7 +29,7 @@ import nyx.log
 from nyx import nyx_interface, tor_controller, join, input_prompt, show_message
 from nyx.curses import GREEN, YELLOW, WHITE, NORMAL, BOLD, HIGHLIGHT
 from nyx.menu import MenuItem, Submenu, RadioMenuItem, RadioGroup
-from stem.util import conf, log
+from stem.util import conf, log, str_tools
 
 
 def conf_handler(key, value):
@@ -33,6 +37,18 @@ def conf_handler(key, value):
     return max(0, value)
   elif key == 'max_log_size':
     return max(1000, value)
+  elif key == 'max_log_memory':
+    return max(0, value)
+  elif key == 'max_archived_log_size':
+    return max(0, value)
+  elif key == 'max_log_size_by_type':
+    return dict([(event_type, max(1, int(limit))) for (event_type, limit) in value.items() if limit.isdigit()])
+  elif key == 'max_event_queue_size':
+    return max(1, value)
+  elif key == 'write_logs_queue_size':
+    return max(1, value)
+  elif key == 'write_logs_max_size':
+    return max(0, value)
 
 
 CONFIG = conf.config_dict('nyx', {
@@ -41,9 +57,19 @@ CONFIG = conf.config_dict('nyx', {
   'logged_events': 'NOTICE,WARN,ERR,NYX_NOTICE,NYX_WARNING,NYX_ERROR',
   'logging_filter': [],
   'max_log_size': 1000,
+  'max_log_size_by_type': {},
+  'max_log_memory': 0,
+  'max_archived_log_size': 0,
+  'max_event_queue_size': 10000,
   'prepopulate_log': True,
+  'tail_log_file': False,
   'prepopulate_read_limit': 5000,
   'write_logs_to': '',
+  'write_logs_flush_rate': 1.0,
+  'write_logs_queue_size': 10000,
+  'write_logs_block_when_full': False,
+  'write_logs_max_size': 0,
+  'write_logs_compress': False,
 }, conf_handler)
 
 # Users may understanably mix up 'WARN/WARNING' and 'ERR/ERROR' in their --log
@@ -58,12 +84,11 @@ EVENT_ALIASES = {
 
 UPDATE_RATE = 0.7
 
-# The height of the drawn content is estimated based on the last time we redrew
-# the panel. It's chiefly used for scrolling and the bar indicating its
-# position. Letting the estimate be too inaccurate results in a display bug, so
-# redraws the display if it's off by this threshold.
+# When saving snapshots we report our progress every this many entries, and
+# show the result for this many seconds.
 
-CONTENT_HEIGHT_REDRAW_THRESHOLD = 3
+SNAPSHOT_PROGRESS_RATE = 5000
+SNAPSHOT_RESULT_DURATION = 2
 
 # Log buffer so we start collecting stem/nyx events when imported. This is used
 # to make our LogPanel when curses initializes.
@@ -85,6 +110,7 @@ class LogPanel(nyx.panel.DaemonPanel):
   def __init__(self):
     nyx.panel.DaemonPanel.__init__(self, UPDATE_RATE)
 
+    self._controller = tor_controller()  # tor instance we're logging, our panels are made while it's shown
     logged_events = list(map(str.strip, CONFIG['logged_events'].split(',')))
 
     for alias, actual_event in EVENT_ALIASES.items():
@@ -92,40 +118,84 @@ class LogPanel(nyx.panel.DaemonPanel):
         logged_events.remove(alias)
         logged_events.append(actual_event)
 
-    tor_events = tor_controller().get_info('events/names', '').split()
+    tor_events = self._controller.get_info('events/names', '').split()
     invalid_events = list(filter(lambda event: not event.startswith('NYX_') and event not in tor_events, logged_events))
 
     if invalid_events:
       logged_events = ['NOTICE', 'WARN', 'ERR', 'NYX_NOTICE', 'NYX_WARNING', 'NYX_ERROR']
       log.warn("Your --log argument had the following events tor doesn't recognize: %s" % ', '.join(invalid_events))
 
-    self._event_log = nyx.log.LogGroup(CONFIG['max_log_size'])
+    # Events are processed on a dedicated thread so stem's event dispatcher
+    # isn't held up while we do so. Events are queued until the rest of our
+    # state is ready, then we start processing them.
+
+    self._event_queue = nyx.log.EventQueue(self._process_events, CONFIG['max_event_queue_size'])
+
+    self._event_log = _new_event_log()
     self._event_log_paused = None
-    self._event_types = nyx.log.listen_for_events(self._register_tor_event, logged_events)
-    self._log_file = nyx.log.LogFileOutput(CONFIG['write_logs_to'])
+
+    # Tor's runlevel events can be read from its log file rather than its
+    # control port, so it doesn't need to send them to us. Prepopulation reads
+    # the file up to where we begin tailing, so entries aren't read by both.
+
+    self._log_tailer = None
+    self._tail_offset = None  # byte offset in tor's log file where we began tailing
+
+    if CONFIG['tail_log_file']:
+      log_location = nyx.log.log_file_path(self._controller)
+
+      if log_location:
+        try:
+          self._tail_offset = os.path.getsize(log_location)
+        except OSError:
+          pass  # file doesn't exist yet, so our tailer will read it from the start
+
+        self._log_tailer = nyx.log.LogFileTailer(log_location, self._event_queue.put, offset = self._tail_offset)
+      else:
+        log.notice("Unable to tail tor's log file since it doesn't have one, reading events from its control port instead")
+
+    self._event_types = self._listen_for_events(logged_events)
+    self._log_file = nyx.log.LogFileOutput(
+      CONFIG['write_logs_to'],
+      flush_rate = CONFIG['write_logs_flush_rate'],
+      queue_size = CONFIG['write_logs_queue_size'],
+      block_when_full = CONFIG['write_logs_block_when_full'],
+      max_size = CONFIG['write_logs_max_size'],
+      compress_rotated = CONFIG['write_logs_compress'],
+    )
     self._filter = nyx.log.LogFilters(initial_filters = CONFIG['logging_filter'])
     self._show_duplicates = not CONFIG['deduplicate_log']
 
+    self._search = None  # words we're searching the log for
+    self._search_hit = 0  # index of the search result that's selected
+    self._search_hit_count = 0  # number of search results when last drawn
+    self._search_jump = False  # scroll to the selected search result on our next draw
+
     self._scroller = nyx.curses.Scroller()
     self._has_new_event = False
     self._last_day = nyx.log.day_count(time.time())
+    self._last_content_height = 0  # number of entries we showed when last drawn
+    self._last_page_size = 0  # number of our oldest entries that fit on a page when last drawn
+
+    self._event_queue.start()
 
-    # fetches past tor events from log file, if available
+    if self._log_tailer:
+      self._log_tailer.start()
+
+    # Fetches past tor events from log file, if available. This can take a
+    # while for large logs so it's done in the background, with entries
+    # appearing behind the live events we receive in the meantime.
+
+    self._prepopulated_count = None  # number of historical entries loaded so far, None if not loading
 
     if CONFIG['prepopulate_log']:
-      log_location = nyx.log.log_file_path(tor_controller())
+      log_location = nyx.log.log_file_path(self._controller)
 
       if log_location:
-        try:
-          for entry in reversed(list(nyx.log.read_tor_log(log_location, CONFIG['prepopulate_read_limit']))):
-            if entry.type in self._event_types:
-              self._event_log.add(entry)
-        except IOError as exc:
-          log.info('Unable to read log located at %s: %s' % (log_location, exc))
-        except ValueError as exc:
-          log.info(str(exc))
-
-    self._last_content_height = len(self._event_log)  # height of the rendered content when last drawn
+        self._prepopulated_count = 0
+        prepopulate_thread = threading.Thread(target = self._prepopulate, args = (log_location, self._event_log, time.time(), self._tail_offset))
+        prepopulate_thread.setDaemon(True)
+        prepopulate_thread.start()
 
     # merge NYX_LOGGER into us, and listen for its future events
 
@@ -134,6 +204,39 @@ class LogPanel(nyx.panel.DaemonPanel):
 
     NYX_LOGGER.emit = self._register_nyx_event
 
+  def _prepopulate(self, log_location, event_log, listening_since, tail_offset = None):
+    """
+    Reads tor's log file from newest to oldest, adding its entries behind our
+    other content. Entries that were logged after we began listening for events
+    are skipped since we'll have received those from tor directly.
+
+    :param str log_location: path of tor's log file
+    :param nyx.log.LogGroup event_log: group to add the entries to
+    :param float listening_since: unix timestamp when we began listening for
+      events
+    :param int tail_offset: byte offset where we began tailing the file, if
+      we're doing so
+    """
+
+    try:
+      for entry in nyx.log.read_tor_log(log_location, CONFIG['prepopulate_read_limit'], tail_offset):
+        if self._halt or event_log is not self._event_log:
+          break  # we're shutting down or our log has been cleared
+        elif entry.timestamp > listening_since or entry.type not in self._event_types:
+          continue
+        elif not event_log.add_older(entry):
+          break  # log is full
+
+        self._prepopulated_count += 1
+        self._has_new_event = True
+    except IOError as exc:
+      log.info('Unable to read log located at %s: %s' % (log_location, exc))
+    except ValueError as exc:
+      log.info(str(exc))
+    finally:
+      self._prepopulated_count = None
+      self._has_new_event = True
+
   def _show_filter_prompt(self):
     """
     Prompts the user to add a new regex filter.
@@ -144,6 +247,20 @@ class LogPanel(nyx.panel.DaemonPanel):
     if regex_input:
       self._filter.select(regex_input)
 
+  def _show_search_prompt(self):
+    """
+    Prompts the user for words to search the log for, clearing the search if
+    left blank.
+    """
+
+    search_input = input_prompt('Search: ', self._search if self._search else '')
+
+    if search_input is not None:
+      self._search = search_input.strip() if search_input.strip() else None
+      self._search_hit = 0
+      self._search_jump = True
+      self.redraw()
+
   def _show_event_selection_prompt(self):
     """
     Prompts the user to select the events being listened for.
@@ -152,37 +269,83 @@ class LogPanel(nyx.panel.DaemonPanel):
     event_types = nyx.popups.select_event_types(self._event_types)
 
     if event_types and event_types != self._event_types:
-      self._event_types = nyx.log.listen_for_events(self._register_tor_event, event_types)
+      self._event_types = self._listen_for_events(event_types)
       self.redraw()
 
+  def _listen_for_events(self, event_types):
+    """
+    Listens for the given event types. If we're tailing tor's log file then
+    its runlevels are read from there instead of tor's control port.
+
+    :param list event_types: event types to listen for
+
+    :returns: **list** of event types we're now listening for
+    """
+
+    if not self._log_tailer:
+      return nyx.log.listen_for_events(self._register_tor_event, event_types)
+
+    tailed_types = [event_type for event_type in event_types if event_type in nyx.log.TOR_RUNLEVELS]
+    other_types = [event_type for event_type in event_types if event_type not in nyx.log.TOR_RUNLEVELS]
+
+    return sorted(set(nyx.log.listen_for_events(self._register_tor_event, other_types)).union(tailed_types))
+
   def _show_snapshot_prompt(self):
     """
     Lets user enter a path to take a snapshot, canceling if left blank.
     """
 
-    path_input = input_prompt('Path to save log snapshot: ')
+    path_input = input_prompt('Path to save log snapshot (.gz to compress): ')
 
     if path_input:
-      try:
-        self.save_snapshot(path_input)
-        show_message('Saved: %s' % path_input, HIGHLIGHT, max_wait = 2)
-      except IOError as exc:
-        show_message('Unable to save snapshot: %s' % exc, HIGHLIGHT, max_wait = 2)
+      snapshot_thread = threading.Thread(target = self._save_snapshot_in_background, args = (path_input,))
+      snapshot_thread.setDaemon(True)
+      snapshot_thread.start()
+
+  def _save_snapshot_in_background(self, path):
+    """
+    Saves a snapshot, reporting our progress in the header's status bar.
+    """
+
+    start_time = time.time()
+
+    def _progress(written, total):
+      rate = written / max(0.001, time.time() - start_time)
+      show_message('Saving snapshot: %i%% (%i entries/sec)' % (100 * written // max(1, total), rate), HIGHLIGHT)
+
+    try:
+      count = self.save_snapshot(path, _progress)
+      result = 'Saved %i entries to %s (%0.1fs)' % (count, path, time.time() - start_time)
+    except IOError as exc:
+      result = 'Unable to save snapshot: %s' % exc
+
+    show_message(result, HIGHLIGHT)
+    time.sleep(SNAPSHOT_RESULT_DURATION)
+
+    header_panel = nyx_interface().header_panel()
+
+    if header_panel.get_message() == result:
+      header_panel.show_message()  # clear our result unless something else is now shown
 
   def _clear(self):
     """
     Clears the contents of the event log.
     """
 
-    self._event_log = nyx.log.LogGroup(CONFIG['max_log_size'])
+    self._event_log = _new_event_log()
     self.redraw()
 
-  def save_snapshot(self, path):
+  def save_snapshot(self, path, progress_callback = None):
     """
     Saves the log events currently being displayed to the given path. This
-    takes filers into account. This overwrites the file if it already exists.
+    takes filers into account. This overwrites the file if it already exists,
+    and is gzip compressed if the path ends with '.gz'.
 
     :param str path: path where to save the log snapshot
+    :param function progress_callback: called periodically with the number of
+      entries we've processed and the total
+
+    :returns: **int** with the number of entries we saved
 
     :raises: **IOError** if unsuccessful
     """
@@ -199,25 +362,38 @@ class LogPanel(nyx.panel.DaemonPanel):
     except OSError:
       raise IOError("unable to make directory '%s'" % base_dir)
 
+    # Copying references to our entries is cheap, and gives us a consistent
+    # view to write from while new events continue to arrive.
+
     event_log = list(self._event_log)
     event_filter = self._filter.clone()
+    open_func = gzip.open if path.endswith('.gz') else open
+    saved = 0
 
-    with open(path, 'w') as snapshot_file:
+    with open_func(path, 'wt') as snapshot_file:
       try:
-        for entry in reversed(event_log):
+        for i, entry in enumerate(reversed(event_log)):
           if event_filter.match(entry.display_message):
             snapshot_file.write(entry.display_message + '\n')
+            saved += 1
+
+          if progress_callback and i % SNAPSHOT_PROGRESS_RATE == 0:
+            progress_callback(i, len(event_log))
       except Exception as exc:
         raise IOError("unable to write to '%s': %s" % (path, exc))
 
+    if progress_callback:
+      progress_callback(len(event_log), len(event_log))
+
+    return saved
+
   def set_paused(self, is_pause):
     if is_pause:
       self._event_log_paused = self._event_log.clone()
 
   def key_handlers(self):
     def _scroll(key):
-      page_height = self.get_height() - 1
-      is_changed = self._scroller.handle_key(key, self._last_content_height, page_height)
+      is_changed = self._scroller.handle_key(key, self._last_content_height, self._last_page_size)
 
       if is_changed:
         self.redraw()
@@ -235,6 +411,13 @@ class LogPanel(nyx.panel.DaemonPanel):
         else:
           self._filter.select(selection)
 
+    def _next_search_hit(key):
+      if self._search and self._search_hit_count:
+        offset = 1 if key.match('j') else -1
+        self._search_hit = (self._search_hit + offset) % self._search_hit_count
+        self._search_jump = True
+        self.redraw()
+
     def _toggle_deduplication():
       self._show_duplicates = not self._show_duplicates
       self.redraw()
@@ -251,6 +434,9 @@ class LogPanel(nyx.panel.DaemonPanel):
       nyx.panel.KeyHandler('a', 'save snapshot of the log', self._show_snapshot_prompt),
       nyx.panel.KeyHandler('e', 'change logged events', self._show_event_selection_prompt),
       nyx.panel.KeyHandler('f', 'log regex filter', _pick_filter, 'enabled' if self._filter.selection() else 'disabled'),
+      nyx.panel.KeyHandler('/', 'search the log', self._show_search_prompt, self._search),
+      nyx.panel.KeyHandler('j', 'next search result', _next_search_hit),
+      nyx.panel.KeyHandler('k', 'previous search result', _next_search_hit),
       nyx.panel.KeyHandler('u', 'duplicate log entries', _toggle_deduplication, 'visible' if self._show_duplicates else 'hidden'),
       nyx.panel.KeyHandler('c', 'clear event log', _clear_log),
     )
@@ -261,6 +447,7 @@ class LogPanel(nyx.panel.DaemonPanel):
 
       Events...
       Snapshot...
+      Search...
       Clear
       Show / Hide Duplicates
       Filter (Submenu)
@@ -272,6 +459,7 @@ class LogPanel(nyx.panel.DaemonPanel):
     return Submenu('Log', [
       MenuItem('Events...', self._show_event_selection_prompt),
       MenuItem('Snapshot...', self._show_snapshot_prompt),
+      MenuItem('Search...', self._show_search_prompt),
       MenuItem('Clear', self._clear),
       MenuItem(duplicates_label, functools.partial(setattr, self, '_show_duplicates'), duplicates_arg),
       Submenu('Filter', [
@@ -281,55 +469,67 @@ class LogPanel(nyx.panel.DaemonPanel):
       ]),
     ])
 
-  def _draw(self, subwindow, is_correction = False):
-    scroll = self._scroller.location(self._last_content_height, subwindow.height - 1)
-
+  def _draw(self, subwindow):
     event_filter = self._filter.clone()
     event_types = list(self._event_types)
-    last_content_height = self._last_content_height
     show_duplicates = self._show_duplicates
 
-    event_log = self._event_log_paused if nyx_interface().is_paused() else self._event_log
-    event_log = list(filter(lambda entry: event_filter.match(entry.display_message), event_log))
-    event_log = list(filter(lambda entry: not entry.is_duplicate or show_duplicates, event_log))
+    log_group = self._event_log_paused if nyx_interface().is_paused() else self._event_log
+    search, selected_hit = self._search, None
+
+    if search:
+      search_hits = [entry for entry in log_group.search(search) if entry.type in event_types and _is_shown(entry, event_filter, show_duplicates)]
+      self._search_hit_count = len(search_hits)
+
+      if search_hits:
+        self._search_hit = min(self._search_hit, len(search_hits) - 1)
+        selected_hit = search_hits[self._search_hit]
+    else:
+      self._search_hit_count = 0
+
+    if self._search_jump and selected_hit:
+      # Scrolling to our hit is a matter of counting the entries before it.
+      # This is the only time we walk past the page.
+
+      self._search_jump = False
+
+      with contextlib.closing(_shown_entries(log_group, event_types, event_filter, show_duplicates)) as shown_entries:
+        for position, entry in enumerate(shown_entries):
+          if entry is selected_hit:
+            self._scroller.scroll_to(position)
+            break
 
-    is_scrollbar_visible = last_content_height > subwindow.height - 1
+    # We scroll by entries. Our content height is the number of entries we
+    # show, and a page is the number of our oldest entries that fit on the
+    # screen, so scrolling to the end shows them in full.
+
+    content_height = _shown_count(log_group, event_types, event_filter, show_duplicates)
+    page_size = _page_size(subwindow, 0, log_group, event_types, event_filter, show_duplicates)
+    is_scrollbar_visible = content_height > page_size
 
     if is_scrollbar_visible:
-      subwindow.scrollbar(1, scroll, last_content_height)
+      page_size = _page_size(subwindow, 2, log_group, event_types, event_filter, show_duplicates)
 
-    x, y = 2 if is_scrollbar_visible else 0, 1 - scroll
-    y = _draw_entries(subwindow, x, y, event_log, show_duplicates)
+    scroll = self._scroller.location(content_height, page_size)
 
-    # drawing the title after the content, so we'll clear content from the top line
+    if is_scrollbar_visible:
+      subwindow.scrollbar(1, scroll, content_height)
 
-    _draw_title(subwindow, event_types, event_filter)
+    # Only the entries on our page are drawn. Once it's full we stop.
 
-    # redraw the display if...
-    # - last_content_height was off by too much
-    # - we're off the bottom of the page
+    x = 2 if is_scrollbar_visible else 0
 
-    new_content_height = y + scroll - 1
-    content_height_delta = abs(last_content_height - new_content_height)
-    force_redraw, force_redraw_reason = True, ''
+    with contextlib.closing(_shown_entries(log_group, event_types, event_filter, show_duplicates, scroll)) as shown_entries:
+      _draw_entries(subwindow, x, 1, shown_entries, show_duplicates, selected_hit)
 
-    if content_height_delta >= CONTENT_HEIGHT_REDRAW_THRESHOLD:
-      force_redraw_reason = 'estimate was off by %i' % content_height_delta
-    elif new_content_height > subwindow.height and scroll + subwindow.height - 1 > new_content_height:
-      force_redraw_reason = 'scrolled off the bottom of the page'
-    elif not is_scrollbar_visible and new_content_height > subwindow.height - 1:
-      force_redraw_reason = "scroll bar wasn't previously visible"
-    elif is_scrollbar_visible and new_content_height <= subwindow.height - 1:
-      force_redraw_reason = "scroll bar shouldn't be visible"
-    else:
-      force_redraw = False
+    # drawing the title after the content, so we'll clear content from the top line
 
-    self._last_content_height = new_content_height
-    self._has_new_event = False
+    search_results = (search, self._search_hit, self._search_hit_count) if search else None
+    _draw_title(subwindow, event_types, event_filter, self._prepopulated_count, self._event_queue.metrics().dropped, search_results, log_group.memory_usage())
 
-    if force_redraw and not is_correction:
-      log.debug('redrawing the log panel with the corrected content height (%s)' % force_redraw_reason)
-      self._draw(subwindow, True)
+    self._last_content_height = content_height
+    self._last_page_size = page_size
+    self._has_new_event = False
 
   def _update(self):
     """
@@ -344,20 +544,51 @@ class LogPanel(nyx.panel.DaemonPanel):
       self._last_day = current_day
       self.redraw()
 
-  def _register_tor_event(self, event):
-    msg = ' '.join(str(event).split(' ')[1:])
+  def stop(self):
+    """
+    Halts our daemon, processing and writing any events we have pending.
+    """
+
+    nyx.panel.DaemonPanel.stop(self)
 
-    if isinstance(event, stem.response.events.BandwidthEvent):
-      msg = 'READ: %i, WRITTEN: %i' % (event.read, event.written)
-    elif isinstance(event, stem.response.events.LogEvent):
-      msg = event.message
+    if self._log_tailer:
+      self._log_tailer.stop()
 
-    self._register_event(nyx.log.LogEntry(event.arrived_at, event.type, msg))
+    self._event_queue.stop()
+    self._log_file.close()
+
+  def _register_tor_event(self, event):
+    self._event_queue.put(event)
 
   def _register_nyx_event(self, record):
-    self._register_event(nyx.log.LogEntry(int(record.created), 'NYX_%s' % record.levelname, record.msg))
+    self._event_queue.put(record)
+
+  def _process_events(self, events):
+    """
+    Adds a batch of tor events, nyx log records, and entries from tor's log
+    file to our log.
+    """
+
+    for event in events:
+      if isinstance(event, nyx.log.LogEntry):
+        entry = event  # read from tor's log file
+      elif isinstance(event, logging.LogRecord):
+        entry = nyx.log.LogEntry(int(event.created), 'NYX_%s' % event.levelname, event.msg)
+      else:
+        msg = ' '.join(str(event).split(' ')[1:])
+
+        if isinstance(event, stem.response.events.BandwidthEvent):
+          msg = 'READ: %i, WRITTEN: %i' % (event.read, event.written)
+        elif isinstance(event, stem.response.events.LogEvent):
+          msg = event.message
+
+        entry = nyx.log.LogEntry(event.arrived_at, event.type, msg)
+
+      self._register_event(entry)
 
   def _register_event(self, event):
+    nyx.log.EVENT_COUNTS[self._controller][event.type] += 1
+
     if event.type not in self._event_types:
       return
 
@@ -370,9 +601,22 @@ class LogPanel(nyx.panel.DaemonPanel):
       self._has_new_event = True
 
 
-def _draw_title(subwindow, event_types, event_filter):
+def _new_event_log():
+  """
+  Provides an empty LogGroup with our configured limits.
+  """
+
+  archive = nyx.log.LogArchive(CONFIG['max_archived_log_size']) if CONFIG['max_archived_log_size'] else None
+  return nyx.log.LogGroup(CONFIG['max_log_size'], CONFIG['max_log_size_by_type'], CONFIG['max_log_memory'], archive)
+
+
+def _draw_title(subwindow, event_types, event_filter, prepopulated_count = None, dropped_count = 0, search_results = None, memory_usage = None):
   """
-  Panel title with the event types we're logging and our regex filter if set.
+  Panel title with the event types we're logging, our regex filter if set,
+  our progress reading tor's log file if we're still loading it, the number of
+  events we've dropped if we couldn't keep up, our search results as a
+  (query, selected result, result count) tuple if searching, and the memory
+  used by our log.
   """
 
   subwindow.addstr(0, 0, ' ' * subwindow.width)  # clear line
@@ -381,52 +625,195 @@ def _draw_title(subwindow, event_types, event_filter):
   if event_filter.selection():
     title_comp.append('filter: %s' % event_filter.selection())
 
+  if prepopulated_count is not None:
+    title_comp.append('loading history: %i' % prepopulated_count)
+
+  if dropped_count:
+    title_comp.append('dropped: %i' % dropped_count)
+
+  if search_results:
+    query, selected_hit, hit_count = search_results
+
+    if hit_count:
+      title_comp.append('search: %s (%i/%i)' % (query, selected_hit + 1, hit_count))
+    else:
+      title_comp.append('search: %s (no results)' % query)
+
+  if memory_usage is not None:
+    title_comp.append('memory: %s' % str_tools.size_label(memory_usage, 1))
+
   title_comp_str = join(title_comp, ', ', subwindow.width - 10)
   title = 'Events (%s):' % title_comp_str if title_comp_str else 'Events:'
 
   subwindow.addstr(0, 0, title, HIGHLIGHT)
 
 
-def _draw_entries(subwindow, x, y, event_log, show_duplicates):
+def _is_shown(entry, event_filter, show_duplicates):
   """
-  Presents a list of log entries, grouped by the day they appeared.
+  Checks if we show an entry.
   """
 
-  day_to_entries, today = {}, nyx.log.day_count(time.time())
+  return (show_duplicates or not entry.is_duplicate) and event_filter.match(entry.display_message)
 
-  for entry in event_log:
-    day_to_entries.setdefault(entry.day_count(), []).append(entry)
 
-  for day in sorted(day_to_entries.keys(), reverse = True):
-    if day == today:
-      for entry in day_to_entries[day]:
-        y = _draw_entry(subwindow, x + 1, y, subwindow.width, entry, show_duplicates)
-    else:
-      original_y, y = y, y + 1
+def _shown_entries(log_group, event_types, event_filter, show_duplicates, skip = 0, oldest_first = False):
+  """
+  Provides the entries we show from newest to oldest, followed by those in our
+  archive. Archived entries we skip over aren't decompressed.
+
+  :param nyx.log.LogGroup log_group: entries to provide
+  :param list event_types: event types we show
+  :param nyx.log.LogFilters event_filter: filter entries must match
+  :param bool show_duplicates: includes duplicate entries if **True**
+  :param int skip: number of shown entries to skip
+  :param bool oldest_first: provides our oldest entries first if **True**
+
+  :returns: **iterator** of the :class:`~nyx.log.LogEntry` we show
+  """
+
+  archive = log_group.archive()
+
+  # archived entries aren't deduplicated, so our filter alone determines if
+  # they're shown
+
+  if oldest_first:
+    if archive:
+      for entry in archive.entries(event_types, oldest_first = True, pattern = event_filter.selection()):
+        yield entry
+
+    for entry in log_group.entries(event_types, oldest_first = True):
+      if _is_shown(entry, event_filter, show_duplicates):
+        yield entry
+
+    return
+
+  for entry in log_group.entries(event_types):
+    if _is_shown(entry, event_filter, show_duplicates):
+      if skip:
+        skip -= 1
+      else:
+        yield entry
 
-      for entry in day_to_entries[day]:
-        y = _draw_entry(subwindow, x + 1, y, subwindow.width - 1, entry, show_duplicates)
+  if archive:
+    for entry in archive.entries(event_types, skip, pattern = event_filter.selection()):
+      yield entry
 
+
+def _shown_count(log_group, event_types, event_filter, show_duplicates):
+  """
+  Provides the number of entries we show. Without a filter this comes from
+  our counts of each type. Otherwise we check the entries we have in memory,
+  and our archive caches its counts for the filter.
+
+  :returns: **int** with the number of entries we show
+  """
+
+  if event_filter.selection() is None:
+    count = log_group.count(event_types, include_duplicates = show_duplicates)
+  else:
+    with contextlib.closing(log_group.entries(event_types)) as entries:
+      count = len([entry for entry in entries if _is_shown(entry, event_filter, show_duplicates)])
+
+  archive = log_group.archive()
+
+  if archive:
+    count += archive.count(event_types, event_filter.selection())
+
+  return count
+
+
+def _page_size(subwindow, x, log_group, event_types, event_filter, show_duplicates):
+  """
+  Provides the number of our oldest entries that fit on a page. This is the
+  space _draw_entries() uses for them, including the border around days other
+  than today.
+
+  :returns: **int** with the number of entries that fit on the bottom page,
+    at least one
+  """
+
+  page_height = subwindow.height - 1  # first line is our title
+  measure = nyx.curses.offscreen_subwindow(subwindow.width, subwindow.height)
+  today = nyx.log.day_count(time.time())
+  lines, size, last_day = 0, 0, None
+
+  with contextlib.closing(_shown_entries(log_group, event_types, event_filter, show_duplicates, oldest_first = True)) as shown_entries:
+    for entry in shown_entries:
+      day = entry.day_count()
+      is_today = day == today
+
+      if day != last_day and not is_today:
+        lines += 2  # top and bottom of the box around this day's entries
+
+      last_day = day
+      lines += _draw_entry(measure, x + 1, 0, subwindow.width - (0 if is_today else 1), entry, show_duplicates)
+
+      if lines > page_height:
+        break
+
+      size += 1
+
+  return max(1, size)
+
+
+def _draw_entries(subwindow, x, y, event_log, show_duplicates, selected = None):
+  """
+  Presents log entries, grouped by the day they appeared. This stops once
+  we've reached the bottom of the subwindow, so only the entries we draw are
+  pulled from **event_log**.
+
+  :returns: **tuple** with the vertical position we drew to, and where the
+    selected entry was drawn (**None** if there wasn't one)
+  """
+
+  selected_y = None
+  today = nyx.log.day_count(time.time())
+
+  for day, day_entries in itertools.groupby(event_log, lambda entry: entry.day_count()):
+    is_today = day == today
+    original_y, first_entry = y, None
+
+    if not is_today:
+      y += 1
+
+    for entry in day_entries:
+      if first_entry is None:
+        first_entry = entry
+
+      if entry is selected:
+        selected_y = y
+
+      y = _draw_entry(subwindow, x + 1, y, subwindow.width - (0 if is_today else 1), entry, show_duplicates, entry is selected)
+
+      if y >= subwindow.height:
+        break
+
+    if not is_today:
       subwindow.box(x, original_y, subwindow.width - x, y - original_y + 1, YELLOW, BOLD)
-      time_label = time.strftime(' %B %d, %Y ', time.localtime(day_to_entries[day][0].timestamp))
+      time_label = time.strftime(' %B %d, %Y ', time.localtime(first_entry.timestamp))
       subwindow.addstr(x + 2, original_y, time_label, YELLOW, BOLD)
 
       y += 1
 
-  return y
+    if y >= subwindow.height:
+      break
+
+  return y, selected_y
 
 
-def _draw_entry(subwindow, x, y, width, entry, show_duplicates):
+def _draw_entry(subwindow, x, y, width, entry, show_duplicates, is_selected = False):
   """
-  Presents an individual log entry with line wrapping.
+  Presents an individual log entry with line wrapping, highlighted if it's a
+  selected search result.
   """
 
   color = CONFIG['attr.log_color'].get(entry.type, WHITE)
   boldness = BOLD if entry.type in ('ERR', 'ERROR') else NORMAL  # emphasize ERROR messages
+  attr = (boldness, color, HIGHLIGHT) if is_selected else (boldness, color)
   min_x = x + 2
 
   for line in entry.display_message.splitlines():
-    x, y = subwindow.addstr_wrap(x, y, line, width, min_x, boldness, color)
+    x, y = subwindow.addstr_wrap(x, y, line, width, min_x, *attr)
 
   if entry.duplicates and len(entry.duplicates) != 1 and not show_duplicates:
     duplicate_count = len(entry.duplicates) - 1
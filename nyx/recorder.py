@@ -0,0 +1,279 @@
+# Copyright 2020, Damian Johnson and The Tor Project
+# See LICENSE for licensing information
+
+"""
+Records what tor tells us so it can be played back later. A recording has the
+replies to our requests (GETINFO, GETCONF, etc) and the events we receive, so
+replaying one reproduces a busy relay's load on a system without tor.
+
+Recordings are gzipped, with a json list per line of the form...
+
+::
+
+  [seconds since we started recording, request, raw reply]
+
+Events are the messages we didn't request, so their request is **null**.
+
+::
+
+  recording_controller - provides controllers that record their messages
+
+  Recorder - writes messages to a recording
+    |- record - adds a message to our recording
+    +- close - stops recording
+
+  ReplaySocket - control socket that plays back a recording
+    +- get_socket_path - provides the path of our recording
+"""
+
+import bisect
+import collections
+import gzip
+import json
+import socket
+import threading
+import time
+
+import stem.control
+import stem.socket
+import stem.util.log
+
+# Process ids belong to the system we recorded on. Local processes with that
+# pid aren't tor, so we don't play this back.
+
+UNREPLAYED_REQUESTS = ('GETINFO process/pid',)
+
+
+def recording_controller(path):
+  """
+  Provides a constructor for controllers that record their messages. This is
+  for the **controller** argument of :func:`~stem.connection.connect`.
+
+  :param str path: location to save our recording to
+
+  :returns: **function** that provides a :class:`~stem.control.Controller`
+
+  :raises: **IOError** if unable to write to the path
+  """
+
+  recorder = Recorder(path)
+
+  def recording_stopper(controller, state, timestamp):
+    if state == stem.control.State.CLOSED:
+      recorder.close()  # gzip needs to be closed for its content to be readable
+
+  def controller(control_socket, is_authenticated = False):
+    recorder.attach(control_socket)
+
+    controller = stem.control.Controller(control_socket, is_authenticated = is_authenticated)
+    controller.add_status_listener(recording_stopper, spawn = False)
+
+    return controller
+
+  return controller
+
+
+class Recorder(object):
+  """
+  Writes the messages of a control socket to a recording.
+
+  :param str path: location to save our recording to
+
+  :raises: **IOError** if unable to write to the path
+  """
+
+  def __init__(self, path):
+    self._file = gzip.open(path, 'wt')
+    self._lock = threading.RLock()
+    self._start_time = time.time()
+    self._requests = collections.deque()  # requests awaiting a reply
+
+  def attach(self, control_socket):
+    """
+    Records the messages sent and received through a control socket. This
+    must be called before the socket is used by a controller.
+
+    :param stem.socket.ControlSocket control_socket: socket to record
+    """
+
+    send, recv = control_socket.send, control_socket.recv
+
+    def recording_send(message):
+      # replies are received by another thread, so our request must be queued
+      # before it has a chance to arrive
+
+      self._requests.append(message)
+
+      try:
+        send(message)
+      except:
+        self._requests.remove(message)
+        raise
+
+    def recording_recv():
+      msg = recv()
+
+      if msg.content()[-1][0] == '650':
+        self.record(None, msg.raw_content())
+      elif self._requests:
+        self.record(self._requests.popleft(), msg.raw_content())
+
+      return msg
+
+    control_socket.send = recording_send
+    control_socket.recv = recording_recv
+
+  def record(self, request, reply):
+    """
+    Adds a message to our recording.
+
+    :param str request: request we made, **None** if this is an event
+    :param str reply: raw content of tor's message
+    """
+
+    with self._lock:
+      if self._file.closed:
+        return
+
+      try:
+        self._file.write(json.dumps([round(time.time() - self._start_time, 3), request, reply]) + '\n')
+      except (IOError, ValueError) as exc:
+        stem.util.log.warn('Unable to record controller messages: %s' % exc)
+        self._file.close()
+
+  def close(self):
+    """
+    Stops recording, flushing what we have to disk.
+    """
+
+    with self._lock:
+      self._file.close()
+
+
+class ReplaySocket(stem.socket.ControlSocket):
+  """
+  Control socket that plays back a recording. Events arrive at the rate they
+  were recorded (or faster if our speed is greater than one) and requests are
+  answered with tor's latest reply as of that point in the recording.
+
+  Messages are written to a local socket pair so they're parsed just as they
+  would be from tor.
+
+  :param str path: recording to play back
+  :param float speed: multiplier for how quickly we play back events
+  :param bool connect: starts playback if **True**
+
+  :raises:
+    * **IOError** if unable to read the recording
+    * **ValueError** if the recording is malformed
+  """
+
+  def __init__(self, path, speed = 1.0, connect = True):
+    super(ReplaySocket, self).__init__()
+
+    self._path = path
+    self._speed = speed
+    self._events = []  # tuples of the form (offset, raw content)
+    self._replies = {}  # request => ([offsets], [raw content])
+
+    with gzip.open(path, 'rt') as recording:
+      try:
+        for line in recording:
+          offset, request, reply = json.loads(line)
+
+          if request is None:
+            self._events.append((offset, reply))
+          elif request not in UNREPLAYED_REQUESTS:
+            offsets, replies = self._replies.setdefault(request, ([], []))
+            offsets.append(offset)
+            replies.append(reply)
+      except EOFError:
+        pass  # recording was interrupted, play back what we have
+
+    self._start_time = None
+    self._tor_socket = None
+    self._write_lock = threading.RLock()
+
+    if connect:
+      self.connect()
+
+  def get_socket_path(self):
+    """
+    Provides the path of the recording we're playing back.
+
+    :returns: **str** with our recording's path
+    """
+
+    return self._path
+
+  def _make_socket(self):
+    ours, theirs = socket.socketpair()
+    self._start_time = time.time()
+    self._tor_socket = theirs
+
+    for target in (self._respond, self._play_events):
+      thread = threading.Thread(target = target, args = (theirs,))
+      thread.setDaemon(True)
+      thread.start()
+
+    return ours
+
+  def _close(self):
+    if self._tor_socket:
+      self._tor_socket.close()
+
+  def _position(self):
+    """
+    Point of the recording we're at, in seconds.
+    """
+
+    return (time.time() - self._start_time) * self._speed
+
+  def _reply(self, request):
+    """
+    Provides the reply for a request, as tor gave it at our position in the
+    recording.
+    """
+
+    if request in self._replies:
+      offsets, replies = self._replies[request]
+      return replies[max(0, bisect.bisect_right(offsets, self._position()) - 1)]
+
+    command, keys = (request.split(' ', 1) + [''])[:2]
+
+    if command.upper() in ('GETINFO', 'GETCONF'):
+      return '552 Unrecognized key "%s"\r\n' % keys.split(' ')[0]
+    else:
+      return '250 OK\r\n'
+
+  def _respond(self, tor_socket):
+    requests = tor_socket.makefile('rb')
+
+    try:
+      for line in requests:
+        request = line.decode('utf-8').rstrip('\r\n')
+
+        if request.startswith('+'):
+          while line and line.rstrip(b'\r\n') != b'.':
+            line = requests.readline()  # multi-line request, its content isn't needed
+
+        self._write(tor_socket, self._reply(request))
+    except (OSError, ValueError):
+      pass  # socket closed
+
+  def _play_events(self, tor_socket):
+    for offset, event in self._events:
+      while self._position() < offset:
+        if tor_socket.fileno() == -1:
+          return  # socket closed
+
+        time.sleep(min(0.1, (offset - self._position()) / self._speed))
+
+      try:
+        self._write(tor_socket, event)
+      except OSError:
+        return  # socket closed
+
+  def _write(self, tor_socket, content):
+    with self._write_lock:
+      tor_socket.sendall(content.encode('utf-8'))
@@ -17,14 +17,19 @@ import time
 import nyx
 import nyx.arguments
 import nyx.curses
+import nyx.dump
+import nyx.exporter
+import nyx.recorder
 import nyx.tracker
+import nyx.workers
 
 import stem
 import stem.connection
+import stem.control
 import stem.util.log
 import stem.util.system
 
-from nyx import init_controller, uses_settings, nyx_interface
+from nyx import init_controller, init_replay, uses_settings
 
 DEBUG_HEADER = """
 Nyx {nyx_version} Debug Dump
@@ -89,19 +94,47 @@ def main(config):
   if controller_password:
     stem.connection.CONNECT_MESSAGES['incorrect_password'] = 'Unable to authenticate to tor using the controller password in %s' % args.config
 
-  controller = init_controller(
-    control_port = args.control_port,
-    control_socket = args.control_socket,
-    password = controller_password,
-    password_prompt = True,
-    chroot_path = nyx.chroot(),
-  )
+  if args.replay:
+    try:
+      controller = init_replay(args.replay, args.replay_speed)
+    except (IOError, ValueError) as exc:
+      print('Unable to play back %s: %s' % (args.replay, exc))
+      sys.exit(1)
+  else:
+    try:
+      controller_class = nyx.recorder.recording_controller(args.record) if args.record else stem.control.Controller
+    except IOError as exc:
+      print('Unable to record to %s: %s' % (args.record, exc))
+      sys.exit(1)
+
+    controller = init_controller(
+      control_port = args.control_port,
+      control_socket = args.control_socket,
+      password = controller_password,
+      password_prompt = True,
+      chroot_path = nyx.chroot(),
+      controller = controller_class,
+    )
 
   if controller is None:
     exit(1)
 
+  for endpoint in args.instances:
+    is_socket = not isinstance(endpoint, tuple)
+
+    instance = init_controller(
+      control_port = None if is_socket else endpoint,
+      control_socket = endpoint if is_socket else None,
+      password = controller_password,
+      password_prompt = True,
+      chroot_path = nyx.chroot(),
+    )
+
+    if instance is None:
+      exit(1)
+
   if args.debug_path is not None:
-    torrc_path = controller.get_info('config-file')
+    torrc_path = controller.get_info('config-file', None)
 
     try:
       with open(torrc_path) as torrc_file:
@@ -115,6 +148,26 @@ def main(config):
 
   _warn_if_root(controller)
   _warn_if_unable_to_get_pid(controller)
+
+  if args.exporter:
+    try:
+      nyx.exporter.main(args.exporter)
+    except KeyboardInterrupt:
+      pass
+    except (IOError, OSError) as exc:
+      print('Unable to serve metrics at %s: %s' % (args.exporter, exc))
+    finally:
+      _shutdown_daemons()
+
+    return
+  elif args.dump:
+    try:
+      nyx.dump.main(args.dump_full)
+    finally:
+      _shutdown_daemons()
+
+    return
+
   _use_unicode()
   _set_process_name()
   _warn_about_unused_config_keys()
@@ -134,7 +187,7 @@ def main(config):
     pass  # skip printing a stack trace
   finally:
     nyx.curses.halt()
-    _shutdown_daemons(controller)
+    _shutdown_daemons()
 
 
 def _setup_debug_logging(args):
@@ -240,21 +293,22 @@ def _set_process_name():
     stem.util.log.info("Unable to rename our process from '%s' to '%s' (%s)." % (stem.util.system.get_process_name(), process_name.replace('\0', ' '), exc))
 
 
-def _shutdown_daemons(controller):
+def _shutdown_daemons():
   """
   Stops and joins on worker threads.
   """
 
   halt_threads = [nyx.tracker.stop_trackers()]
-  interface = nyx_interface()
+  nyx.workers.stop()
 
-  if interface:
+  for interface in nyx.INTERFACES.values():
     halt_threads.append(interface.halt())
 
   for thread in halt_threads:
     thread.join()
 
-  controller.close()
+  for instance in nyx.tor_controllers():
+    instance.close()
 
 
 if __name__ == '__main__':
@@ -11,13 +11,15 @@ Background tasks for gathering information about the tor process.
   get_port_usage_tracker - provides a PortUsageTracker for our system
   get_consensus_tracker - provides a ConsensusTracker for our tor process
 
+  select_controller - points our trackers at another tor instance
   stop_trackers - halts any active trackers
 
   Daemon - common parent for resolvers
     |- ConnectionTracker - periodically checks the connections established by tor
     |  |- get_custom_resolver - provide the custom conntion resolver we're using
     |  |- set_custom_resolver - overwrites automatic resolver selecion with a custom resolver
-    |  +- get_value - provides our latest connection results
+    |  |- get_value - provides our latest connection results
+    |  +- get_counts - provides the number of inbound, outbound, and control connections
     |
     |- ResourceTracker - periodically checks the resource usage of tor
     |  +- get_value - provides our latest resource usage results
@@ -29,6 +31,7 @@ Background tasks for gathering information about the tor process.
     |- get_rate - provides the rate at which we run
     |- set_rate - sets the rate at which we run
     |- set_paused - pauses or continues work
+    |- set_controller - tracks the tor process of another controller
     +- stop - stops further work by the daemon
 
   ConsensusTracker - performant lookups for consensus related information
@@ -48,6 +51,14 @@ Background tasks for gathering information about the tor process.
   :var int memory_bytes: memory usage of the process in bytes
   :var float memory_percent: percentage of our memory used by this process
   :var float timestamp: unix timestamp for when this information was fetched
+
+.. data:: ConnectionCounts
+
+  Number of connections tor has of each kind.
+
+  :var int inbound: connections to our ORPort or DirPort
+  :var int outbound: connections we've made
+  :var int control: connections to our ControlPort
 """
 
 import collections
@@ -56,6 +67,7 @@ import time
 import threading
 
 import nyx
+import nyx.workers
 import stem.control
 import stem.descriptor.router_status_entry
 import stem.util.log
@@ -102,6 +114,12 @@ Resources = collections.namedtuple('Resources', [
   'timestamp',
 ])
 
+ConnectionCounts = collections.namedtuple('ConnectionCounts', [
+  'inbound',
+  'outbound',
+  'control',
+])
+
 Process = collections.namedtuple('Process', [
   'pid',
   'name',
@@ -158,19 +176,36 @@ def get_port_usage_tracker():
   return PORT_USAGE_TRACKER
 
 
-def get_consensus_tracker():
+def get_consensus_tracker(refresh = True):
   """
   Singleton for tracking the connections established by tor.
+
+  :param bool refresh: fetch the present consensus if our cache of it is
+    stale, this only applies when the tracker is first created
   """
 
   global CONSENSUS_TRACKER
 
   if CONSENSUS_TRACKER is None:
-    CONSENSUS_TRACKER = ConsensusTracker()
+    CONSENSUS_TRACKER = ConsensusTracker(refresh)
 
   return CONSENSUS_TRACKER
 
 
+def select_controller(controller):
+  """
+  Points our trackers at the tor process of another controller. Relay
+  information from the consensus is the same for every tor instance so our
+  ConsensusTracker is shared by all of them.
+
+  :param stem.control.Controller controller: tor instance to track
+  """
+
+  for tracker in (CONNECTION_TRACKER, RESOURCE_TRACKER, PORT_USAGE_TRACKER):
+    if tracker:
+      tracker.set_controller(controller)
+
+
 def stop_trackers():
   """
   Halts active trackers, providing back the thread shutting them down.
@@ -274,6 +309,115 @@ def _resources_via_proc(pid):
   return (total_cpu_time, uptime, memory_in_bytes, memory_in_percent)
 
 
+def _connections_by_pid(pid, other_pids = ()):
+  """
+  Provides the connections of several processes from a single read of proc's
+  connection listings. This is equivalent to calling proc's connections()
+  for each pid, but only parses /proc/net once however many tor instances
+  we're attached to.
+
+  Other processes whose file descriptors we're unable to read are omitted,
+  so one inaccessible tor instance doesn't prevent resolving the rest.
+
+  :param int pid: process to provide connections for
+  :param list other_pids: additional processes to provide connections for if
+    we're able
+
+  :returns: **dict** of pids to a **list** of their
+    :class:`~stem.util.connection.Connection`
+
+  :raises: **IOError** if unable to read from proc or the connections of
+    **pid**
+  """
+
+  other_pids = [other_pid for other_pid in other_pids if other_pid != pid]
+
+  if not hasattr(proc, '_inodes_for_sockets') or not hasattr(proc, '_unpack_addr'):
+    # Our single read relies on stem helpers that aren't part of its public
+    # api. If they're unavailable read each process separately.
+
+    results = {pid: proc.connections(pid)}
+
+    for other_pid in other_pids:
+      try:
+        results[other_pid] = proc.connections(other_pid)
+      except IOError as exc:
+        stem.util.log.debug('Unable to resolve the connections of process %s: %s' % (other_pid, exc))
+
+    return results
+
+  start_time = time.time()
+  results = {pid: []}
+  owners = dict([(inode, pid) for inode in proc._inodes_for_sockets(pid)])  # socket inode => pid
+
+  for other_pid in other_pids:
+    try:
+      inodes = proc._inodes_for_sockets(other_pid)
+    except IOError as exc:
+      stem.util.log.debug('Unable to resolve the connections of process %s: %s' % (other_pid, exc))
+      continue
+
+    results[other_pid] = []
+    owners.update([(inode, other_pid) for inode in inodes])
+
+  for proc_file_path in ('/proc/net/tcp', '/proc/net/tcp6', '/proc/net/udp', '/proc/net/udp6'):
+    if proc_file_path.endswith('6') and not os.path.exists(proc_file_path):
+      continue  # ipv6 proc contents are optional
+
+    protocol = proc_file_path[10:].rstrip('6')  # 'tcp' or 'udp'
+    is_ipv6 = proc_file_path.endswith('6')
+
+    try:
+      with open(proc_file_path, 'rb') as proc_file:
+        proc_file.readline()  # skip the header
+
+        for line in proc_file:
+          _, l_dst, r_dst, status, _, _, _, _, _, inode = line.split()[:10]
+          owner = owners.get(inode)
+
+          if owner is None:
+            continue  # not one of our processes
+          elif protocol == 'tcp' and status != b'01':
+            continue  # skip tcp connections that aren't yet established
+
+          l_addr, l_port = _unpack_proc_endpoint(l_dst)
+          r_addr, r_port = _unpack_proc_endpoint(r_dst)
+
+          if l_port == 0 or r_port == 0 or not r_addr.strip('0:.'):
+            continue  # no remote endpoint
+
+          results[owner].append(connection.Connection(l_addr, l_port, r_addr, r_port, protocol, is_ipv6))
+    except IOError as exc:
+      raise IOError("unable to read '%s': %s" % (proc_file_path, exc))
+
+  stem.util.log.debug('proc connections for pids %s took %0.4f seconds' % (', '.join(map(str, results.keys())), time.time() - start_time))
+  return results
+
+
+def _unpack_proc_endpoint(endpoint):
+  div = endpoint.find(b':')
+  return proc._unpack_addr(endpoint[:div]), int(endpoint[div + 1:], 16)
+
+
+def _parse_consensus(consensus_content):
+  """
+  Provides the relays listed in a consensus.
+
+  :param str consensus_content: raw consensus document
+
+  :returns: **list** of (fingerprint, address, or_port, nickname) tuples
+  """
+
+  relays = []
+
+  for line in consensus_content.splitlines():
+    if line.startswith('r '):
+      r_comp = line.split(' ')
+      relays.append((stem.descriptor.router_status_entry._base64_to_hex(r_comp[2]), r_comp[6], int(r_comp[7]), r_comp[1]))
+
+  return relays
+
+
 def _process_for_ports(local_ports, remote_ports):
   """
   Provides the name of the process using the given ports.
@@ -380,9 +524,8 @@ class Daemon(threading.Thread):
     self._is_paused = False
     self._halt = False  # terminates thread if true
 
-    controller = tor_controller()
-    controller.add_status_listener(self._tor_status_listener)
-    self._tor_status_listener(controller, stem.control.State.INIT, None)
+    self._controllers = []  # controllers we're listening to
+    self.set_controller(tor_controller())
 
   def run(self):
     while not self._halt:
@@ -459,6 +602,22 @@ class Daemon(threading.Thread):
 
     self._is_paused = pause
 
+  def set_controller(self, controller):
+    """
+    Tracks the tor process of another controller, such as when we're attached
+    to several tor instances.
+
+    :param stem.control.Controller controller: controller of the process to
+      be tracked
+    """
+
+    if controller not in self._controllers:
+      controller.add_status_listener(self._tor_status_listener)
+      self._controllers.append(controller)
+
+    self._tor_status_listener(controller, stem.control.State.INIT, None)
+    self._last_ran = -1  # provide results for our new process right away
+
   def stop(self):
     """
     Halts further work and terminates the thread.
@@ -467,6 +626,9 @@ class Daemon(threading.Thread):
     self._halt = True
 
   def _tor_status_listener(self, controller, event_type, _):
+    if controller is not tor_controller():
+      return  # status change of a tor instance we're not presently tracking
+
     with self._process_lock:
       if not self._halt and event_type in (stem.control.State.INIT, stem.control.State.RESET):
         tor_pid = controller.get_pid(None)
@@ -493,9 +655,13 @@ class ConnectionTracker(Daemon):
   """
 
   def __init__(self, rate):
+    self._connections = []
+    self._counts = ConnectionCounts(0, 0, 0)
+    self._instance_connections = {}  # pid => connections of other tor instances we're attached to
+    self._instance_counts = {}  # pid => connection counts of all tor instances
+
     super(ConnectionTracker, self).__init__(rate)
 
-    self._connections = []
     self._start_times = {}  # connection => (unix_timestamp, is_legacy)
     self._custom_resolver = None
     self._is_first_run = True
@@ -549,15 +715,40 @@ class ConnectionTracker(Daemon):
             connections.append(conn)  # outbound to another relay
           elif conn.local_port in relay_ports:
             connections.append(conn)
+      elif resolver == connection.Resolver.PROC:
+        # When attached to several tor instances a single read of proc
+        # provides the connections of them all.
+
+        controllers = dict([(c.get_pid(None), c) for c in nyx.tor_controllers() if c.get_pid(None)])
+        controllers[process_pid] = tor_controller()
+
+        instance_connections = nyx.workers.run(_connections_by_pid, process_pid, [pid for pid in controllers if pid != process_pid])
+        connections = instance_connections.pop(process_pid)
       else:
-        connections = connection.get_connections(resolver, process_pid = process_pid, process_name = process_name)
+        connections = nyx.workers.run(connection.get_connections, resolver, process_pid = process_pid, process_name = process_name)
+
+      def with_start_times(connections):
+        results = []
+
+        for conn in connections:
+          conn_start_time, is_legacy = self._start_times.get(conn, (start_time, self._is_first_run))
+          new_start_times[conn] = (conn_start_time, is_legacy)
+          results.append(Connection(conn_start_time, is_legacy, *conn))
 
-      for conn in connections:
-        conn_start_time, is_legacy = self._start_times.get(conn, (start_time, self._is_first_run))
-        new_start_times[conn] = (conn_start_time, is_legacy)
-        new_connections.append(Connection(conn_start_time, is_legacy, *conn))
+        return results
+
+      new_connections = with_start_times(connections)
+      new_counts = {process_pid: self._count(new_connections)}
+
+      if resolver == connection.Resolver.PROC:
+        self._instance_connections = dict([(pid, with_start_times(conns)) for pid, conns in instance_connections.items()])
+        new_counts.update([(pid, self._count(conns, controllers[pid])) for pid, conns in self._instance_connections.items()])
+      else:
+        self._instance_connections = {}
 
       self._connections = new_connections
+      self._counts = new_counts[process_pid]
+      self._instance_counts = new_counts
       self._start_times = new_start_times
       self._is_first_run = False
 
@@ -603,6 +794,28 @@ class ConnectionTracker(Daemon):
 
       return False
 
+  def _count(self, connections, controller = None):
+    """
+    Classifies connections by the tor port they're using.
+    """
+
+    if controller is None:
+      controller = tor_controller()
+
+    relay_ports = set(controller.get_ports(stem.control.Listener.OR, []))
+    relay_ports.update(controller.get_ports(stem.control.Listener.DIR, []))
+    control_ports = set(controller.get_ports(stem.control.Listener.CONTROL, []))
+
+    inbound, control = 0, 0
+
+    for conn in connections:
+      if conn.local_port in relay_ports:
+        inbound += 1
+      elif conn.local_port in control_ports:
+        control += 1
+
+    return ConnectionCounts(inbound, len(connections) - inbound - control, control)
+
   def get_custom_resolver(self):
     """
     Provides the custom resolver the user has selected. This is **None** if
@@ -636,6 +849,39 @@ class ConnectionTracker(Daemon):
     else:
       return list(self._connections)
 
+  def get_counts(self, pid = None):
+    """
+    Provides the number of connections of each kind in our latest results.
+    These are tallied when our results change so this is cheap to call.
+
+    :param int pid: tor instance to provide counts for, the process we're
+      tracking if **None**
+
+    :returns: :data:`~nyx.tracker.ConnectionCounts` for our latest results,
+      all zero if our tracker's been stopped or lacks results for the pid
+    """
+
+    if self._halt:
+      return ConnectionCounts(0, 0, 0)
+    elif pid is None:
+      return self._counts
+    else:
+      return self._instance_counts.get(pid, ConnectionCounts(0, 0, 0))
+
+  def set_controller(self, controller):
+    previous_pid = self._process_pid
+    super(ConnectionTracker, self).set_controller(controller)
+
+    with self._process_lock:
+      if self._process_pid != previous_pid and previous_pid is not None:
+        # Swap in our results for this tor instance if we already have them.
+
+        if self._connections:
+          self._instance_connections[previous_pid] = self._connections
+
+        self._connections = self._instance_connections.pop(self._process_pid, [])
+        self._counts = self._instance_counts.get(self._process_pid, ConnectionCounts(0, 0, 0))
+
 
 class ResourceTracker(Daemon):
   """
@@ -643,42 +889,62 @@ class ResourceTracker(Daemon):
   """
 
   def __init__(self, rate):
-    super(ResourceTracker, self).__init__(rate)
-
     self._resources = None
+    self._instance_resources = {}  # pid => resources of other tor instances we're attached to
     self._use_proc = proc.is_available()  # determines if we use proc or ps for lookups
     self._failure_count = 0  # number of times in a row we've failed to get results
 
-  def get_value(self):
+    super(ResourceTracker, self).__init__(rate)
+
+  def get_value(self, pid = None):
     """
     Provides tor's latest resource usage.
 
+    :param int pid: tor instance to provide resource usage for, the process
+      we're tracking if **None**
+
     :returns: latest :data:`~nyx.tracker.Resources` we've polled
     """
 
-    result = self._resources
+    if pid is None or pid == self._process_pid:
+      result = self._resources
+    else:
+      result = self._instance_resources.get(pid)
+
     return result if result else Resources(0.0, 0.0, 0.0, 0, 0.0, 0.0)
 
+  def set_controller(self, controller):
+    previous_pid = self._process_pid
+    super(ResourceTracker, self).set_controller(controller)
+
+    with self._process_lock:
+      if self._process_pid != previous_pid and previous_pid is not None:
+        # Swap in our results for this tor instance if we already have them.
+
+        if self._resources:
+          self._instance_resources[previous_pid] = self._resources
+
+        self._resources = self._instance_resources.pop(self._process_pid, None)
+
   def _task(self, process_pid, process_name):
-    try:
-      resolver = _resources_via_proc if self._use_proc else _resources_via_ps
-      total_cpu_time, uptime, memory_in_bytes, memory_in_percent = resolver(process_pid)
-      now = time.time()
+    # Other tor instances we're attached to are sampled too so their graphs
+    # are complete when shown. We don't fail over on their behalf.
 
-      if self._resources:
-        cpu_sample = (total_cpu_time - self._resources.cpu_total) / (now - self._resources.timestamp)
-      else:
-        cpu_sample = 0.0  # we need a prior datapoint to give a sampling
+    instance_resources = {}
+
+    for controller in nyx.tor_controllers():
+      pid = controller.get_pid(None)
 
-      self._resources = Resources(
-        cpu_sample = cpu_sample,
-        cpu_average = total_cpu_time / uptime,
-        cpu_total = total_cpu_time,
-        memory_bytes = memory_in_bytes,
-        memory_percent = memory_in_percent,
-        timestamp = now,
-      )
+      if pid and pid != process_pid:
+        try:
+          instance_resources[pid] = self._sample(pid, self._instance_resources.get(pid))
+        except IOError as exc:
+          stem.util.log.debug('Unable to query the resource usage of tor process %s (%s)' % (pid, exc))
 
+    self._instance_resources = instance_resources
+
+    try:
+      self._resources = self._sample(process_pid, self._resources)
       self._failure_count = 0
       return True
     except IOError as exc:
@@ -706,6 +972,37 @@ class ResourceTracker(Daemon):
 
       return False
 
+  def _sample(self, pid, previous):
+    """
+    Resolves the resource usage of a process.
+
+    :param int pid: process to resolve
+    :param Resources previous: our prior sampling of the process, used for
+      its cpu usage since then
+
+    :returns: :data:`~nyx.tracker.Resources` of the process
+
+    :raises: **IOError** if unable to resolve the process' resource usage
+    """
+
+    resolver = _resources_via_proc if self._use_proc else _resources_via_ps
+    total_cpu_time, uptime, memory_in_bytes, memory_in_percent = resolver(pid)
+    now = time.time()
+
+    if previous:
+      cpu_sample = (total_cpu_time - previous.cpu_total) / (now - previous.timestamp)
+    else:
+      cpu_sample = 0.0  # we need a prior datapoint to give a sampling
+
+    return Resources(
+      cpu_sample = cpu_sample,
+      cpu_average = total_cpu_time / uptime,
+      cpu_total = total_cpu_time,
+      memory_bytes = memory_in_bytes,
+      memory_percent = memory_in_percent,
+      timestamp = now,
+    )
+
 
 class PortUsageTracker(Daemon):
   """
@@ -805,9 +1102,12 @@ class PortUsageTracker(Daemon):
 class ConsensusTracker(object):
   """
   Provides performant lookups of consensus information.
+
+  :param bool refresh: fetch the present consensus if our cache of it is
+    stale, otherwise lookups are limited to what we've cached
   """
 
-  def __init__(self):
+  def __init__(self, refresh = True):
     self._my_router_status_entry = None
     self._my_router_status_entry_time = 0
 
@@ -822,6 +1122,8 @@ class ConsensusTracker(object):
 
     if cache_age < 3600:
       stem.util.log.info('Cache is only %s old, no need to refresh it.' % str_tools.time_label(cache_age, is_long = True))
+    elif not refresh:
+      stem.util.log.info('Cache is %s old, but skipping its refresh.' % str_tools.time_label(cache_age, is_long = True))
     else:
       stem.util.log.info('Cache is %s old, refreshing relay information.' % str_tools.time_label(cache_age, is_long = True))
       ns_response = controller.get_info('ns/all', None)
@@ -834,22 +1136,15 @@ class ConsensusTracker(object):
   def _update(self, consensus_content):
     start_time = time.time()
     our_fingerprint = tor_controller().get_info('fingerprint', None)
+    relays = nyx.workers.run(_parse_consensus, consensus_content)
 
     with nyx.cache().write() as writer:
-      for line in consensus_content.splitlines():
-        if line.startswith('r '):
-          r_comp = line.split(' ')
-
-          address = r_comp[6]
-          or_port = int(r_comp[7])
-          fingerprint = stem.descriptor.router_status_entry._base64_to_hex(r_comp[2])
-          nickname = r_comp[1]
-
-          if fingerprint == our_fingerprint:
-            self._my_router_status_entry = None
-            self._my_router_status_entry_time = 0
+      for fingerprint, address, or_port, nickname in relays:
+        if fingerprint == our_fingerprint:
+          self._my_router_status_entry = None
+          self._my_router_status_entry_time = 0
 
-          writer.record_relay(fingerprint, address, or_port, nickname)
+        writer.record_relay(fingerprint, address, or_port, nickname)
 
     stem.util.log.info('Updated consensus cache, took %0.2fs.' % (time.time() - start_time))
 
@@ -0,0 +1,139 @@
+# Copyright 2020, Damian Johnson and The Tor Project
+# See LICENSE for licensing information
+
+"""
+Optional pool of worker processes for cpu heavy parsing. Python threads share
+a single interpreter lock, so parsing a consensus or log file in our own
+process stalls the interface while it runs. Work done in other processes
+doesn't.
+
+This is disabled unless the 'worker_processes' config option is set. Without
+a pool, or if our workers become unavailable, tasks run in the calling thread.
+
+::
+
+  run - performs a task, in a worker process if we have a pool
+  is_enabled - checks if tasks are run in worker processes
+  stop - terminates our worker processes
+"""
+
+import signal
+import threading
+
+import stem.util.log
+
+from stem.util import conf
+
+try:
+  import concurrent.futures
+  import concurrent.futures.process
+  import multiprocessing
+
+  IS_POOL_AVAILABLE = True
+except ImportError:
+  IS_POOL_AVAILABLE = False
+
+CONFIG = conf.config_dict('nyx', {
+  'worker_processes': 0,
+})
+
+POOL = None
+POOL_LOCK = threading.RLock()
+POOL_STOPPED = False  # our workers were stopped or became unavailable
+
+
+def run(func, *args, **kwargs):
+  """
+  Performs a task. If we have a pool of worker processes this is done in one
+  of them, otherwise it's done in our thread.
+
+  :param function func: module level function to be called, this and its
+    arguments must be picklable
+  :param list args: positional arguments for the function
+  :param dict kwargs: keyword arguments for the function
+
+  :returns: result of the function
+
+  :raises: anything the function raises
+  """
+
+  pool = _pool()
+
+  if pool:
+    try:
+      return pool.submit(func, *args, **kwargs).result()
+    except concurrent.futures.process.BrokenProcessPool as exc:
+      _fail('our worker processes stopped unexpectedly (%s)' % exc)
+
+  return func(*args, **kwargs)
+
+
+def is_enabled():
+  """
+  Checks if tasks are being run in worker processes.
+
+  :returns: **True** if we have a pool of worker processes, **False** if
+    tasks run in our thread
+  """
+
+  return IS_POOL_AVAILABLE and CONFIG['worker_processes'] > 0 and not POOL_STOPPED
+
+
+def stop():
+  """
+  Terminates our worker processes. Tasks run after this are done in our
+  thread.
+  """
+
+  global POOL, POOL_STOPPED
+
+  with POOL_LOCK:
+    if POOL:
+      POOL.shutdown(wait = False)
+      POOL = None
+
+    POOL_STOPPED = True
+
+
+def _pool():
+  """
+  Provides our worker processes, starting them if this is the first use.
+  """
+
+  global POOL
+
+  with POOL_LOCK:
+    if POOL is None and is_enabled():
+      try:
+        # Spawn rather than fork so workers don't inherit our threads or
+        # curses state.
+
+        POOL = concurrent.futures.ProcessPoolExecutor(
+          max_workers = CONFIG['worker_processes'],
+          mp_context = multiprocessing.get_context('spawn'),
+          initializer = _ignore_interrupts,
+        )
+
+        stem.util.log.info('Started %i worker processes' % CONFIG['worker_processes'])
+      except (OSError, ValueError, NotImplementedError, TypeError) as exc:
+        _fail('unable to start worker processes (%s)' % exc)
+
+    return POOL
+
+
+def _fail(reason):
+  global POOL, POOL_STOPPED
+
+  with POOL_LOCK:
+    if not POOL_STOPPED:
+      stem.util.log.notice('Parsing in our own process rather than worker processes, %s' % reason)
+
+    if POOL:
+      POOL.shutdown(wait = False)
+      POOL = None
+
+    POOL_STOPPED = True
+
+
+def _ignore_interrupts():
+  signal.signal(signal.SIGINT, signal.SIG_IGN)  # our parent handles ctrl+c
@@ -21,12 +21,16 @@ except ImportError:
 __all__ = [
   'arguments',
   'curses',
+  'dump',
+  'exporter',
   'installation',
   'log',
   'menu',
   'panel',
   'popups',
+  'recorder',
   'tracker',
+  'workers',
 ]
 
 NYX_BASE = os.path.sep.join(__file__.split(os.path.sep)[:-2])
@@ -28,12 +28,38 @@ class TestArgumentParsing(unittest.TestCase):
     self.assertEqual('/tmp/my_socket', args.control_socket)
     self.assertEqual('/tmp/my_config', args.config)
 
+    args = parse(['--interface', '9051', '--interface', '10.0.0.25:9061', '--socket', '/tmp/my_socket', '--socket', '/tmp/other_socket'])
+    self.assertEqual(('127.0.0.1', 9051), args.control_port)
+    self.assertEqual('/tmp/my_socket', args.control_socket)
+    self.assertEqual((('10.0.0.25', 9061), '/tmp/other_socket'), args.instances)
+
     args = parse(['--debug', '/tmp/dump'])
     self.assertEqual('/tmp/dump', args.debug_path)
 
     args = parse(['--log', 'DEBUG,NYX_DEBUG'])
     self.assertEqual('DEBUG,NYX_DEBUG', args.logged_events)
 
+    args = parse(['--exporter', '9052'])
+    self.assertEqual(('127.0.0.1', 9052), args.exporter)
+
+    args = parse(['--exporter', '0.0.0.0:9052'])
+    self.assertEqual(('0.0.0.0', 9052), args.exporter)
+
+    args = parse(['--exporter', '/tmp/nyx_metrics'])
+    self.assertEqual('/tmp/nyx_metrics', args.exporter)
+
+    args = parse(['--dump'])
+    self.assertEqual((True, False), (args.dump, args.dump_full))
+
+    args = parse(['--dump-full'])
+    self.assertEqual((True, True), (args.dump, args.dump_full))
+
+    args = parse(['--record', '/tmp/relay.gz'])
+    self.assertEqual('/tmp/relay.gz', args.record)
+
+    args = parse(['--replay', '/tmp/relay.gz', '--replay-speed', '2.5'])
+    self.assertEqual(('/tmp/relay.gz', 2.5), (args.replay, args.replay_speed))
+
     args = parse(['--version'])
     self.assertEqual(True, args.print_version)
 
@@ -83,6 +109,10 @@ class TestArgumentParsing(unittest.TestCase):
     for invalid_input in invalid_inputs:
       self.assertRaises(ValueError, parse, ['--interface', invalid_input])
 
+  def test_that_we_reject_invalid_replay_speeds(self):
+    for invalid_input in ('', 'blarg', '0', '-2'):
+      self.assertRaises(ValueError, parse, ['--replay-speed', invalid_input])
+
   def test_help(self):
     self.assertTrue(get_help().startswith('Usage nyx [OPTION]'))
     self.assertTrue('change control interface from 127.0.0.1:default' in get_help())
@@ -151,3 +151,31 @@ class TestCache(unittest.TestCase):
       self.assertRaisesRegexp(ValueError, re.escape("'blarg' isn't a valid address"), writer.record_relay, '3EA8E960F6B94CE30062AA8EF02894C00F8D1E66', 'blarg', 1443, 'caersidi')
       self.assertRaisesRegexp(ValueError, re.escape("'blarg' isn't a valid port"), writer.record_relay, '3EA8E960F6B94CE30062AA8EF02894C00F8D1E66', '208.113.165.162', 'blarg', 'caersidi')
       self.assertRaisesRegexp(ValueError, re.escape("'~blarg' isn't a valid nickname"), writer.record_relay, '3EA8E960F6B94CE30062AA8EF02894C00F8D1E66', '208.113.165.162', 1443, '~blarg')
+
+  @patch('nyx.data_directory', Mock(return_value = None))
+  def test_graph_history(self):
+    """
+    Record, fetch, and prune persisted graph samplings.
+    """
+
+    cache = nyx.cache()
+
+    with cache.write() as writer:
+      writer.record_graph_history('relay1', 'bandwidth', True, [('minutely', 1000.0, 5.0), ('minutely', 1060.0, 7.0), ('hourly', 3600.0, 6.0)])
+      writer.record_graph_history('relay1', 'bandwidth', False, [('minutely', 1000.0, 2.0)])
+      writer.record_graph_history('relay2', 'bandwidth', True, [('minutely', 1000.0, 9.0)])
+
+    self.assertEqual([(1060.0, 7.0), (1000.0, 5.0)], cache.graph_history('relay1', 'bandwidth', True, 'minutely'))
+    self.assertEqual([(1060.0, 7.0)], cache.graph_history('relay1', 'bandwidth', True, 'minutely', since = 1000.0))
+    self.assertEqual([(1000.0, 2.0)], cache.graph_history('relay1', 'bandwidth', False, 'minutely'))
+    self.assertEqual([], cache.graph_history('relay1', 'resources', True, 'minutely'))
+    self.assertEqual([(1000.0, 9.0)], cache.graph_history('relay2', 'bandwidth', True, 'minutely'))
+
+    with cache.write() as writer:
+      writer.prune_graph_history('relay1', 'bandwidth', True, 'minutely', 1030.0)
+
+    # other tor instances keep their samplings
+
+    self.assertEqual([(1000.0, 9.0)], cache.graph_history('relay2', 'bandwidth', True, 'minutely'))
+    self.assertEqual([(1060.0, 7.0)], cache.graph_history('relay1', 'bandwidth', True, 'minutely'))
+    self.assertEqual([(3600.0, 6.0)], cache.graph_history('relay1', 'bandwidth', True, 'hourly'))
@@ -0,0 +1,138 @@
+"""
+Unit tests for nyx.dump.
+"""
+
+import datetime
+import json
+import time
+import unittest
+
+import nyx.dump
+import nyx.panel.header
+import nyx.tracker
+
+from nyx.panel.connection import Category, Line, LineType
+
+try:
+  # added in python 3.3
+  from unittest.mock import Mock, patch
+except ImportError:
+  from mock import Mock, patch
+
+CONFIG_TEXT = """
+ControlPort 9051
+ORPort 9050
+Log notice file /var/log/tor/notices.log
+Log warn stdout
+""".lstrip()
+
+CIRCUIT = Mock(
+  id = '7',
+  status = 'BUILT',
+  purpose = 'GENERAL',
+  build_flags = ['NEED_CAPACITY'],
+  created = datetime.datetime(2014, 9, 14, 19, 39, 58),
+  path = [('1F43EE37A0670301AD9CB555D94AFEC2C89FDE86', 'Unnamed'), ('B6D83EC2D9E18B0A7A33428F8CFA9C536769E209', None)],
+)
+
+CONNECTION = nyx.tracker.Connection(1410723598.0, False, '127.0.0.1', 9050, '73.43.136.12', 443, 'tcp', False)
+
+
+def sampling():
+  return nyx.panel.header.Sampling(**dict([(attr, None) for attr in nyx.dump.HEADER_ATTR], fingerprint = '1A94D1A794FCB2F8B6CBC179EF8FDD4008A98D3B', flags = ['Fast', 'Running'], exit_policy = 'reject *:*'))
+
+
+class TestDump(unittest.TestCase):
+  def setUp(self):
+    self.controller = Mock()
+    self.controller.get_info.side_effect = lambda param, default = None: CONFIG_TEXT if param == 'config-text' else default
+    self.controller.get_circuits.return_value = [CIRCUIT]
+    self.controller.get_accounting_stats.return_value = None
+
+    patches = [
+      patch('nyx.dump.tor_controller', return_value = self.controller),
+      patch('nyx.panel.graph.tor_controller', return_value = self.controller),
+      patch('nyx.panel.header.Sampling.create', side_effect = sampling),
+      patch('nyx.tracker.get_consensus_tracker'),
+      patch('nyx.tracker.get_resource_tracker'),
+      patch('nyx.tracker.get_connection_tracker'),
+    ]
+
+    for tracker_patch in patches:
+      tracker_patch.start()
+      self.addCleanup(tracker_patch.stop)
+
+    nyx.tracker.get_consensus_tracker().get_relay_nickname.return_value = 'caerSidi'
+
+    resource_tracker = nyx.tracker.get_resource_tracker()
+    resource_tracker.run_counter.return_value = 1
+    resource_tracker.get_value.return_value = nyx.tracker.Resources(0.25, 0.2, 320.5, 52428800, 0.012, 0.0)
+
+    connection_tracker = nyx.tracker.get_connection_tracker()
+    connection_tracker.run_counter.return_value = 1
+    connection_tracker.get_value.return_value = [CONNECTION]
+    connection_tracker.get_counts.return_value = nyx.tracker.ConnectionCounts(1, 0, 0)
+
+  @patch('nyx.panel.connection.Entry.from_connection')
+  def test_snapshot(self, from_connection_mock):
+    from_connection_mock.return_value = self._entry(is_private = False)
+    snapshot = nyx.dump.snapshot()
+
+    self.assertEqual(['bandwidth', 'circuits', 'config', 'connections', 'header', 'resources', 'timestamp'], sorted(snapshot.keys()))
+    nyx.tracker.get_consensus_tracker.assert_any_call(refresh = False)
+
+    self.assertEqual('1A94D1A794FCB2F8B6CBC179EF8FDD4008A98D3B', snapshot['header']['fingerprint'])
+    self.assertEqual('reject *:*', snapshot['header']['exit_policy'])
+    self.assertEqual(52428800, snapshot['resources']['memory_bytes'])
+    self.assertEqual(['notice file /var/log/tor/notices.log', 'warn stdout'], snapshot['config']['Log'])
+    self.assertEqual(['9051'], snapshot['config']['ControlPort'])
+
+    circuit = snapshot['circuits'][0]
+    self.assertEqual('7', circuit['id'])
+    self.assertEqual(['Unnamed', 'caerSidi'], [hop['nickname'] for hop in circuit['path']])
+
+    self.assertEqual({'inbound': 1, 'outbound': 0, 'control': 0}, snapshot['connections']['counts'])
+    self.assertEqual('73.43.136.12', snapshot['connections']['entries'][0]['remote_address'])
+    self.assertEqual('us', snapshot['connections']['entries'][0]['locale'])
+
+    json.dumps(snapshot)  # everything we provide should be serializable
+
+  @patch('nyx.panel.connection.Entry.from_connection')
+  def test_snapshot_scrubs_private_connections(self, from_connection_mock):
+    from_connection_mock.return_value = self._entry(is_private = True)
+    entry = nyx.dump.snapshot()['connections']['entries'][0]
+
+    self.assertEqual(None, entry['remote_address'])
+    self.assertEqual(None, entry['remote_port'])
+    self.assertEqual(None, entry['locale'])
+    self.assertEqual(9050, entry['local_port'])
+
+  @patch('nyx.log.log_file_path', Mock(return_value = None))
+  @patch('nyx.panel.connection.Entry.from_connection')
+  def test_full_snapshot(self, from_connection_mock):
+    from_connection_mock.return_value = self._entry(is_private = False)
+    snapshot = nyx.dump.snapshot(full = True)
+
+    nyx.tracker.get_consensus_tracker.assert_any_call(refresh = True)
+    self.assertTrue('log' in snapshot)
+    self.assertEqual(None, snapshot['log'])
+
+  def test_snapshot_without_tracker_results(self):
+    for tracker in (nyx.tracker.get_resource_tracker(), nyx.tracker.get_connection_tracker()):
+      tracker.run_counter.return_value = 0
+
+    start = time.time()
+    snapshot = nyx.dump.snapshot()
+    self.assertTrue(time.time() - start < 1)  # trackers without results don't hold us up
+
+    self.assertEqual(None, snapshot['resources'])
+    self.assertEqual(None, snapshot['connections'])
+    self.assertEqual('1A94D1A794FCB2F8B6CBC179EF8FDD4008A98D3B', snapshot['header']['fingerprint'])
+
+  def _entry(self, is_private):
+    entry = Mock()
+    entry.get_type.return_value = Category.INBOUND
+    entry.is_private.return_value = is_private
+    entry.get_lines.return_value = [Line(entry, LineType.CONNECTION, CONNECTION, None, None, None, 'us')]
+
+    return entry
@@ -0,0 +1,238 @@
+"""
+Unit tests for nyx.exporter.
+"""
+
+import os
+import socket
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+import nyx.exporter
+import nyx.panel.graph
+import nyx.tracker
+
+from stem.control import AccountingStats
+
+try:
+  # added in python 3.3
+  from unittest.mock import Mock, patch
+except ImportError:
+  from mock import Mock, patch
+
+EXPECTED_METRICS = """
+# HELP nyx_tor_up Whether we are connected to tor.
+# TYPE nyx_tor_up gauge
+nyx_tor_up 1
+# HELP nyx_tor_read_bytes_total Bytes tor has read.
+# TYPE nyx_tor_read_bytes_total counter
+nyx_tor_read_bytes_total 7000
+# HELP nyx_tor_written_bytes_total Bytes tor has written.
+# TYPE nyx_tor_written_bytes_total counter
+nyx_tor_written_bytes_total 300
+# HELP nyx_tor_read_bytes_per_second Rate at which tor read during the last second.
+# TYPE nyx_tor_read_bytes_per_second gauge
+nyx_tor_read_bytes_per_second 4000
+# HELP nyx_tor_written_bytes_per_second Rate at which tor wrote during the last second.
+# TYPE nyx_tor_written_bytes_per_second gauge
+nyx_tor_written_bytes_per_second 200
+# HELP nyx_tor_cpu_ratio Cpu usage of tor since we last checked.
+# TYPE nyx_tor_cpu_ratio gauge
+nyx_tor_cpu_ratio 0.25
+# HELP nyx_tor_cpu_seconds_total Cpu time tor has used.
+# TYPE nyx_tor_cpu_seconds_total counter
+nyx_tor_cpu_seconds_total 320.5
+# HELP nyx_tor_memory_bytes Memory used by tor.
+# TYPE nyx_tor_memory_bytes gauge
+nyx_tor_memory_bytes 52428800
+# HELP nyx_tor_memory_ratio Portion of the system memory used by tor.
+# TYPE nyx_tor_memory_ratio gauge
+nyx_tor_memory_ratio 0.012
+# HELP nyx_tor_connections Connections tor has established.
+# TYPE nyx_tor_connections gauge
+nyx_tor_connections{direction="inbound"} 15
+nyx_tor_connections{direction="outbound"} 40
+nyx_tor_connections{direction="control"} 1
+# HELP nyx_tor_accounting_read_bytes Bytes read this accounting period.
+# TYPE nyx_tor_accounting_read_bytes gauge
+nyx_tor_accounting_read_bytes 4812
+# HELP nyx_tor_accounting_written_bytes Bytes written this accounting period.
+# TYPE nyx_tor_accounting_written_bytes gauge
+nyx_tor_accounting_written_bytes 7500
+# HELP nyx_tor_accounting_read_limit_bytes Bytes that can be read this accounting period.
+# TYPE nyx_tor_accounting_read_limit_bytes gauge
+nyx_tor_accounting_read_limit_bytes 103050
+# HELP nyx_tor_accounting_write_limit_bytes Bytes that can be written this accounting period.
+# TYPE nyx_tor_accounting_write_limit_bytes gauge
+nyx_tor_accounting_write_limit_bytes 9500
+# HELP nyx_tor_accounting_reset_seconds Seconds until the accounting period resets.
+# TYPE nyx_tor_accounting_reset_seconds gauge
+nyx_tor_accounting_reset_seconds 62
+""".lstrip()
+
+
+class Controller(object):
+  """
+  Stand-in for tor's controller, providing the information we export.
+  """
+
+  def __init__(self):
+    self.alive = True
+    self.accounting = AccountingStats(1410723598.276578, 'awake', 1410723598.276578, 62, 4812, 2000, 103050, 7500, 107862, 9500)
+
+  def is_alive(self):
+    return self.alive
+
+  def get_info(self, param, default = None):
+    return default
+
+  def get_accounting_stats(self, default = None):
+    return self.accounting if self.accounting else default
+
+  def get_effective_rate(self, default = None, burst = False):
+    return default
+
+  def get_server_descriptor(self, relay = None, default = None):
+    return default
+
+  def get_pid(self, default = None):
+    return default
+
+
+def bandwidth_stats():
+  stats = nyx.panel.graph.BandwidthStats()
+
+  for read, written in ((3000, 100), (4000, 200)):
+    stats.bandwidth_event(Mock(read = read, written = written))
+
+  return stats
+
+
+class TestExporter(unittest.TestCase):
+  def setUp(self):
+    self.controller = Controller()
+
+    tracker_patches = [
+      patch('nyx.exporter.tor_controller', return_value = self.controller),
+      patch('nyx.panel.graph.tor_controller', return_value = self.controller),
+      patch('nyx.tracker.get_resource_tracker'),
+      patch('nyx.tracker.get_connection_tracker'),
+    ]
+
+    for tracker_patch in tracker_patches:
+      tracker_patch.start()
+      self.addCleanup(tracker_patch.stop)
+
+    nyx.tracker.get_resource_tracker().get_value.return_value = nyx.tracker.Resources(0.25, 0.2, 320.5, 52428800, 0.012, 0.0)
+    nyx.tracker.get_connection_tracker().get_counts.return_value = nyx.tracker.ConnectionCounts(15, 40, 1)
+
+  def test_metrics(self):
+    self.assertEqual(EXPECTED_METRICS, nyx.exporter.metrics(bandwidth_stats()))
+
+  def test_metrics_when_disconnected(self):
+    self.controller.alive = False
+    self.controller.accounting = None
+
+    metrics = nyx.exporter.metrics()
+
+    self.assertTrue('nyx_tor_up 0\n' in metrics)
+    self.assertFalse('nyx_tor_read_bytes_total' in metrics)
+    self.assertFalse('nyx_tor_accounting_read_bytes' in metrics)
+
+  def test_serving_over_http(self):
+    server = nyx.exporter.serve(('127.0.0.1', 0), bandwidth_stats())
+    self._start(server)
+
+    url = 'http://127.0.0.1:%i' % server.server_address[1]
+    response = urllib.request.urlopen(url + '/metrics')
+
+    self.assertEqual(nyx.exporter.CONTENT_TYPE, response.headers['Content-Type'])
+    self.assertEqual(EXPECTED_METRICS, response.read().decode('utf-8'))
+
+    with self.assertRaises(urllib.error.HTTPError) as context:
+      urllib.request.urlopen(url + '/blarg')
+
+    self.assertEqual(404, context.exception.code)
+
+  def test_serving_over_unix_socket(self):
+    socket_path = os.path.join(tempfile.mkdtemp(), 'metrics')
+    server = nyx.exporter.serve(socket_path, bandwidth_stats())
+    self._start(server)
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(socket_path)
+    client.sendall(b'GET /metrics HTTP/1.0\r\n\r\n')
+
+    response = b''
+
+    while True:
+      data = client.recv(4096)
+
+      if not data:
+        break
+
+      response += data
+
+    client.close()
+
+    headers, body = response.decode('utf-8').split('\r\n\r\n', 1)
+    self.assertTrue(headers.startswith('HTTP/1.0 200 OK'))
+    self.assertEqual(EXPECTED_METRICS, body)
+
+    server.shutdown()
+    server.server_close()
+    self.assertFalse(os.path.exists(socket_path))
+
+  def test_replacing_a_stale_unix_socket(self):
+    socket_path = os.path.join(tempfile.mkdtemp(), 'metrics')
+
+    stale_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale_socket.bind(socket_path)
+    stale_socket.close()
+
+    server = nyx.exporter.serve(socket_path, bandwidth_stats())
+    self._start(server)
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(socket_path)
+    client.close()
+
+  def test_serving_over_a_file(self):
+    file_path = os.path.join(tempfile.mkdtemp(), 'metrics')
+
+    with open(file_path, 'w') as metrics_file:
+      metrics_file.write('important data')
+
+    self.assertRaises(IOError, nyx.exporter.serve, file_path, bandwidth_stats())
+
+    with open(file_path) as metrics_file:
+      self.assertEqual('important data', metrics_file.read())
+
+  @patch('sys.stdout', Mock())
+  @patch('nyx.exporter.serve')
+  def test_main_starts_trackers(self, serve_mock):
+    def serve(endpoint, bandwidth):
+      self.assertTrue(nyx.tracker.get_resource_tracker.called)
+      self.assertTrue(nyx.tracker.get_connection_tracker.called)
+      return Mock(server_address = endpoint)
+
+    nyx.tracker.get_resource_tracker.reset_mock()
+    nyx.tracker.get_connection_tracker.reset_mock()
+    serve_mock.side_effect = serve
+    self.controller.add_event_listener = Mock()
+
+    nyx.exporter.main(('127.0.0.1', 9052))
+    self.assertTrue(serve_mock.called)
+
+  def _start(self, server):
+    server_thread = threading.Thread(target = server.serve_forever)
+    server_thread.setDaemon(True)
+    server_thread.start()
+
+    def stop():
+      server.shutdown()
+      server.server_close()
+
+    self.addCleanup(stop)
@@ -4,5 +4,9 @@ Unit tests for nyx's log utilities.
 
 __all__ = [
   'deduplication',
+  'event_queue',
+  'log_archive',
+  'log_file_output',
+  'log_file_tailer',
   'read_tor_log',
 ]
@@ -0,0 +1,62 @@
+import threading
+import unittest
+
+from nyx.log import EventQueue
+
+
+class TestEventQueue(unittest.TestCase):
+  def test_processes_in_batches(self):
+    batches = []
+    event_queue = EventQueue(batches.append, max_batch_size = 4)
+    event_queue.start()
+
+    for i in range(10):
+      event_queue.put(i)
+
+    event_queue.stop()
+
+    self.assertEqual(list(range(10)), sum(batches, []))
+    self.assertTrue(all([len(batch) <= 4 for batch in batches]))
+
+    metrics = event_queue.metrics()
+    self.assertEqual(0, metrics.depth)
+    self.assertEqual(10, metrics.processed)
+    self.assertEqual(0, metrics.dropped)
+    self.assertEqual(max(map(len, batches)), metrics.largest_batch_size)
+
+  def test_drops_when_full(self):
+    processing = threading.Event()
+    unblock = threading.Event()
+
+    def processor(batch):
+      processing.set()
+      unblock.wait()
+
+    event_queue = EventQueue(processor, max_size = 3, max_batch_size = 1)
+    event_queue.start()
+    event_queue.put('first')
+    processing.wait()  # processor now holds 'first', leaving our queue empty
+
+    self.assertEqual([True, True, True, False, False], [event_queue.put(i) for i in range(5)])
+    self.assertEqual(3, event_queue.metrics().depth)
+    self.assertEqual(2, event_queue.metrics().dropped)
+
+    unblock.set()
+    event_queue.stop()
+
+    self.assertEqual(4, event_queue.metrics().processed)
+
+  def test_events_queued_before_starting(self):
+    batches = []
+    event_queue = EventQueue(batches.append)
+
+    for i in range(3):
+      event_queue.put(i)
+
+    self.assertEqual([], batches)
+    self.assertEqual(3, event_queue.metrics().depth)
+
+    event_queue.start()
+    event_queue.stop()
+
+    self.assertEqual([0, 1, 2], sum(batches, []))
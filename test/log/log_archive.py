@@ -0,0 +1,128 @@
+import unittest
+
+import nyx.log
+
+from nyx.log import LogArchive, LogEntry, LogGroup
+
+
+def entry(timestamp, event_type = 'NOTICE', message = None):
+  return LogEntry(timestamp, event_type, message if message else 'New control connection opened from 127.0.0.%i.' % (timestamp - 1333738400))
+
+
+class TestLogArchive(unittest.TestCase):
+  def setUp(self):
+    nyx.log.GROUP_BY_DAY = False
+
+  def tearDown(self):
+    nyx.log.GROUP_BY_DAY = True
+
+  def test_entries(self):
+    archive = LogArchive(100, block_size = 4)
+
+    for i in range(10):
+      archive.add(entry(1333738400 + i, 'INFO' if i % 2 else 'NOTICE'))
+
+    self.assertEqual(10, len(archive))
+    self.assertEqual(2, len(archive._blocks))
+    self.assertEqual(list(range(1333738409, 1333738399, -1)), [e.timestamp for e in archive.entries()])
+    self.assertEqual('New control connection opened from 127.0.0.9.', list(archive.entries())[0].message)
+
+    self.assertEqual(5, archive.count(['NOTICE']))
+    self.assertEqual([1333738408, 1333738406, 1333738404, 1333738402, 1333738400], [e.timestamp for e in archive.entries(['NOTICE'])])
+    self.assertEqual([1333738402, 1333738400], [e.timestamp for e in archive.entries(['NOTICE'], skip = 3)])
+
+  def test_entries_oldest_first(self):
+    archive = LogArchive(100, block_size = 4)
+
+    for i in range(10):
+      archive.add(entry(1333738400 + i, 'INFO' if i % 2 else 'NOTICE'))
+
+    self.assertEqual(list(range(1333738400, 1333738410)), [e.timestamp for e in archive.entries(oldest_first = True)])
+    self.assertEqual([1333738404, 1333738406, 1333738408], [e.timestamp for e in archive.entries(['NOTICE'], skip = 2, oldest_first = True)])
+
+  def test_entries_matching_a_pattern(self):
+    archive = LogArchive(100, block_size = 4)
+
+    for i in range(10):
+      archive.add(entry(1333738400 + i))
+
+    # counts of a pattern are cached for each block
+
+    self.assertEqual(3, archive.count(pattern = '0[.][159][.]$'))
+    self.assertEqual([0, 1], sorted(archive._count_cache[1].keys()))
+    self.assertEqual([1333738405, 1333738401], [e.timestamp for e in archive.entries(skip = 1, pattern = '0[.][159][.]$')])
+    self.assertEqual([1333738405, 1333738409], [e.timestamp for e in archive.entries(skip = 1, oldest_first = True, pattern = '0[.][159][.]$')])
+    self.assertEqual(0, archive.count(['INFO'], pattern = '0[.][159][.]$'))
+
+  def test_blocks_are_decompressed_lazily(self):
+    archive = LogArchive(100, block_size = 4)
+
+    for i in range(12):
+      archive.add(entry(1333738400 + i))
+
+    self.assertEqual([1333738403, 1333738402, 1333738401, 1333738400], [e.timestamp for e in archive.entries(skip = 8)])
+    self.assertEqual([0], list(archive._decompressed.keys()))
+
+  def test_max_size(self):
+    archive = LogArchive(6, block_size = 4)
+
+    for i in range(10):
+      archive.add(entry(1333738400 + i))
+
+    # our oldest block is dropped as a whole
+
+    self.assertEqual(6, len(archive))
+    self.assertEqual(list(range(1333738409, 1333738403, -1)), [e.timestamp for e in archive.entries()])
+
+  def test_search(self):
+    archive = LogArchive(100, block_size = 4)
+
+    for i in range(10):
+      archive.add(entry(1333738400 + i))
+
+    self.assertEqual([1333738409], [e.timestamp for e in archive.search('127.0.0.9')])
+    self.assertEqual([1333738401], [e.timestamp for e in archive.search('127.0.0.1')])
+    self.assertEqual([], archive.search('dragons'))
+
+  def test_log_group_archives_evicted_entries(self):
+    group = LogGroup(3, archive = LogArchive(100, block_size = 4))
+
+    for i in range(10):
+      group.add(entry(1333738400 + i))
+
+    self.assertEqual([1333738409, 1333738408, 1333738407], [e.timestamp for e in group])
+    self.assertEqual(list(range(1333738406, 1333738399, -1)), [e.timestamp for e in group.archive().entries()])
+    self.assertEqual([1333738401], [e.timestamp for e in group.search('127.0.0.1', include_archive = True)])
+    self.assertEqual([], group.search('127.0.0.1'))
+
+    # clones are unaffected by further evictions
+
+    clone = group.clone()
+    group.add(entry(1333738410))
+    self.assertEqual(7, len(clone.archive()))
+    self.assertEqual(8, len(group.archive()))
+
+  def test_log_group_archives_type_limited_entries_in_order(self):
+    # debug entries are evicted by their type limit before older notices
+
+    group = LogGroup(6, type_limits = {'DEBUG': 1}, archive = LogArchive(100, block_size = 2))
+
+    for i in range(10):
+      group.add(entry(1333738400 + i, 'NOTICE' if i < 2 or i == 6 else 'DEBUG'))
+
+    archive = group.archive()
+    self.assertEqual([1333738408, 1333738407, 1333738405, 1333738404, 1333738403, 1333738402], [e.timestamp for e in archive.entries()])
+    self.assertEqual(0, len(archive._blocks))  # our notices are still in the group so nothing can be compressed
+
+    for i in range(10, 16):
+      group.add(entry(1333738400 + i, 'NOTICE'))
+
+    timestamps = [e.timestamp for e in archive.entries()]
+    self.assertEqual(sorted(timestamps, reverse = True), timestamps)
+
+    for block in archive._blocks:
+      self.assertEqual([block.first_timestamp, block.last_timestamp], [min(e.timestamp for e in archive._block_entries(block)), max(e.timestamp for e in archive._block_entries(block))])
+
+    self.assertEqual(sorted([block.first_timestamp for block in archive._blocks]), [block.first_timestamp for block in archive._blocks])
+    self.assertEqual(10, len(archive))
+    self.assertEqual(5, len(archive._blocks))
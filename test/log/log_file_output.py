@@ -0,0 +1,71 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from nyx.log import LogFileOutput
+
+try:
+  # added in python 3.3
+  from unittest.mock import patch
+except ImportError:
+  from mock import patch
+
+
+class TestLogFileOutput(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.path = os.path.join(self.tmp_dir, 'nyx.log')
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+  def test_written_when_closed(self):
+    log_file = LogFileOutput(self.path, flush_rate = 60)
+
+    for i in range(100):
+      log_file.write('message %i' % i)
+
+    log_file.close()
+
+    with open(self.path) as written_file:
+      self.assertEqual(['message %i' % i for i in range(100)], written_file.read().splitlines())
+
+    log_file.write('ignored since we have been closed')
+    self.assertEqual(0, log_file.dropped())
+
+  def test_without_path(self):
+    log_file = LogFileOutput(None)
+    log_file.write('nowhere to go')
+    log_file.close()
+
+    self.assertEqual([], os.listdir(self.tmp_dir))
+
+  @patch('nyx.log.LogFileOutput._write_loop')
+  def test_drops_when_full(self, write_loop_mock):
+    log_file = LogFileOutput(self.path, queue_size = 5)  # writer that never drains
+
+    for i in range(8):
+      log_file.write('message %i' % i)
+
+    self.assertEqual(3, log_file.dropped())
+
+  def test_rotation(self):
+    log_file = LogFileOutput(self.path, flush_rate = 0, max_size = 20)
+    log_file.write('a message that is long enough to rotate')
+    log_file.close()
+
+    self.assertEqual(['nyx.log', 'nyx.log.1'], sorted(os.listdir(self.tmp_dir)))
+    self.assertEqual('', open(self.path).read())
+    self.assertEqual('a message that is long enough to rotate\n', open(self.path + '.1').read())
+
+  def test_rotation_with_compression(self):
+    log_file = LogFileOutput(self.path, flush_rate = 0, max_size = 20, compress_rotated = True)
+    log_file.write('a message that is long enough to rotate')
+    log_file.close()
+
+    self.assertEqual(['nyx.log', 'nyx.log.1.gz'], sorted(os.listdir(self.tmp_dir)))
+
+    with gzip.open(self.path + '.1.gz') as rotated_file:
+      self.assertEqual(b'a message that is long enough to rotate\n', rotated_file.read())
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from nyx.log import LogFileTailer, read_tor_log
+
+
+def wait_for(condition, timeout = 5):
+  start_time = time.time()
+
+  while not condition() and time.time() - start_time < timeout:
+    time.sleep(0.01)
+
+
+class TestLogFileTailer(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.path = os.path.join(self.tmp_dir, 'tor.log')
+    self.entries = []
+
+    with open(self.path, 'w') as log_file:
+      log_file.write('Apr 06 11:03:39.000 [notice] Tor 0.2.7.0-alpha-dev opening new log file.\n')
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+  def append(self, content, path = None):
+    with open(path if path else self.path, 'a') as log_file:
+      log_file.write(content)
+
+  def test_follows_new_content(self):
+    tailer = LogFileTailer(self.path, self.entries.append, poll_rate = 0.01)
+    tailer.start()
+
+    try:
+      self.append('Apr 06 11:03:53.000 [notice] Bootstrapped 5%: Connecting to directory server\n')
+      self.append('Apr 06 11:03:54.000 [info] Parsing GEOIP IPv4 file /usr/share/tor/geoip.\n')
+      self.append('Apr 06 11:03:55.000 [debug] circuit_n_chan_done(): chan to')  # partially written line
+      wait_for(lambda: len(self.entries) == 2)
+
+      # prior content isn't provided, and lines are only parsed when complete
+
+      self.assertEqual(['NOTICE', 'INFO'], [entry.type for entry in self.entries])
+      self.assertEqual('Bootstrapped 5%: Connecting to directory server', self.entries[0].message)
+
+      self.append(' 127.0.0.1:9001\nmalformed line\n')
+      wait_for(lambda: len(self.entries) == 3)
+      self.assertEqual('circuit_n_chan_done(): chan to 127.0.0.1:9001', self.entries[2].message)
+    finally:
+      tailer.stop()
+
+  def test_follows_from_offset(self):
+    offset = os.path.getsize(self.path)
+    self.append('Apr 06 11:03:53.000 [notice] Bootstrapped 5%: Connecting to directory server\n')
+
+    tailer = LogFileTailer(self.path, self.entries.append, poll_rate = 0.01, offset = offset)
+    tailer.start()
+
+    try:
+      self.append('Apr 06 11:03:54.000 [notice] Bootstrapped 10%: Finishing handshake with directory server\n')
+      wait_for(lambda: len(self.entries) == 2)
+
+      # content prior to our offset is left for our log panel to read
+
+      prior_entries = list(read_tor_log(self.path, end = offset))
+
+      self.assertEqual(['Tor 0.2.7.0-alpha-dev opening new log file.'], [entry.message for entry in prior_entries])
+      self.assertEqual(['Bootstrapped 5%: Connecting to directory server', 'Bootstrapped 10%: Finishing handshake with directory server'], [entry.message for entry in self.entries])
+    finally:
+      tailer.stop()
+
+  def test_survives_rotation(self):
+    tailer = LogFileTailer(self.path, self.entries.append, poll_rate = 0.01)
+    tailer.start()
+
+    try:
+      self.append('Apr 06 11:03:53.000 [notice] Bootstrapped 5%: Connecting to directory server\n')
+      wait_for(lambda: len(self.entries) == 1)
+
+      # log is moved aside, and a new one started
+
+      self.append('Apr 06 11:03:54.000 [notice] Bootstrapped 10%: Finishing handshake with directory server\n')
+      os.rename(self.path, self.path + '.1')
+      self.append('Apr 06 11:03:55.000 [notice] Tor 0.2.7.0-alpha-dev opening new log file.\n')
+
+      wait_for(lambda: len(self.entries) == 3)
+      self.assertEqual(['Bootstrapped 5%: Connecting to directory server', 'Bootstrapped 10%: Finishing handshake with directory server', 'Tor 0.2.7.0-alpha-dev opening new log file.'], [entry.message for entry in self.entries])
+
+      # log is truncated
+
+      with open(self.path, 'w') as log_file:
+        log_file.write('Apr 06 11:03:56.000 [warn] Truncated.\n')
+
+      wait_for(lambda: len(self.entries) == 4)
+      self.assertEqual('Truncated.', self.entries[3].message)
+    finally:
+      tailer.stop()
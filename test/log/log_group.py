@@ -94,6 +94,143 @@ class TestLogGroup(unittest.TestCase):
     self.assertEqual(None, group_items[0].duplicates)
     self.assertEqual(bootstrap_messages, [e.message for e in group_items[1].duplicates])
     self.assertEqual([False, False, True, True, False], [e.is_duplicate for e in group_items])
+    self.assertEqual(5, group.count())
+    self.assertEqual(3, group.count(include_duplicates = False))
+    self.assertEqual(1, group.count(['NOTICE'], include_duplicates = False))
+
+  def test_add_older(self):
+    group = LogGroup(4)
+    group.add(LogEntry(1333738450, 'NOTICE', 'Bootstrapped 80%: Loading relay descriptors.'))
+
+    self.assertTrue(group.add_older(LogEntry(1333738440, 'INFO', 'tor_lockfile_lock(): Locking "/home/atagar/.tor/lock"')))
+    self.assertTrue(group.add_older(LogEntry(1333738430, 'NOTICE', 'Bootstrapped 75%: Loading relay descriptors.')))
+
+    # newer entries still go in front of the older content
+
+    group.add(LogEntry(1333738460, 'NOTICE', 'Bootstrapped 90%: Loading relay descriptors.'))
+    self.assertEqual([1333738460, 1333738450, 1333738440, 1333738430], [e.timestamp for e in group])
+
+    group_items = list(group)
+    self.assertEqual([False, True, False, True], [e.is_duplicate for e in group_items])
+    self.assertEqual(['Bootstrapped 90%: Loading relay descriptors.', 'Bootstrapped 80%: Loading relay descriptors.', 'Bootstrapped 75%: Loading relay descriptors.'], [e.message for e in group_items[0].duplicates])
+
+    # older entries are dropped rather than displacing newer ones when full
+
+    self.assertFalse(group.add_older(LogEntry(1333738420, 'NOTICE', 'Bootstrapped 72%: Loading relay descriptors.')))
+    self.assertEqual([1333738460, 1333738450, 1333738440, 1333738430], [e.timestamp for e in group])
+
+  def test_duplicate_group_is_bounded(self):
+    group = LogGroup(100)
+
+    for i in range(50):
+      group.add(LogEntry(1333738400 + i, 'NOTICE', 'New control connection opened from 127.0.0.1.'))
+
+    duplicates = list(group)[0].duplicates
+    self.assertEqual(50, len(duplicates))
+    self.assertEqual(nyx.log.DUPLICATE_SAMPLE_SIZE, len(list(duplicates)))
+    self.assertEqual(1333738400, duplicates.first_timestamp())
+    self.assertEqual(1333738449, duplicates.last_timestamp())
+
+    # dropping our oldest entries shrinks the group
+
+    group = LogGroup(20)
+
+    for i in range(50):
+      group.add(LogEntry(1333738400 + i, 'NOTICE', 'New control connection opened from 127.0.0.1.'))
+
+    duplicates = list(group)[0].duplicates
+    self.assertEqual(20, len(duplicates))
+    self.assertEqual(1333738430, duplicates.first_timestamp())
+    self.assertEqual(1333738449, duplicates.last_timestamp())
+
+    # clones are unaffected by further additions
+
+    clone = group.clone()
+    group.add(LogEntry(1333738450, 'NOTICE', 'New control connection opened from 127.0.0.1.'))
+    self.assertEqual(20, len(list(clone)[0].duplicates))
+    self.assertEqual(1333738449, list(clone)[0].duplicates.last_timestamp())
+
+  def test_search(self):
+    group = LogGroup(3)
+    group.add(LogEntry(1333738410, 'NOTICE', 'Opening Socks listener on 127.0.0.1:9050'))
+    group.add(LogEntry(1333738420, 'NOTICE', 'New control connection opened from 127.0.0.1.'))
+    group.add(LogEntry(1333738430, 'NOTICE', 'Opening OR listener on 0.0.0.0:7000'))
+
+    self.assertEqual([1333738420, 1333738410], [e.timestamp for e in group.search('127.0.0.1')])
+    self.assertEqual([1333738430, 1333738410], [e.timestamp for e in group.search('LISTENER')])
+    self.assertEqual([1333738430], [e.timestamp for e in group.search('opening 0.0.0.0')])
+    self.assertEqual([], group.search('opening control'))
+    self.assertEqual([], group.search('dragons'))
+    self.assertEqual([], group.search(''))
+
+    # entries are removed from the index when they're evicted
+
+    group.add(LogEntry(1333738440, 'NOTICE', 'Bootstrapped 100%: Done'))
+    self.assertEqual([1333738420], [e.timestamp for e in group.search('127.0.0.1')])
+
+    group = LogGroup(5)
+    group.add(LogEntry(1333738420, 'NOTICE', 'New control connection opened from 127.0.0.1.'))
+    group.add_older(LogEntry(1333738410, 'NOTICE', 'Opening Socks listener on 127.0.0.1:9050'))
+    self.assertEqual([1333738420, 1333738410], [e.timestamp for e in group.search('127.0.0.1')])
+    self.assertEqual([1333738420, 1333738410], [e.timestamp for e in group.clone().search('127.0.0.1')])
+
+  def test_entries_by_type(self):
+    group = LogGroup(10, {'INFO': 2})
+    group.add(LogEntry(1333738410, 'NOTICE', 'Bootstrapped 72%: Loading relay descriptors.'))
+    group.add(LogEntry(1333738420, 'INFO', 'tor_lockfile_lock(): Locking "/home/atagar/.tor/lock"'))
+    group.add(LogEntry(1333738430, 'WARN', 'Your Guard is failing an extremely large amount of circuits.'))
+    group.add(LogEntry(1333738440, 'INFO', 'Parsing GEOIP IPv4 file /usr/share/tor/geoip.'))
+    group.add(LogEntry(1333738450, 'NOTICE', 'Bootstrapped 75%: Loading relay descriptors.'))
+
+    self.assertEqual([1333738450, 1333738440, 1333738430, 1333738420, 1333738410], [e.timestamp for e in group])
+    self.assertEqual([1333738450, 1333738430, 1333738410], [e.timestamp for e in group.entries(['NOTICE', 'WARN'])])
+    self.assertEqual([1333738440, 1333738420], [e.timestamp for e in group.entries(['INFO', 'DEBUG'])])
+    self.assertEqual([1333738410, 1333738430, 1333738450], [e.timestamp for e in group.entries(['NOTICE', 'WARN'], oldest_first = True)])
+    self.assertEqual([], list(group.entries([])))
+
+    # our INFO limit evicts those entries without affecting other types
+
+    group.add(LogEntry(1333738460, 'INFO', 'Parsing GEOIP IPv6 file /usr/share/tor/geoip6.'))
+    self.assertEqual([1333738460, 1333738440], [e.timestamp for e in group.entries(['INFO'])])
+    self.assertEqual([1333738450, 1333738430, 1333738410], [e.timestamp for e in group.entries(['NOTICE', 'WARN'])])
+    self.assertEqual(5, len(group))
+    self.assertFalse(group.add_older(LogEntry(1333738400, 'INFO', 'Tor 0.2.9.1 opening log file.')))
+
+    # our overall limit evicts the oldest entry regardless of its type
+
+    group = LogGroup(3)
+    group.add(LogEntry(1333738410, 'NOTICE', 'Bootstrapped 72%: Loading relay descriptors.'))
+    group.add(LogEntry(1333738420, 'INFO', 'tor_lockfile_lock(): Locking "/home/atagar/.tor/lock"'))
+    group.add(LogEntry(1333738430, 'WARN', 'Your Guard is failing an extremely large amount of circuits.'))
+    group.add(LogEntry(1333738440, 'INFO', 'Parsing GEOIP IPv4 file /usr/share/tor/geoip.'))
+
+    self.assertEqual([1333738440, 1333738430, 1333738420], [e.timestamp for e in group])
+    self.assertEqual(1333738420, group.pop().timestamp)
+    self.assertEqual([1333738440, 1333738430], [e.timestamp for e in group])
+
+  def test_memory_budget(self):
+    small_entry = LogEntry(1333738410, 'NOTICE', 'Bootstrapped 72%: Loading relay descriptors.')
+    large_entry = LogEntry(1333738420, 'DEBUG', 'circuit_n_chan_done(): chan to 127.0.0.1:9001, ' * 200)
+
+    group = LogGroup(100, max_memory = 3 * small_entry.memory_usage())
+    group.add(small_entry)
+    self.assertEqual(small_entry.memory_usage(), group.memory_usage())
+
+    group.add(LogEntry(1333738411, 'NOTICE', 'Bootstrapped 75%: Loading relay descriptors.'))
+    group.add(LogEntry(1333738412, 'NOTICE', 'Bootstrapped 78%: Loading relay descriptors.'))
+    group.add(LogEntry(1333738413, 'NOTICE', 'Bootstrapped 80%: Loading relay descriptors.'))
+    self.assertEqual([1333738413, 1333738412, 1333738411], [e.timestamp for e in group])
+    self.assertTrue(group.memory_usage() <= 3 * small_entry.memory_usage())
+
+    # a single large entry pushes out everything else, but is itself retained
+
+    group.add(large_entry)
+    self.assertEqual([1333738420], [e.timestamp for e in group])
+    self.assertEqual(large_entry.memory_usage(), group.memory_usage())
+
+    # older entries are dropped rather than exceeding our budget
+
+    self.assertFalse(group.add_older(LogEntry(1333738400, 'NOTICE', 'Bootstrapped 70%: Loading relay descriptors.')))
 
   def test_deduplication_with_daybreaks(self):
     nyx.log.GROUP_BY_DAY = True
@@ -30,6 +30,15 @@ class TestReadTorLog(unittest.TestCase):
     self.assertEqual('Interrupt: exiting cleanly.', entries[0].message)
     self.assertEqual('Bootstrapped 90%: Establishing a Tor circuit', entries[-1].message)
 
+  def test_with_end(self):
+    last_line = b'Apr 06 11:53:46.000 [notice] Interrupt: exiting cleanly.\n'
+    entries = list(read_tor_log(data_path('tor_log'), end = os.path.getsize(data_path('tor_log')) - len(last_line)))
+    self.assertEqual(20, len(entries))
+    self.assertEqual('New control connection opened from 127.0.0.1.', entries[0].message)
+    self.assertEqual('Tor 0.2.7.0-alpha-dev (git-4247ce99e5d9b7b2) opening new log file.', entries[-1].message)
+
+    self.assertEqual([], list(read_tor_log(data_path('tor_log'), end = 0)))
+
   def test_with_empty_file(self):
     entries = list(read_tor_log(data_path('empty_file')))
     self.assertEqual(0, len(entries))
@@ -2,7 +2,10 @@
 Unit tests for nyx.panel.connection.
 """
 
+import collections
 import datetime
+import threading
+import time
 import unittest
 
 import stem.exit_policy
@@ -121,6 +124,21 @@ def line(entry = MockEntry(), line_type = LineType.CONNECTION, connection = CONN
 
 
 class TestConnectionPanel(unittest.TestCase):
+  def test_rolling_rate(self):
+    rate = nyx.panel.connection.RollingRate()
+    self.assertEqual(0.0, rate.rate(TIMESTAMP))
+
+    for i in range(100):
+      rate.add(5000, TIMESTAMP + i)
+
+    self.assertAlmostEqual(5000, rate.rate(TIMESTAMP + 99), delta = 1)
+    self.assertAlmostEqual(5000, rate.rate(TIMESTAMP + 100), delta = 1)  # still within the second
+    self.assertTrue(rate.rate(TIMESTAMP + 130) < 500)  # decays once idle
+
+    burst = nyx.panel.connection.RollingRate()
+    burst.add(50000, TIMESTAMP)
+    self.assertTrue(burst.rate(TIMESTAMP) < 5000)  # a single spike is averaged
+
   @require_curses
   def test_draw_title(self):
     rendered = test.render(nyx.panel.connection._draw_title, [], True)
@@ -277,6 +295,121 @@ class TestConnectionPanel(unittest.TestCase):
       rendered = test.render(nyx.panel.connection._draw_line_details, 0, 0, test_line, 80, ())
       self.assertEqual(expected, rendered.content)
 
+  @require_curses
+  @patch('nyx.panel.connection.tor_controller')
+  @patch('nyx.panel.connection.BANDWIDTH_RATES', collections.defaultdict(dict))
+  def test_draw_line_details_with_bandwidth(self, tor_controller_mock):
+    rate = nyx.panel.connection.RollingRate()
+
+    for i in range(100):
+      rate.add(2100, time.time() - 100 + i)
+
+    nyx.panel.connection.BANDWIDTH_RATES[tor_controller_mock()][('75.119.206.243', 22)] = rate
+
+    rendered = test.render(nyx.panel.connection._draw_line_details, 0, 0, line(), 80, ())
+    self.assertEqual('1F43EE37A0670301AD9CB555D94AFEC2C89FDE86  Unnamed  2.0 KB/s', rendered.content)
+
+    # rates of another tor instance aren't shown
+
+    tor_controller_mock.return_value = Mock()
+    rendered = test.render(nyx.panel.connection._draw_line_details, 0, 0, line(), 80, ())
+    self.assertEqual('1F43EE37A0670301AD9CB555D94AFEC2C89FDE86  Unnamed', rendered.content)
+
+  @require_curses
+  @patch('nyx.panel.connection.tor_controller')
+  @patch('nyx.panel.connection.CIRCUIT_RATES', collections.defaultdict(dict))
+  def test_draw_circuit_header_with_bandwidth(self, tor_controller_mock):
+    panel = nyx.panel.connection.ConnectionPanel.__new__(nyx.panel.connection.ConnectionPanel)
+    panel._controller = tor_controller_mock()
+    panel._top_talkers = nyx.panel.connection.TopTalkers(5)
+    start = time.time() - 100
+
+    for i in range(100):
+      with patch('time.time', Mock(return_value = start + i)):
+        panel._update_circ_bandwidth(Mock(id = 7, read = 1500, written = 600))
+
+    rendered = test.render(nyx.panel.connection._draw_line_details, 0, 0, line(line_type = LineType.CIRCUIT_HEADER), 80, ())
+    self.assertEqual('Purpose: General, Circuit ID: 7, Bandwidth: 2.0 KB/s', rendered.content)
+
+    panel._update_circ(Mock(id = 7, status = 'CLOSED'))
+    self.assertEqual({}, nyx.panel.connection.CIRCUIT_RATES[tor_controller_mock()])
+
+  @patch('nyx.panel.connection.tor_controller')
+  @patch('nyx.panel.connection.BANDWIDTH_RATES', collections.defaultdict(dict))
+  def test_sort_by_bandwidth(self, tor_controller_mock):
+    entries = []
+
+    for i in range(5):
+      conn = Connection(TIMESTAMP, False, '127.0.0.1', 3531, '75.119.206.%i' % i, 22, 'tcp', False)
+      entries.append(MockEntry([line(connection = conn)]))
+
+      if i % 2:
+        rate = nyx.panel.connection.BANDWIDTH_RATES[tor_controller_mock()][(conn.remote_address, 22)] = nyx.panel.connection.RollingRate()
+        rate.add(i * 1000)
+
+    ranked = sorted(entries, key = lambda entry: entry.sort_value(nyx.panel.connection.SortAttr.BANDWIDTH))
+    self.assertEqual([entries[3], entries[1]], ranked[:2])
+
+  def test_top_talkers(self):
+    talkers = nyx.panel.connection.TopTalkers(3)
+    rates = {}
+
+    for i in range(5):
+      rates[i] = nyx.panel.connection.RollingRate()
+      rates[i].add(i * 1000)
+      talkers.update(i, rates[i])
+
+    self.assertEqual([2, 3, 4], sorted(talkers.keys()))
+
+    # connections get busier or close
+
+    rates[0].add(10000)
+    talkers.update(0, rates[0])
+    self.assertEqual([0, 3, 4], sorted(talkers.keys()))
+
+    talkers.remove(4)
+    self.assertEqual([0, 3], sorted(talkers.keys()))
+
+    rates[1].add(500)
+    talkers.update(1, rates[1])
+    self.assertEqual([0, 1, 3], sorted(talkers.keys()))
+
+  @patch('nyx.panel.connection.tor_controller')
+  @patch('nyx.panel.connection.nyx_interface', Mock(return_value = Mock(is_paused = Mock(return_value = False))))
+  @patch('nyx.panel.connection.BANDWIDTH_RATES', collections.defaultdict(dict))
+  def test_rank_talkers(self, tor_controller_mock):
+    panel = nyx.panel.connection.ConnectionPanel.__new__(nyx.panel.connection.ConnectionPanel)
+    panel._controller = tor_controller_mock()
+    panel._sort_order = [nyx.panel.connection.SortAttr.BANDWIDTH, nyx.panel.connection.SortAttr.IP_ADDRESS]
+    panel._entries_lock = threading.RLock()
+    panel._top_talkers = nyx.panel.connection.TopTalkers(2)
+    panel._talker_entries = {}
+    panel._entries = []
+    panel._orconn_endpoints = {}
+    panel.redraw = Mock()
+
+    for i in range(5):
+      conn = Connection(TIMESTAMP, False, '127.0.0.1', 3531, '75.119.206.%i' % i, 22, 'tcp', False)
+      entry = MockEntry([line(connection = conn)])
+      panel._entries.append(entry)
+      panel._talker_entries[(conn.remote_address, 22)] = [entry]
+      panel._orconn_endpoints[str(i)] = (conn.remote_address, 22)
+
+    entries = list(panel._entries)
+
+    for i in range(5):
+      panel._update_conn_bandwidth(Mock(id = str(i), read = i * 1000, written = 0))
+
+    panel._rank_talkers(Mock())
+    self.assertEqual([entries[4], entries[3], entries[0], entries[1], entries[2]], panel._entries)
+    self.assertTrue(panel.redraw.called)
+
+    # nothing changes if our busiest are still on top
+
+    panel.redraw.reset_mock()
+    panel._rank_talkers(Mock())
+    self.assertFalse(panel.redraw.called)
+
   @require_curses
   def test_draw_right_column(self):
     rendered = test.render(nyx.panel.connection._draw_right_column, 0, 0, line(), TIMESTAMP + 62, ())
@@ -3,11 +3,13 @@ Unit tests for nyx.panel.graph.
 """
 
 import datetime
+import random
 import unittest
 
 import stem.control
 
 import nyx.curses
+import nyx.log
 import nyx.panel.graph
 import test
 
@@ -15,9 +17,11 @@ from test import require_curses
 
 try:
   # added in python 3.3
-  from unittest.mock import patch
+  from unittest.mock import Mock, patch
 except ImportError:
-  from mock import patch
+  from mock import Mock, patch
+
+CONTROLLER = Mock(get_info = Mock(return_value = '9695DFC35FFEB861329B9F1AB04C46397020CE31'))
 
 EXPECTED_BLANK_GRAPH = """
 Download:
@@ -96,6 +100,171 @@ class TestGraphPanel(unittest.TestCase):
 
     self.assertEqual({2: '0', 11: '0'}, nyx.panel.graph._y_axis_labels(12, data.primary, 0, 0))
 
+  def test_sliding_extrema(self):
+    values = [random.randint(0, 100) for i in range(500)]
+
+    for size in (1, 5, 50):
+      extrema = nyx.panel.graph.SlidingExtrema(size)
+
+      for i, value in enumerate(values):
+        extrema.add(value)
+        window = values[max(0, i - size + 1):i + 1]
+
+        self.assertEqual(max(window), extrema.max())
+        self.assertEqual(min(window), extrema.min())
+
+  def test_bounds(self):
+    data = nyx.panel.graph.GraphData()
+    interval = nyx.panel.graph.Interval.EACH_SECOND
+
+    for i in range(500):
+      data.update(random.randint(1, 100))
+
+      if i % 50 == 0:
+        values = data.values[interval][:20]
+
+        self.assertEqual((0, max(values)), data.bounds(nyx.panel.graph.Bounds.LOCAL_MAX, interval, 20))
+        self.assertEqual((min(values), max(values)), data.bounds(nyx.panel.graph.Bounds.TIGHT, interval, 20))
+
+    # changing the number of columns rebuilds our extrema
+
+    values = data.values[interval][:35]
+    self.assertEqual((min(values), max(values)), data.bounds(nyx.panel.graph.Bounds.TIGHT, interval, 35))
+
+  def test_log_histogram(self):
+    histogram = nyx.panel.graph.LogHistogram()
+    self.assertEqual(0, histogram.percentile(50))
+
+    values = [random.randint(0, 100000) for i in range(5000)]
+
+    for value in values:
+      histogram.add(value)
+
+    values.sort()
+
+    for percent in (1, 50, 95, 99, 100):
+      actual = values[int(len(values) * percent / 100.0) - 1]
+      self.assertAlmostEqual(actual, histogram.percentile(percent), delta = actual * 0.02 + 1)
+
+  def test_percentiles_in_header(self):
+    stats = nyx.panel.graph.ResourceStats(controller = Mock(get_pid = Mock(return_value = 12345)))
+
+    for i in range(100):
+      resources = nyx.tracker.Resources(i / 100.0, 0.0, 0.0, 1024 * 1024, 0.0, 0.0)
+
+      with patch('nyx.tracker.get_resource_tracker') as tracker_mock:
+        tracker_mock().get_value.return_value = resources
+        stats.bandwidth_event(None)
+        tracker_mock().get_value.assert_called_with(12345)
+
+    self.assertEqual(None, stats.primary.percentile(50, nyx.panel.graph.Interval.DAILY))
+    self.assertEqual('CPU (99.0%, avg: 49.5%, p50: 49.0%, p95: 94.1%, p99: 97.9%):', stats.primary.header(80))
+    self.assertEqual('CPU (99.0%, avg: 49.5%):', stats.primary.header(30))
+    self.assertEqual('CPU (99.0%, avg: 49.5%):', stats.primary.header(80, nyx.panel.graph.Interval.DAILY))
+
+  @patch('nyx.tracker.get_connection_tracker')
+  @patch('nyx.tracker.get_resource_tracker')
+  def test_stats_of_another_tor_instance(self, resource_tracker_mock, connection_tracker_mock):
+    # graphs of a tor instance that isn't being shown use its own process
+
+    controller = Mock(get_pid = Mock(return_value = 23456))
+    connection_tracker_mock().get_counts.return_value = nyx.tracker.ConnectionCounts(4, 7, 1)
+    resource_tracker_mock().get_value.return_value = nyx.tracker.Resources(0.25, 0.0, 0.0, 2048, 0.0, 0.0)
+
+    connection_stats = nyx.panel.graph.ConnectionStats(controller = controller)
+    resource_stats = nyx.panel.graph.ResourceStats(controller = controller)
+
+    connection_stats.bandwidth_event(None)
+    resource_stats.bandwidth_event(None)
+
+    connection_tracker_mock().get_counts.assert_called_with(23456)
+    resource_tracker_mock().get_value.assert_called_with(23456)
+
+    self.assertEqual((4, 7), (connection_stats.primary.latest_value, connection_stats.secondary.latest_value))
+    self.assertEqual((25, 2048), (resource_stats.primary.latest_value, resource_stats.secondary.latest_value))
+    self.assertEqual(controller, type(connection_stats)(connection_stats)._controller)
+
+    # without a pid we lack its usage, rather than showing another instance's
+
+    controller.get_pid.return_value = None
+    connection_stats.bandwidth_event(None)
+    self.assertEqual(0, connection_stats.primary.latest_value)
+
+  def test_load_history(self):
+    data = nyx.panel.graph.GraphData()
+    interval = nyx.panel.graph.Interval.MINUTELY
+
+    for i in range(120):
+      data.update(5)  # two minutes of samplings from this run
+
+    # persisted samplings land in the column for their age, leaving gaps for
+    # when we weren't running, and don't displace this run's columns
+
+    data.load_history(interval, [(10000 - 60, 1), (10000 - 200, 4), (10000 - 300, 2), (10000 - 90000, 3)], now = 10000)
+    self.assertEqual([5, 5, 0, 4, 0, 2, 0, 0, 0], data.values[interval][:9])
+    self.assertEqual(5, data.bounds(nyx.panel.graph.Bounds.GLOBAL_MAX, interval, 10)[1])
+
+  @patch('time.time')
+  @patch('nyx.data_directory', Mock(return_value = None))
+  @patch('nyx.log.EVENT_COUNTS', {CONTROLLER: {}})
+  def test_save_history(self, time_mock):
+    nyx.CACHE = None
+    interval = nyx.panel.graph.Interval.MINUTELY
+    time_mock.return_value = 10000
+
+    stats = nyx.panel.graph.EventRateStats(controller = CONTROLLER)
+    stats.load_history()
+
+    for i in range(180):
+      time_mock.return_value += 1
+      nyx.log.EVENT_COUNTS[CONTROLLER]['NOTICE'] = nyx.log.EVENT_COUNTS[CONTROLLER].get('NOTICE', 0) + 2
+      stats.bandwidth_event(None)
+
+    stats.save_history()
+    self.assertEqual([], stats.primary.history())
+
+    time_mock.return_value += 30
+    reloaded = nyx.panel.graph.EventRateStats(controller = CONTROLLER)
+    reloaded.load_history()
+    self.assertEqual([2, 2, 2, 0], reloaded.primary.values[interval][:4])
+    self.assertEqual([0, 0, 0, 0], reloaded.secondary.values[interval][:4])
+
+    # another tor instance, such as a relay watched by another nyx process,
+    # has its own history
+
+    other_controller = Mock(get_info = Mock(return_value = None))
+    other_controller.get_socket.return_value = Mock(spec = ['get_address', 'get_port'], get_address = Mock(return_value = '127.0.0.1'), get_port = Mock(return_value = 9052))
+
+    other = nyx.panel.graph.EventRateStats(controller = other_controller)
+    other.load_history()
+    self.assertEqual([0, 0, 0, 0], other.primary.values[interval][:4])
+
+    other.save_history()
+    self.assertEqual([(10180.0, 2.0), (10120.0, 2.0), (10060.0, 2.0)], nyx.cache().graph_history('9695DFC35FFEB861329B9F1AB04C46397020CE31', 'events', True, interval))
+
+    nyx.CACHE = None
+
+  @patch('nyx.log.EVENT_COUNTS', {CONTROLLER: {'NOTICE': 10, 'INFO': 50}})
+  def test_event_rate_stats(self):
+    stats = nyx.panel.graph.EventRateStats(controller = CONTROLLER)
+    other_stats = nyx.panel.graph.EventRateStats(controller = Mock())
+
+    nyx.log.EVENT_COUNTS[CONTROLLER].update({'NOTICE': 13, 'WARN': 1, 'INFO': 70, 'DEBUG': 200})
+    stats.bandwidth_event(None)
+    other_stats.bandwidth_event(None)
+
+    self.assertEqual((0, 0), (other_stats.primary.latest_value, other_stats.secondary.latest_value))  # events of another tor instance
+
+    self.assertEqual(4, stats.primary.latest_value)
+    self.assertEqual(220, stats.secondary.latest_value)
+    self.assertEqual('Notice-Err (4/sec (warn: 1, err: 0), avg: 4.0/sec):', stats.primary.header(80))
+
+    stats.bandwidth_event(None)  # nothing new this second
+
+    self.assertEqual(0, stats.primary.latest_value)
+    self.assertEqual(0, stats.secondary.latest_value)
+    self.assertEqual('Debug-Info (0/sec (info: 0), avg: 110.0/sec):', stats.secondary.header(80))
+
   @require_curses
   @patch('nyx.panel.graph.tor_controller')
   def test_draw_subgraph_blank(self, tor_controller_mock):
@@ -114,6 +283,43 @@ class TestGraphPanel(unittest.TestCase):
     rendered = test.render(nyx.panel.graph._draw_subgraph, data.primary, 0, 30, 7, nyx.panel.graph.Bounds.LOCAL_MAX, nyx.panel.graph.Interval.EACH_SECOND, nyx.curses.Color.CYAN, '*')
     self.assertEqual(EXPECTED_GRAPH, rendered.content)
 
+  @require_curses
+  @patch('nyx.panel.graph.tor_controller')
+  def test_draw_subgraph_changes(self, tor_controller_mock):
+    tor_controller_mock().get_info.return_value = '5430,5430 4210,4210 5510,5510 7100,7100 2000,2000 1750,1750 1880,1880 2500,2500 3770,3770'
+    data = nyx.panel.graph.BandwidthStats()
+    args = (data.primary, 0, 30, 7, nyx.panel.graph.Bounds.LOCAL_MAX, nyx.panel.graph.Interval.EACH_SECOND, nyx.curses.Color.CYAN, '*')
+
+    def draw_changes():
+      frames = []
+      nyx.curses.draw(lambda subwindow: frames.append(nyx.panel.graph._draw_subgraph(subwindow, *args)))
+
+      for value in (3000, 6000, 9000, 0):
+        data.primary.update(value)
+        nyx.curses.draw(lambda subwindow: frames.append(nyx.panel.graph._draw_subgraph(subwindow, *args, previous = frames[-1])), erase = False)
+
+    # redrawing changes should render the same as drawing everything, even
+    # when our bounds change
+
+    redrawn = test.render(draw_changes).content
+    self.assertEqual(test.render(nyx.panel.graph._draw_subgraph, *args).content, redrawn)
+
+    # only changed columns are redrawn
+
+    subwindow = Mock(width = 80, height = 10)
+    frame = nyx.panel.graph._draw_subgraph(subwindow, *args)
+    subwindow.reset_mock()
+
+    nyx.panel.graph._draw_subgraph(subwindow, *args, previous = frame)
+    self.assertEqual(0, subwindow.vline.call_count)
+    self.assertEqual(0, subwindow.addstr.call_count)
+
+    data.primary.update(data.primary.latest_value)
+    new_frame = nyx.panel.graph._draw_subgraph(subwindow, *args, previous = frame)
+
+    self.assertEqual(frame.bounds, new_frame.bounds)
+    self.assertEqual(len([1 for a, b in zip(frame.columns, new_frame.columns) if a != b]), subwindow.vline.call_count)
+
   @require_curses
   @patch('nyx.panel.graph.tor_controller')
   def test_draw_accounting_stats(self, tor_controller_mock):
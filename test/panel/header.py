@@ -356,3 +356,17 @@ class TestHeaderPanel(unittest.TestCase):
     self.assertEqual('page 2 / 4 - m: menu, p: pause, h: page help, q: quit', test.render(nyx.panel.header._draw_status, 0, 0, False, None).content)
     self.assertEqual('Paused', test.render(nyx.panel.header._draw_status, 0, 0, True, None).content)
     self.assertEqual('pepperjack is wonderful!', test.render(nyx.panel.header._draw_status, 0, 0, False, 'pepperjack is wonderful!').content)
+
+  @require_curses
+  @patch('nyx.panel.header.nyx_interface')
+  @patch('nyx.panel.header.tor_controller')
+  @patch('nyx.panel.header.tor_controllers')
+  def test_draw_status_with_multiple_instances(self, tor_controllers_mock, tor_controller_mock, nyx_interface_mock):
+    nyx_interface_mock().get_page.return_value = 1
+    nyx_interface_mock().page_count.return_value = 4
+
+    instances = [Mock(), Mock(), Mock()]
+    tor_controllers_mock.return_value = instances
+    tor_controller_mock.return_value = instances[1]
+
+    self.assertEqual('page 2 / 4, tor 2 / 3 - m: menu, p: pause, t: next tor, h: page help, q: quit', test.render(nyx.panel.header._draw_status, 0, 0, False, None).content)
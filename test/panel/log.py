@@ -2,10 +2,19 @@
 Unit tests for nyx.panel.log.
 """
 
+import curses
+import gzip
+import os
+import re
+import shutil
+import tempfile
 import time
 import unittest
 
+import nyx.curses
+import nyx.log
 import nyx.panel.log
+import stem.response.events
 import test
 
 from nyx.log import LogEntry, LogFilters
@@ -73,6 +82,58 @@ def entries():
 
 
 class TestLogPanel(unittest.TestCase):
+  def test_events_received_while_starting(self):
+    def add_event_listener(listener, event_type):
+      if event_type == 'NOTICE':
+        listener(Mock(spec = stem.response.events.LogEvent, type = 'NOTICE', arrived_at = NOW, message = 'Bootstrapped 100%: Done'))
+        time.sleep(0.1)  # give the event a chance to be processed
+
+    controller = Mock(
+      get_info = Mock(return_value = 'NOTICE WARN ERR'),
+      get_conf = Mock(return_value = []),
+      add_event_listener = add_event_listener,
+    )
+
+    nyx_logger_emit = nyx.panel.log.NYX_LOGGER.emit
+
+    try:
+      with patch('nyx.panel.log.tor_controller', Mock(return_value = controller)), patch('nyx.tor_controller', Mock(return_value = controller)):
+        panel = nyx.panel.log.LogPanel()
+        panel._event_queue.stop()
+    finally:
+      nyx.panel.log.NYX_LOGGER.emit = nyx_logger_emit
+
+    self.assertEqual(['Bootstrapped 100%: Done'], [entry.message for entry in panel._event_log if entry.type == 'NOTICE'])
+
+  @patch('time.localtime', Mock(return_value = TIME_STRUCT))
+  def test_save_snapshot(self):
+    panel = nyx.panel.log.LogPanel.__new__(nyx.panel.log.LogPanel)
+    panel._event_log = nyx.log.LogGroup(100)
+    panel._filter = LogFilters()
+    panel._filter.select('listener')
+
+    for entry in reversed(entries()):
+      panel._event_log.add(entry)
+
+    tmp_dir = tempfile.mkdtemp()
+    progress = []
+
+    try:
+      for filename in ('snapshot', 'snapshot.gz'):
+        path = os.path.join(tmp_dir, filename)
+        self.assertEqual(3, panel.save_snapshot(path, lambda *args: progress.append(args)))
+
+        with (gzip.open(path, 'rt') if filename.endswith('.gz') else open(path)) as snapshot_file:
+          self.assertEqual([
+            '16:41:37 [NOTICE] Opening Socks listener on 127.0.0.1:9050',
+            '16:41:37 [NOTICE] Opening Control listener on 127.0.0.1:9051',
+            '16:41:37 [NOTICE] Opening OR listener on 0.0.0.0:7000',
+          ], snapshot_file.read().splitlines())
+
+        self.assertEqual((8, 8), progress[-1])
+    finally:
+      shutil.rmtree(tmp_dir)
+
   @require_curses
   def test_draw_title(self):
     rendered = test.render(nyx.panel.log._draw_title, ['NOTICE', 'WARN', 'ERR'], LogFilters())
@@ -92,6 +153,29 @@ class TestLogPanel(unittest.TestCase):
     rendered = test.render(nyx.panel.log._draw_title, ['NOTICE', 'WARN', 'ERR'], log_filter)
     self.assertEqual('Events (NOTICE-ERR, filter: stuff*):', rendered.content)
 
+  @require_curses
+  def test_draw_title_while_prepopulating(self):
+    rendered = test.render(nyx.panel.log._draw_title, ['NOTICE', 'WARN', 'ERR'], LogFilters(), 1523)
+    self.assertEqual('Events (NOTICE-ERR, loading history: 1523):', rendered.content)
+
+  @require_curses
+  def test_draw_title_with_dropped_events(self):
+    rendered = test.render(nyx.panel.log._draw_title, ['NOTICE', 'WARN', 'ERR'], LogFilters(), None, 87)
+    self.assertEqual('Events (NOTICE-ERR, dropped: 87):', rendered.content)
+
+  @require_curses
+  def test_draw_title_with_search(self):
+    rendered = test.render(nyx.panel.log._draw_title, ['NOTICE', 'WARN', 'ERR'], LogFilters(), None, 0, ('127.0.0.1', 1, 4))
+    self.assertEqual('Events (NOTICE-ERR, search: 127.0.0.1 (2/4)):', rendered.content)
+
+    rendered = test.render(nyx.panel.log._draw_title, ['NOTICE', 'WARN', 'ERR'], LogFilters(), None, 0, ('dragons', 0, 0))
+    self.assertEqual('Events (NOTICE-ERR, search: dragons (no results)):', rendered.content)
+
+  @require_curses
+  def test_draw_title_with_memory_usage(self):
+    rendered = test.render(nyx.panel.log._draw_title, ['NOTICE', 'WARN', 'ERR'], LogFilters(), None, 0, None, 2700000)
+    self.assertEqual('Events (NOTICE-ERR, memory: 2.5 MB):', rendered.content)
+
   @require_curses
   @patch('time.localtime', Mock(return_value = TIME_STRUCT))
   def test_draw_entry(self):
@@ -128,6 +212,51 @@ class TestLogPanel(unittest.TestCase):
     rendered = test.render(nyx.panel.log._draw_entries, 0, 0, entries(), True)
     self.assertEqual(EXPECTED_ENTRIES, rendered.content)
 
+  @require_curses
+  @patch('time.localtime', Mock(return_value = TIME_STRUCT))
+  @patch('nyx.log.day_count', Mock(return_value = 5))
+  def test_draw_entries_stops_at_the_bottom(self):
+    event_log = iter([LogEntry(NOW, 'NOTICE', 'Bootstrapped %i%%' % i) for i in range(5000)])
+    test.render(nyx.panel.log._draw_entries, 0, 0, event_log, True)
+
+    remaining = len(list(event_log))
+    self.assertTrue(4900 < remaining < 5000, 'pulled %i entries to fill a page' % (5000 - remaining))
+
+  @require_curses
+  @patch('time.localtime', Mock(return_value = TIME_STRUCT))
+  @patch('nyx.log.day_count', Mock(return_value = 5))
+  @patch('nyx.panel.log.nyx_interface', Mock(return_value = Mock(is_paused = Mock(return_value = False))))
+  def test_scrolling_to_the_end_of_wrapped_entries(self):
+    panel = nyx.panel.log.LogPanel.__new__(nyx.panel.log.LogPanel)
+    panel._event_log = nyx.log.LogGroup(1000)
+    panel._event_types = ['NOTICE']
+    panel._filter = LogFilters()
+    panel._show_duplicates = True
+    panel._search = None
+    panel._search_jump = False
+    panel._scroller = nyx.curses.Scroller()
+    panel._prepopulated_count = None
+    panel._event_queue = Mock()
+    panel._event_queue.metrics.return_value = nyx.log.QueueMetrics(0, 0, 0, 0, 0)
+    panel._last_content_height = 0
+    panel._last_page_size = 0
+
+    for i in range(100):
+      panel._event_log.add(LogEntry(NOW, 'NOTICE', 'entry %03i wraps onto a second line %s' % (i, 'ho hum, ' * 8)))
+
+    test.render(panel._draw)
+    self.assertEqual(100, panel._last_content_height)
+
+    panel._scroller.handle_key(nyx.curses.KeyInput(curses.KEY_END), panel._last_content_height, panel._last_page_size)
+    lines = test.render(panel._draw).content.splitlines()
+
+    # each entry is two lines, and our oldest is at the bottom
+
+    shown = [re.search('entry (\\d+)', line).group(1) for line in lines[1:] if '[NOTICE]' in line]
+    self.assertEqual((len(lines) - 1) // 2, len(shown))
+    self.assertEqual('000', shown[-1])
+    self.assertEqual(['%03i' % i for i in range(len(shown) - 1, -1, -1)], shown)
+
   @require_curses
   @patch('time.localtime', Mock(return_value = TIME_STRUCT))
   @patch('time.strftime', Mock(return_value = 'October 26, 2011'))
@@ -0,0 +1,94 @@
+"""
+Unit tests for nyx.recorder.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import nyx.recorder
+import stem
+import stem.control
+
+from stem.control import EventType
+
+RECORDING = (
+  [0.0, 'GETINFO version', '250-version=0.4.2.6\r\n250 OK\r\n'],
+  [0.0, 'GETINFO process/pid', '250-process/pid=4827\r\n250 OK\r\n'],
+  [1.0, None, '650 BW 15 25\r\n'],
+  [2.0, None, '650 BW 10 20\r\n'],
+  [2.0, 'GETINFO version', '250-version=0.4.3.1\r\n250 OK\r\n'],
+)
+
+
+class TestRecorder(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    self.recording_path = os.path.join(self.tmp_dir, 'recording.gz')
+
+    with gzip.open(self.recording_path, 'wt') as recording:
+      for entry in RECORDING:
+        recording.write(json.dumps(entry) + '\n')
+
+  def test_replay(self):
+    controller = stem.control.Controller(nyx.recorder.ReplaySocket(self.recording_path, speed = 20), is_authenticated = True)
+    self.addCleanup(controller.close)
+
+    events = []
+    controller.add_event_listener(lambda event: events.append((event.read, event.written)), EventType.BW)
+
+    self.assertEqual('0.4.2.6', controller.get_info('version'))
+    self.assertEqual(None, controller.get_pid(None))  # pids of the system we recorded on aren't replayed
+    self.assertRaises(stem.InvalidArguments, controller.get_info, 'blarg')
+    self.assertEqual(self.recording_path, controller.get_socket().get_socket_path())
+
+    self._wait_for(lambda: len(events) == 2)
+    self.assertEqual([(15, 25), (10, 20)], events)
+
+    # once we've reached a later point of the recording we provide its replies
+
+    controller.clear_cache()
+    self.assertEqual('0.4.3.1', controller.get_info('version'))
+
+  def test_replay_of_interrupted_recording(self):
+    with open(self.recording_path, 'rb') as recording:
+      content = recording.read()
+
+    with open(self.recording_path, 'wb') as recording:
+      recording.write(content[:-8])  # drop gzip's trailer
+
+    controller = stem.control.Controller(nyx.recorder.ReplaySocket(self.recording_path), is_authenticated = True)
+    self.addCleanup(controller.close)
+
+    self.assertEqual('0.4.2.6', controller.get_info('version'))
+
+  def test_record(self):
+    output_path = os.path.join(self.tmp_dir, 'output.gz')
+    controller = nyx.recorder.recording_controller(output_path)(nyx.recorder.ReplaySocket(self.recording_path, speed = 20), is_authenticated = True)
+
+    controller.add_event_listener(lambda event: None, EventType.BW)
+    self.assertEqual('0.4.2.6', controller.get_info('version'))
+    time.sleep(0.2)  # at this speed our events are played back within a tenth of a second
+
+    controller.close()
+
+    with gzip.open(output_path, 'rt') as recording:
+      entries = [json.loads(line) for line in recording]
+
+    self.assertTrue(['GETINFO version', '250-version=0.4.2.6\r\n250 OK\r\n'] in [entry[1:] for entry in entries])
+    self.assertEqual(['650 BW 15 25\r\n', '650 BW 10 20\r\n'], [reply for _, request, reply in entries if request is None])
+
+    offsets = [offset for offset, _, _ in entries]
+    self.assertEqual(sorted(offsets), offsets)
+
+  def _wait_for(self, condition, timeout = 2):
+    start = time.time()
+
+    while not condition() and time.time() - start < timeout:
+      time.sleep(0.01)
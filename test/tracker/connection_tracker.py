@@ -1,7 +1,10 @@
+import io
 import time
 import unittest
 
-from nyx.tracker import ConnectionTracker
+import stem.control
+
+from nyx.tracker import ConnectionTracker, _connections_by_pid
 
 from stem.util import connection
 
@@ -17,6 +20,19 @@ STEM_CONNECTIONS = [
   connection.Connection('127.0.0.1', 1059, '74.125.28.106', 80, 'tcp', False)
 ]
 
+PROC_TCP = b"""\
+  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 0100007F:2352 00000000:0000 0A 00000000:00000000 00:00000000 00000000   110        0 15512 1 0000000000000000 100 0 0 10 0
+   1: 0100007F:2352 F3CE774B:0016 01 00000000:00000000 00:00000000 00000000   110        0 20003 1 0000000000000000 20 4 30 10 -1
+   2: 0100007F:235C 281E3B56:01BB 01 00000000:00000000 00:00000000 00000000   110        0 20004 1 0000000000000000 20 4 30 10 -1
+   3: 0100007F:0D71 6A1C7D4A:0050 01 00000000:00000000 00:00000000 00000000  1000        0 30001 1 0000000000000000 20 4 30 10 -1
+   4: 0100007F:235C 6A1C7D4A:0050 06 00000000:00000000 00:00000000 00000000   110        0 20005 1 0000000000000000 20 4 30 10 -1
+"""
+
+PROC_UDP = b"""\
+  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode ref pointer drops
+"""
+
 
 class TestConnectionTracker(unittest.TestCase):
   @patch('nyx.tracker.tor_controller')
@@ -120,3 +136,119 @@ class TestConnectionTracker(unittest.TestCase):
       self.assertEqual(STEM_CONNECTIONS[1].remote_address, connections[1].remote_address)
       self.assertTrue(second_start_time < connections[1].start_time < time.time())
       self.assertFalse(connections[1].is_legacy)
+
+  @patch('nyx.tracker.tor_controller')
+  @patch('nyx.tracker.connection.get_connections')
+  @patch('nyx.tracker.system', Mock(return_value = Mock()))
+  @patch('stem.util.proc.is_available', Mock(return_value = False))
+  @patch('nyx.tracker.connection.system_resolvers', Mock(return_value = [connection.Resolver.NETSTAT]))
+  def test_counts(self, get_value_mock, tor_controller_mock):
+    tor_controller_mock().get_pid.return_value = 12345
+    tor_controller_mock().get_conf.return_value = '0'
+    tor_controller_mock().get_ports.side_effect = lambda listener, default = None: {
+      stem.control.Listener.OR: [3531],
+      stem.control.Listener.DIR: [],
+      stem.control.Listener.CONTROL: [1766],
+    }[listener]
+
+    get_value_mock.return_value = STEM_CONNECTIONS
+
+    with ConnectionTracker(0.04) as daemon:
+      time.sleep(0.01)
+      self.assertEqual((1, 1, 1), daemon.get_counts())
+
+      get_value_mock.return_value = STEM_CONNECTIONS[2:]
+      time.sleep(0.05)
+      self.assertEqual((0, 1, 0), daemon.get_counts())
+
+    self.assertEqual((0, 0, 0), daemon.get_counts())
+
+  @patch('nyx.tracker.proc._inodes_for_sockets')
+  @patch('nyx.tracker.os.path.exists', Mock(return_value = False))
+  def test_connections_by_pid(self, inodes_mock):
+    inodes_mock.side_effect = lambda pid: {
+      12345: set([b'15512', b'20003']),
+      23456: set([b'20004', b'20005']),
+    }[pid]
+
+    proc_contents = {'/proc/net/tcp': PROC_TCP, '/proc/net/udp': PROC_UDP}
+
+    with patch('nyx.tracker.open', create = True, side_effect = lambda path, mode: io.BytesIO(proc_contents[path])):
+      results = _connections_by_pid(12345, [23456])
+
+    # skips listeners, connections that aren't established, and processes
+    # other than the ones we requested
+
+    self.assertEqual([connection.Connection('127.0.0.1', 9042, '75.119.206.243', 22, 'tcp', False)], results[12345])
+    self.assertEqual([connection.Connection('127.0.0.1', 9052, '86.59.30.40', 443, 'tcp', False)], results[23456])
+
+  @patch('nyx.tracker.proc._inodes_for_sockets')
+  @patch('nyx.tracker.os.path.exists', Mock(return_value = False))
+  def test_connections_by_pid_with_unreadable_process(self, inodes_mock):
+    def inodes(pid):
+      if pid == 23456:
+        raise IOError('Unable to read our file descriptors: permission denied')
+
+      return set([b'15512', b'20003'])
+
+    inodes_mock.side_effect = inodes
+    proc_contents = {'/proc/net/tcp': PROC_TCP, '/proc/net/udp': PROC_UDP}
+
+    # other processes we can't read are skipped, but not the one we require
+
+    with patch('nyx.tracker.open', create = True, side_effect = lambda path, mode: io.BytesIO(proc_contents[path])):
+      results = _connections_by_pid(12345, [23456])
+      self.assertRaises(IOError, _connections_by_pid, 23456, [12345])
+
+    self.assertEqual([12345], list(results.keys()))
+    self.assertEqual([connection.Connection('127.0.0.1', 9042, '75.119.206.243', 22, 'tcp', False)], results[12345])
+
+  @patch('nyx.tracker.proc.connections')
+  def test_connections_by_pid_without_stem_helpers(self, connections_mock):
+    def connections(pid):
+      if pid == 23456:
+        raise IOError('Unable to read our file descriptors: permission denied')
+
+      return STEM_CONNECTIONS
+
+    connections_mock.side_effect = connections
+
+    with patch('nyx.tracker.proc', Mock(spec = ['connections'], connections = connections_mock)):
+      self.assertEqual({12345: STEM_CONNECTIONS}, _connections_by_pid(12345, [23456]))
+
+  @patch('nyx.tracker.tor_controller')
+  @patch('nyx.tracker._connections_by_pid')
+  @patch('nyx.tracker.system', Mock(return_value = Mock()))
+  @patch('stem.util.proc.is_available', Mock(return_value = False))
+  @patch('nyx.tracker.connection.system_resolvers', Mock(return_value = [connection.Resolver.PROC]))
+  def test_tracking_multiple_instances(self, connections_mock, tor_controller_mock):
+    primary, other = Mock(), Mock()
+
+    for controller, pid, or_port in ((primary, 12345, 3531), (other, 23456, 1766)):
+      controller.get_pid.return_value = pid
+      controller.get_conf.return_value = '0'
+      controller.get_ports.side_effect = lambda listener, default = None, or_port = or_port: [or_port] if listener == stem.control.Listener.OR else []
+
+    tor_controller_mock.return_value = primary
+    connections_mock.return_value = {12345: STEM_CONNECTIONS[:1], 23456: STEM_CONNECTIONS[1:]}
+
+    with patch('nyx.tor_controllers', Mock(return_value = [primary, other])):
+      with ConnectionTracker(10) as daemon:
+        time.sleep(0.05)
+
+        # a single proc read provides the connections of both instances
+
+        self.assertEqual(1, connections_mock.call_count)
+        self.assertEqual((12345, [23456]), connections_mock.call_args[0])
+
+        self.assertEqual(['75.119.206.243'], [conn.remote_address for conn in daemon.get_value()])
+        self.assertEqual((1, 0, 0), daemon.get_counts())
+        self.assertEqual((1, 1, 0), daemon.get_counts(23456))
+
+        # switching instances provides its connections right away
+
+        tor_controller_mock.return_value = other
+        daemon.set_controller(other)
+
+        self.assertEqual(['86.59.30.40', '74.125.28.106'], [conn.remote_address for conn in daemon.get_value()])
+        self.assertEqual((1, 1, 0), daemon.get_counts())
@@ -51,6 +51,34 @@ class TestResourceTracker(unittest.TestCase):
 
     resources_via_proc_mock.assert_called_with(12345)
 
+  @patch('nyx.tracker.tor_controller')
+  @patch('nyx.tracker._resources_via_proc')
+  @patch('nyx.tracker.system', Mock(return_value = Mock()))
+  @patch('nyx.tracker.proc.is_available', Mock(return_value = True))
+  def test_fetching_samplings_of_several_instances(self, resources_via_proc_mock, tor_controller_mock):
+    tor_controller_mock().get_pid.return_value = 12345
+    other_controller = Mock(get_pid = Mock(return_value = 23456))
+
+    def resources_via_proc(pid):
+      if pid == 34567:
+        raise IOError('process exited')
+
+      return (105.3, 2.4, 8072, 0.3) if pid == 12345 else (20.0, 4.0, 4096, 0.1)
+
+    resources_via_proc_mock.side_effect = resources_via_proc
+    unreadable_controller = Mock(get_pid = Mock(return_value = 34567))
+
+    with patch('nyx.tor_controllers', Mock(return_value = [tor_controller_mock(), other_controller, unreadable_controller])):
+      with ResourceTracker(0.04) as daemon:
+        time.sleep(0.01)
+
+        self.assertEqual(1, daemon.run_counter())
+        self.assertEqual(8072, daemon.get_value().memory_bytes)
+        self.assertEqual(8072, daemon.get_value(12345).memory_bytes)
+        self.assertEqual(4096, daemon.get_value(23456).memory_bytes)
+        self.assertEqual(5.0, daemon.get_value(23456).cpu_average)
+        self.assertEqual(0, daemon.get_value(34567).memory_bytes)
+
   @patch('nyx.tracker.tor_controller')
   @patch('nyx.tracker.proc.is_available')
   @patch('nyx.tracker._resources_via_ps', Mock(return_value = (105.3, 2.4, 8072, 0.3)))
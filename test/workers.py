@@ -0,0 +1,83 @@
+"""
+Unit tests for nyx.workers.
+"""
+
+import os
+import unittest
+
+import nyx.log
+import nyx.tracker
+import nyx.workers
+
+try:
+  # added in python 3.3
+  from unittest.mock import Mock, patch
+except ImportError:
+  from mock import Mock, patch
+
+CONSENSUS = """\
+network-status-version 3
+r caerSidi p1aag7VwarGxqctS7/fS0y5FU+s 9ZUHwDJMbT9pyyY0KJvMl7hGV1M 2014-09-14 19:20:01 71.35.133.197 9001 0
+s Fast Running Stable Valid
+r Unnamed SRcqYeWI6/CHdB5pVOL5Qlv2gI8 vJoeO4GQ2JJk5pPZg2MuozGNHcs 2014-09-14 04:46:28 127.0.0.1 9050 0
+"""
+
+EXPECTED_RELAYS = [
+  ('A7569A83B5706AB1B1A9CB52EFF7D2D32E4553EB', '71.35.133.197', 9001, 'caerSidi'),
+  ('49172A61E588EBF087741E6954E2F9425BF6808F', '127.0.0.1', 9050, 'Unnamed'),
+]
+
+
+class TestWorkers(unittest.TestCase):
+  def setUp(self):
+    patches = [
+      patch.dict(nyx.workers.CONFIG, {'worker_processes': 0}),
+      patch('nyx.workers.POOL', None),
+      patch('nyx.workers.POOL_STOPPED', False),
+    ]
+
+    for worker_patch in patches:
+      worker_patch.start()
+      self.addCleanup(worker_patch.stop)
+
+  def test_parse_consensus(self):
+    self.assertEqual(EXPECTED_RELAYS, nyx.tracker._parse_consensus(CONSENSUS))
+
+  def test_run_in_our_thread(self):
+    self.assertFalse(nyx.workers.is_enabled())
+    self.assertEqual(os.getpid(), nyx.workers.run(os.getpid))
+    self.assertEqual(EXPECTED_RELAYS, nyx.workers.run(nyx.tracker._parse_consensus, CONSENSUS))
+
+  def test_run_in_worker_process(self):
+    nyx.workers.CONFIG['worker_processes'] = 1
+    self.addCleanup(nyx.workers.stop)
+
+    self.assertTrue(nyx.workers.is_enabled())
+    self.assertNotEqual(os.getpid(), nyx.workers.run(os.getpid))
+    self.assertEqual(EXPECTED_RELAYS, nyx.workers.run(nyx.tracker._parse_consensus, CONSENSUS))
+
+    # exceptions from the worker are raised to our caller
+
+    self.assertRaises(IOError, nyx.workers.run, nyx.tracker._connections_by_pid, -1)
+
+    nyx.workers.stop()
+    self.assertFalse(nyx.workers.is_enabled())
+    self.assertEqual(os.getpid(), nyx.workers.run(os.getpid))
+
+  @patch('nyx.workers._pool')
+  def test_falls_back_when_workers_break(self, pool_mock):
+    nyx.workers.CONFIG['worker_processes'] = 1
+    pool_mock().submit().result.side_effect = nyx.workers.concurrent.futures.process.BrokenProcessPool('worker died')
+
+    self.assertEqual(os.getpid(), nyx.workers.run(os.getpid))
+    self.assertFalse(nyx.workers.is_enabled())
+
+  @patch('nyx.workers._pool', Mock(return_value = None))
+  @patch('nyx.workers.is_enabled', Mock(return_value = True))
+  def test_read_tor_log_in_worker(self):
+    tor_log = os.path.join(os.path.dirname(__file__), 'log', 'data', 'tor_log')
+    entries = list(nyx.log.read_tor_log(tor_log))
+
+    self.assertEqual(21, len(entries))
+    self.assertEqual('Interrupt: exiting cleanly.', entries[0].message)
+    self.assertEqual('Tor 0.2.7.0-alpha-dev (git-4247ce99e5d9b7b2) opening new log file.', entries[-1].message)